@@ -0,0 +1,526 @@
+import bisect
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+import config
+from storage import VENDOR_COLUMNS
+from utils import get_logger, lazy_import, wib_epoch
+from metrics import ALERT_DELIVERIES, ALERT_EVALUATE_SECONDS, ALERTS_FIRED
+
+logger = get_logger('alerts')
+
+requests = lazy_import('requests')
+
+# Sisi harga rule -> suffix kolom history
+SIDES = {'jual': 'Jual', 'buyback': 'Buyback'}
+# below/above: harga Rupiah melewati threshold; move: perubahan % sejak harga pembukaan hari itu
+KINDS = ('below', 'above', 'move')
+DIRECTIONS = ('up', 'down', 'any')
+
+AlertRule = namedtuple('AlertRule', ['id', 'vendor', 'berat', 'side', 'kind', 'threshold', 'direction',
+                                     'cooldown', 'webhook', 'owner', 'created'])
+
+def rule_dict(rule):
+    return rule._asdict()
+
+def public_event(event):
+    """Event untuk outbox/webhook: URL webhook rule tidak ikut dikirim ke consumer"""
+    return {key: value for key, value in event.items() if key != 'webhook'}
+
+def url_origin(url):
+    """(scheme, host, port, path) URL http(s); None jika bukan http(s), tanpa host atau memuat userinfo"""
+    try:
+        parts = urlsplit(str(url).strip())
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme not in ('http', 'https') or not parts.hostname or parts.username or parts.password:
+        return None
+    return parts.scheme, parts.hostname, port or (443 if parts.scheme == 'https' else 80), parts.path or '/'
+
+def webhook_allowed(url, allowlist=None):
+    """Apakah URL webhook cocok dengan salah satu prefix config.ALERT_WEBHOOK_ALLOWLIST
+    (scheme, host dan port sama persis, path diawali path prefix)"""
+    target = url_origin(url)
+    if target is None:
+        return False
+    for prefix in config.ALERT_WEBHOOK_ALLOWLIST if allowlist is None else allowlist:
+        allowed = url_origin(prefix)
+        if allowed is None or target[:3] != allowed[:3]:
+            continue
+        path = allowed[3] if allowed[3].endswith('/') else allowed[3] + '/'
+        if target[3] == allowed[3] or target[3].startswith(path):
+            return True
+    return False
+
+def parse_rule(data):
+    """Validasi body JSON rule baru -> dict kolom; ValueError jika tidak valid"""
+    if not isinstance(data, dict):
+        raise ValueError('Rule must be a JSON object')
+    vendors = {name.lower(): name for name in VENDOR_COLUMNS}
+    vendors.update({prefix.lower(): name for name, prefix in VENDOR_COLUMNS.items()})
+    vendor = vendors.get(str(data.get('vendor', '')).lower())
+    if vendor is None:
+        raise ValueError(f"Invalid vendor '{data.get('vendor')}', expected one of {', '.join(VENDOR_COLUMNS)}")
+    berat = str(data.get('berat', '')).strip()
+    try:
+        float(berat)
+    except ValueError:
+        raise ValueError(f"Invalid berat '{berat}'")
+    side = str(data.get('side', 'jual')).lower()
+    if side not in SIDES:
+        raise ValueError(f"Invalid side '{side}', expected one of {', '.join(SIDES)}")
+    kind = str(data.get('kind', '')).lower()
+    if kind not in KINDS:
+        raise ValueError(f"Invalid kind '{kind}', expected one of {', '.join(KINDS)}")
+    try:
+        threshold = float(data['threshold'])
+        cooldown = int(data.get('cooldown', config.ALERT_COOLDOWN))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("'threshold' (number) is required and 'cooldown' must be an integer")
+    if threshold <= 0 or cooldown < 0:
+        raise ValueError("'threshold' must be positive and 'cooldown' must not be negative")
+    direction = str(data.get('direction', 'any')).lower() if kind == 'move' else None
+    if kind == 'move' and direction not in DIRECTIONS:
+        raise ValueError(f"Invalid direction '{direction}', expected one of {', '.join(DIRECTIONS)}")
+    webhook = data.get('webhook') or None
+    if webhook is not None:
+        if not config.ALERT_WEBHOOK_ALLOWLIST:
+            raise ValueError("Webhooks are disabled on this server, poll /api/alerts/events instead")
+        if not webhook_allowed(webhook):
+            raise ValueError("'webhook' must be an http(s) URL under an allowed prefix (GOLD_ALERT_WEBHOOK_ALLOWLIST)")
+        webhook = str(webhook).strip()
+    owner = data.get('owner')
+    return {
+        'vendor': vendor, 'berat': berat, 'side': side, 'kind': kind, 'threshold': threshold,
+        'direction': direction, 'cooldown': cooldown, 'webhook': webhook,
+        'owner': str(owner) if owner is not None else None
+    }
+
+def index_kinds(rule):
+    """Index tempat rule disimpan: 'move' any masuk ke index naik dan turun"""
+    if rule.kind != 'move':
+        return (rule.kind,)
+    return ('up', 'down') if rule.direction == 'any' else (rule.direction,)
+
+class ThresholdIndex:
+    """Threshold terurut + id rule paralel untuk satu (vendor, berat, sisi, jenis).
+
+    Rule yang terpicu oleh satu tick = threshold yang dilewati pergerakan harga, yaitu satu
+    rentang kontigu: dua bisect, O(log n + k), tanpa scan semua rule."""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.thresholds = [threshold for threshold, _ in pairs]
+        self.ids = [rule_id for _, rule_id in pairs]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, threshold, rule_id):
+        position = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, rule_id)
+
+    def remove(self, threshold, rule_id):
+        position = bisect.bisect_left(self.thresholds, threshold)
+        while position < len(self.ids) and self.thresholds[position] == threshold:
+            if self.ids[position] == rule_id:
+                del self.thresholds[position]
+                del self.ids[position]
+                return True
+            position += 1
+        return False
+
+    def crossed(self, low, high):
+        """Id rule dengan low < threshold <= high"""
+        if high <= low:
+            return []
+        return self.ids[bisect.bisect_right(self.thresholds, low):bisect.bisect_right(self.thresholds, high)]
+
+class AlertStore:
+    """Rule alert + outbox event di SQLite (dibagi semua proses worker, seperti store tick).
+
+    rules_version di tabel meta naik di setiap perubahan rule, sehingga proses leader yang
+    mengevaluasi tick tahu kapan index harus dibangun ulang dari rule yang ditambah worker lain."""
+
+    def __init__(self, path=None):
+        self.path = path or config.ALERTS_PATH
+        self._local = threading.local()
+        self._ready = False
+
+    def _connect(self):
+        """Satu koneksi per thread (sqlite3 connection tidak thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._ready:
+            self.ensure_structure(conn)
+        return conn
+
+    def ensure_structure(self, conn):
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS alert_rules (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    vendor TEXT NOT NULL,
+                    berat TEXT NOT NULL,
+                    side TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    threshold REAL NOT NULL,
+                    direction TEXT,
+                    cooldown INTEGER NOT NULL,
+                    webhook TEXT,
+                    owner TEXT,
+                    created INTEGER NOT NULL,
+                    last_fired INTEGER
+                )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS alert_rules_owner ON alert_rules (owner)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS alert_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rule_id INTEGER NOT NULL,
+                    owner TEXT,
+                    fired_at INTEGER NOT NULL,
+                    payload TEXT NOT NULL
+                )''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )''')
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('rules_version', '0')")
+        self._ready = True
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'rules_version'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'rules_version'").fetchone()[0])
+
+    def rules_version(self):
+        return int(self._connect().execute("SELECT value FROM meta WHERE key = 'rules_version'").fetchone()[0])
+
+    def add(self, fields_list):
+        """Simpan rule baru (list dict dari parse_rule) dalam satu transaksi; return (rules, versi)"""
+        conn = self._connect()
+        created = int(time.time())
+        rules = []
+        with conn:
+            for fields in fields_list:
+                cursor = conn.execute(
+                    'INSERT INTO alert_rules (vendor, berat, side, kind, threshold, direction, cooldown, webhook, '
+                    'owner, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (fields['vendor'], fields['berat'], fields['side'], fields['kind'], fields['threshold'],
+                     fields['direction'], fields['cooldown'], fields['webhook'], fields['owner'], created))
+                rules.append(AlertRule(id=cursor.lastrowid, created=created, **fields))
+            version = self._bump_version(conn)
+        return rules, version
+
+    def delete(self, rule_id):
+        """Hapus rule; return (rule yang dihapus atau None, versi)"""
+        conn = self._connect()
+        with conn:
+            rule = self.get(rule_id)
+            if rule is None:
+                return None, None
+            conn.execute('DELETE FROM alert_rules WHERE id = ?', (rule_id,))
+            version = self._bump_version(conn)
+        return rule, version
+
+    def _rules(self, where='', params=(), limit=-1):
+        columns = ', '.join(AlertRule._fields)
+        rows = self._connect().execute(f'SELECT {columns} FROM alert_rules {where} ORDER BY id LIMIT ?',
+                                       tuple(params) + (limit,))
+        return [AlertRule(*row) for row in rows]
+
+    def get(self, rule_id):
+        rules = self._rules('WHERE id = ?', (rule_id,))
+        return rules[0] if rules else None
+
+    def rules(self, owner=None, limit=-1):
+        if owner is not None:
+            return self._rules('WHERE owner = ?', (owner,), limit)
+        return self._rules(limit=limit)
+
+    def snapshot(self):
+        """(versi, semua rule, last_fired per rule) dibaca dalam satu transaksi baca"""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN')
+            version = int(conn.execute("SELECT value FROM meta WHERE key = 'rules_version'").fetchone()[0])
+            rules = self._rules()
+            fired = dict(conn.execute('SELECT id, last_fired FROM alert_rules WHERE last_fired IS NOT NULL'))
+        return version, rules, fired
+
+    def record(self, events):
+        """Tulis event ke outbox + last_fired rule (debounce bertahan saat leader berganti)"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO alert_events (rule_id, owner, fired_at, payload) VALUES (?, ?, ?, ?)',
+                [(event['rule_id'], event['owner'], event['ts'], json.dumps(public_event(event))) for event in events])
+            conn.executemany('UPDATE alert_rules SET last_fired = ? WHERE id = ?',
+                             [(event['ts'], event['rule_id']) for event in events])
+            # Outbox dibatasi: event lama dibuang
+            conn.execute('DELETE FROM alert_events WHERE id <= (SELECT MAX(id) FROM alert_events) - ?',
+                         (config.ALERT_EVENTS_KEEP,))
+
+    def events(self, since=0, owner=None, limit=100):
+        """Event outbox setelah id since (cursor untuk consumer yang polling)"""
+        where, params = 'WHERE id > ?', [since]
+        if owner is not None:
+            where += ' AND owner = ?'
+            params.append(owner)
+        rows = self._connect().execute(
+            f'SELECT id, payload FROM alert_events {where} ORDER BY id LIMIT ?', params + [limit])
+        return [dict(json.loads(payload), id=event_id) for event_id, payload in rows]
+
+class AlertDispatcher:
+    """Pengiriman event alert di thread background, di luar jalur commit tick.
+
+    Setiap batch ditulis ke outbox SQLite (antrean lokal yang di-poll lewat /api/alerts/events),
+    lalu di-POST ke webhook rule jika ada. Antrean in-memory dibatasi: jika penuh, batch dibuang
+    dan dicatat di metric, bukan menahan commit tick."""
+
+    def __init__(self, store, max_queue=None, timeout=None):
+        self.store = store
+        self.timeout = timeout or config.ALERT_WEBHOOK_TIMEOUT
+        self._queue = queue.Queue(max_queue or config.ALERT_QUEUE_SIZE)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._session = None
+
+    def dispatch(self, events):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(events)
+        except queue.Full:
+            ALERT_DELIVERIES.inc(len(events), channel='outbox', outcome='dropped')
+            logger.warning(f"⚠️ Alert queue full, dropped {len(events)} events")
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Tunggu semua batch yang sudah di-dispatch selesai dikirim"""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            events = self._queue.get()
+            try:
+                self.deliver(events)
+            except Exception as e:
+                logger.error(f"❌ Alert delivery failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def deliver(self, events):
+        try:
+            self.store.record(events)
+            ALERT_DELIVERIES.inc(len(events), channel='outbox', outcome='ok')
+        except sqlite3.Error as e:
+            ALERT_DELIVERIES.inc(len(events), channel='outbox', outcome='error')
+            logger.error(f"❌ Failed to record {len(events)} alert events: {e}")
+        for event in events:
+            if not event.get('webhook'):
+                continue
+            # Rule lama / dari proses lain dicek ulang terhadap allowlist saat ini
+            if webhook_allowed(event['webhook']):
+                self.post(event)
+            else:
+                ALERT_DELIVERIES.inc(channel='webhook', outcome='rejected')
+                logger.warning(f"⚠️ Webhook for alert rule {event['rule_id']} is not in the allowlist, skipped")
+
+    def post(self, event):
+        if self._session is None:
+            self._session = requests.Session()
+        try:
+            # Tanpa mengikuti redirect: tujuan akhir harus URL yang lolos allowlist
+            response = self._session.post(event['webhook'], json=public_event(event), timeout=self.timeout,
+                                          allow_redirects=False)
+            response.raise_for_status()
+            ALERT_DELIVERIES.inc(channel='webhook', outcome='ok')
+        except requests.RequestException as e:
+            ALERT_DELIVERIES.inc(channel='webhook', outcome='error')
+            logger.warning(f"⚠️ Webhook for alert rule {event['rule_id']} failed: {e}")
+
+class AlertEngine:
+    """Evaluasi rule alert untuk setiap tick yang di-commit (commit listener DataManager).
+
+    Rule threshold disimpan di ThresholdIndex per (vendor, berat, sisi, jenis); tick hanya
+    mem-bisect rentang harga lama -> harga baru (below/above) dan perubahan % sejak pembukaan
+    lama -> baru (move), jadi biaya per tick tidak bergantung jumlah rule. Rule terpicu saat
+    threshold dilewati (edge), lalu di-debounce per rule dengan cooldown."""
+
+    def __init__(self, data_manager, store=None, dispatcher=None):
+        self.data_manager = data_manager
+        self.store = store or AlertStore()
+        self.dispatcher = dispatcher or AlertDispatcher(self.store)
+        self.version = None
+        self.rules = {}
+        self.indexes = {}
+        self.last_fired = {}
+        # (vendor, berat, sisi) -> [tanggal, harga pembukaan hari itu, harga terakhir]
+        self.state = {}
+        self._seeded = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Bangun ulang index dari semua rule di store (sekali saat start / rule diubah proses lain)"""
+        version, rules, fired = self.store.snapshot()
+        pairs = {}
+        for rule in rules:
+            for kind in index_kinds(rule):
+                pairs.setdefault((rule.vendor, rule.berat, rule.side, kind), []).append((rule.threshold, rule.id))
+        with self._lock:
+            self.rules = {rule.id: rule for rule in rules}
+            self.indexes = {key: ThresholdIndex(values) for key, values in pairs.items()}
+            # Debounce in-memory tetap dipakai jika lebih baru dari yang sudah tercatat di store
+            self.last_fired = {rule_id: max(ts, self.last_fired.get(rule_id, ts)) for rule_id, ts in fired.items()}
+            self.version = version
+        logger.info(f"🔔 Loaded {len(rules)} alert rules into {len(pairs)} indexes")
+
+    def refresh(self):
+        if self.store.rules_version() != self.version:
+            self.load()
+
+    def _index(self, rule, add):
+        for kind in index_kinds(rule):
+            key = (rule.vendor, rule.berat, rule.side, kind)
+            index = self.indexes.setdefault(key, ThresholdIndex())
+            if add:
+                index.add(rule.threshold, rule.id)
+            else:
+                index.remove(rule.threshold, rule.id)
+
+    def _apply(self, version, rules, add):
+        """Terapkan perubahan rule proses ini ke index jika tidak ada perubahan lain yang terlewat"""
+        with self._lock:
+            if self.version is None or version != self.version + 1:
+                # Index belum dibangun atau proses lain juga mengubah rule: load ulang saat refresh
+                return
+            for rule in rules:
+                if add:
+                    self.rules[rule.id] = rule
+                else:
+                    self.rules.pop(rule.id, None)
+                    self.last_fired.pop(rule.id, None)
+                self._index(rule, add)
+            self.version = version
+
+    def add_rules(self, data_list):
+        """Validasi + simpan rule baru; ValueError jika ada yang tidak valid"""
+        rules, version = self.store.add([parse_rule(data) for data in data_list])
+        self._apply(version, rules, add=True)
+        return rules
+
+    def remove_rule(self, rule_id):
+        rule, version = self.store.delete(rule_id)
+        if rule is not None:
+            self._apply(version, [rule], add=False)
+        return rule
+
+    def seed(self, berat, row):
+        """State awal berat dari history: harga terakhir sebelum tick ini + pembukaan hari tick ini"""
+        df = self.data_manager.get_existing_data(berat)
+        tanggal = str(row.get('Tanggal'))
+        if len(df) and str(df['Tanggal'].iat[-1]) == tanggal and str(df['Jam'].iat[-1]) == str(row.get('Jam')):
+            df = df.iloc[:-1]
+        today = df[df['Tanggal'].astype(str) == tanggal] if len(df) else df
+        for vendor, prefix in VENDOR_COLUMNS.items():
+            for side, field in SIDES.items():
+                column = f'{prefix}_{field}'
+                values = df[column].dropna() if column in df else ()
+                if len(values) == 0:
+                    continue
+                opens = today[column].dropna()
+                opening = float(opens.iat[0]) if len(opens) else None
+                self.state[(vendor, berat, side)] = [tanggal if opening else None, opening, float(values.iat[-1])]
+        self._seeded.add(berat)
+
+    def on_commit(self, berat, row):
+        """Commit listener DataManager: evaluasi tick baru, kirim event yang lolos debounce"""
+        with ALERT_EVALUATE_SECONDS.time():
+            self.refresh()
+            with self._lock:
+                if berat not in self._seeded:
+                    self.seed(berat, row)
+                events = self.evaluate(berat, row)
+        if events:
+            self.dispatcher.dispatch(events)
+        return events
+
+    def evaluate(self, berat, row):
+        tanggal, jam = str(row.get('Tanggal')), str(row.get('Jam'))
+        try:
+            ts = wib_epoch(tanggal, jam)
+        except ValueError:
+            ts = int(time.time())
+        events = []
+        for vendor, prefix in VENDOR_COLUMNS.items():
+            for side, field in SIDES.items():
+                price = row.get(f'{prefix}_{field}')
+                if price is None or price != price:
+                    continue
+                for kind, rule_id, context in self.crossed(vendor, berat, side, tanggal, float(price)):
+                    rule = self.rules.get(rule_id)
+                    if rule is None:
+                        continue
+                    last = self.last_fired.get(rule_id)
+                    if last is not None and ts - last < rule.cooldown:
+                        ALERTS_FIRED.inc(kind=rule.kind, outcome='debounced')
+                        continue
+                    self.last_fired[rule_id] = ts
+                    ALERTS_FIRED.inc(kind=rule.kind, outcome='fired')
+                    events.append(dict(context, rule_id=rule_id, owner=rule.owner, vendor=vendor, berat=berat,
+                                       side=side, kind=rule.kind, direction=kind if rule.kind == 'move' else None,
+                                       threshold=rule.threshold, webhook=rule.webhook, tanggal=tanggal, jam=jam,
+                                       ts=ts))
+        return events
+
+    def crossed(self, vendor, berat, side, tanggal, price):
+        """(jenis, id rule, konteks) untuk threshold yang dilewati harga ini; update state harga"""
+        key = (vendor, berat, side)
+        state = self.state.get(key)
+        if state is None:
+            # Tick pertama series ini: belum ada pergerakan untuk dievaluasi
+            self.state[key] = [tanggal, price, price]
+            return []
+        day, opening, previous = state
+        if day != tanggal:
+            # Hari baru: harga pembukaan = tick pertama hari itu, perubahan % mulai dari 0
+            opening, previous_move = price, 0.0
+        else:
+            previous_move = round((previous - opening) / opening * 100, 6)
+        move = round((price - opening) / opening * 100, 6)
+        self.state[key] = [tanggal, opening, price]
+
+        context = {'price': price, 'previous': previous, 'open': opening, 'move_pct': move}
+        hits = []
+        for kind, low, high in (('below', price, previous), ('above', previous, price),
+                                ('up', previous_move, move), ('down', -previous_move, -move)):
+            index = self.indexes.get((vendor, berat, side, kind))
+            if index is not None:
+                hits.extend((kind, rule_id, context) for rule_id in index.crossed(low, high))
+        return hits
+
+    def stats(self):
+        return {
+            'rules': len(self.rules),
+            'indexes': len(self.indexes),
+            'version': self.version,
+            'queued': self.dispatcher.pending()
+        }
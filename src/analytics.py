@@ -0,0 +1,231 @@
+import threading
+from collections import deque
+from itertools import combinations
+import config
+from storage import VENDOR_COLUMNS
+from utils import get_logger, lazy_import
+from metrics import ANALYTICS_UPDATES
+
+logger = get_logger('analytics')
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+FIELDS = ('Jual', 'Buyback')
+
+def as_price(value):
+    """Harga Rupiah sebagai int (history dibaca sebagai float64)"""
+    return int(value) if value is not None else None
+
+def round_price(value):
+    return round(value, 2) if value is not None else None
+
+class MovingAverage:
+    """Rata-rata N tick terakhir dengan running sum: update O(1)"""
+
+    def __init__(self, window, values=()):
+        self.window = window
+        self.values = deque(values, maxlen=window)
+        self.total = float(sum(self.values))
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    @property
+    def value(self):
+        return self.total / len(self.values) if self.values else None
+
+class VendorRollup:
+    """Rollup satu vendor pada satu berat: harga terakhir, spread, moving average, OHLC harian (Jual)"""
+
+    def __init__(self, windows):
+        self.latest = {field: None for field in FIELDS}
+        self.spread = None
+        self.averages = {field: {window: MovingAverage(window) for window in windows} for field in FIELDS}
+        # Tanggal -> [open, high, low, close, ticks]; satu entri per hari, urutan sisip = urutan waktu
+        self.daily = {}
+
+    def push(self, tanggal, jual, buyback):
+        for field, value in zip(FIELDS, (jual, buyback)):
+            if value is None:
+                continue
+            self.latest[field] = value
+            for average in self.averages[field].values():
+                average.push(value)
+        if jual is not None and buyback is not None:
+            self.spread = jual - buyback
+        if jual is not None:
+            day = self.daily.get(tanggal)
+            if day is None:
+                self.daily[tanggal] = [jual, jual, jual, jual, 1]
+            else:
+                day[1] = max(day[1], jual)
+                day[2] = min(day[2], jual)
+                day[3] = jual
+                day[4] += 1
+
+    @classmethod
+    def from_history(cls, windows, tanggal, jual, buyback):
+        """Batch vectorized dari kolom history (numpy float, NaN = kosong)"""
+        rollup = cls(windows)
+        for field, values in zip(FIELDS, (jual, buyback)):
+            present = values[~np.isnan(values)]
+            if present.size:
+                rollup.latest[field] = present[-1].item()
+            for window in windows:
+                rollup.averages[field][window] = MovingAverage(window, present[-window:].tolist())
+
+        both = ~np.isnan(jual) & ~np.isnan(buyback)
+        if both.any():
+            last = np.flatnonzero(both)[-1]
+            rollup.spread = (jual[last] - buyback[last]).item()
+
+        has_jual = ~np.isnan(jual)
+        if has_jual.any():
+            days = pd.DataFrame({'Tanggal': tanggal[has_jual], 'Jual': jual[has_jual]})
+            ohlc = days.groupby('Tanggal', sort=False)['Jual'].agg(['first', 'max', 'min', 'last', 'count'])
+            rollup.daily = {day: values for day, values in zip(ohlc.index, ohlc.to_numpy().tolist())}
+        return rollup
+
+    def to_dict(self, berat, days):
+        jual, buyback = self.latest['Jual'], self.latest['Buyback']
+        gram = float(berat)
+        return {
+            'jual': as_price(jual),
+            'buyback': as_price(buyback),
+            'spread': as_price(self.spread),
+            'spread_pct': round(self.spread / jual * 100, 3) if self.spread is not None and jual else None,
+            'per_gram': {
+                'jual': round(jual / gram, 2) if jual is not None else None,
+                'buyback': round(buyback / gram, 2) if buyback is not None else None
+            },
+            'ma': {str(window): {field.lower(): round_price(self.averages[field][window].value) for field in FIELDS}
+                   for window in self.averages['Jual']},
+            'daily': [{'date': day, 'open': as_price(o), 'high': as_price(h), 'low': as_price(l),
+                       'close': as_price(c), 'ticks': int(n)}
+                      for day, (o, h, l, c, n) in list(self.daily.items())[-days:]] if days else []
+        }
+
+class SeriesRollup:
+    """Rollup semua vendor inti untuk satu berat, terikat ke versi store tempat ia dibangun"""
+
+    def __init__(self, berat, version, vendors, ticks=0, updated=None):
+        self.berat = berat
+        self.version = version
+        self.vendors = vendors
+        self.ticks = ticks
+        self.updated = updated
+
+    @classmethod
+    def build(cls, berat, version, df, windows):
+        """Jalur batch: bangun ulang dari history wide (sekali per versi, tanpa loop per baris)"""
+        if df.empty:
+            return cls(berat, version, {vendor: VendorRollup(windows) for vendor in VENDOR_COLUMNS})
+        tanggal = df['Tanggal'].astype(str).to_numpy()
+        vendors = {}
+        for vendor, prefix in VENDOR_COLUMNS.items():
+            columns = [f'{prefix}_{field}' for field in FIELDS]
+            jual, buyback = (pd.to_numeric(df[col], errors='coerce').to_numpy('float64') if col in df
+                             else np.full(len(df), np.nan) for col in columns)
+            vendors[vendor] = VendorRollup.from_history(windows, tanggal, jual, buyback)
+        last = df.iloc[-1]
+        return cls(berat, version, vendors, len(df), f"{last['Tanggal']} {last['Jam']}")
+
+    def push(self, version, row):
+        """Jalur incremental: satu tick wide yang baru di-commit, O(vendor)"""
+        for vendor, prefix in VENDOR_COLUMNS.items():
+            self.vendors[vendor].push(row.get('Tanggal'), row.get(f'{prefix}_Jual'), row.get(f'{prefix}_Buyback'))
+        self.ticks += 1
+        self.updated = f"{row.get('Tanggal')} {row.get('Jam')}"
+        self.version = version
+
+    def to_dict(self, days):
+        vendors = {vendor: rollup.to_dict(self.berat, days) for vendor, rollup in self.vendors.items()}
+        premiums = {}
+        # Premium lintas vendor dari harga Jual terakhir (mis. ANTAM vs GALERI 24)
+        for a, b in combinations(self.vendors, 2):
+            jual_a, jual_b = vendors[a]['jual'], vendors[b]['jual']
+            if jual_a is not None and jual_b:
+                premiums[f'{a} vs {b}'] = {'jual': jual_a - jual_b, 'pct': round((jual_a - jual_b) / jual_b * 100, 3)}
+        return {
+            'berat': self.berat,
+            'ticks': self.ticks,
+            'updated': self.updated,
+            'vendors': vendors,
+            'premiums': premiums
+        }
+
+def follows(previous, version):
+    """Apakah commit dengan versi ini tepat setelah versi rollup? Counter SQLite harus +1;
+    versi lain (mtime/size Excel) tidak bisa dicek, dianggap berurutan."""
+    if isinstance(previous, int) and isinstance(version, int):
+        return version == previous + 1
+    return previous is not None
+
+class AnalyticsEngine:
+    """Analytics per berat dari rollup yang di-update O(1) setiap tick di-commit (commit listener).
+
+    Rollup dibangun sekali lewat jalur batch saat pertama diminta atau jika versi store tidak cocok
+    (mis. tick ditulis proses leader lain); hasil JSON di-cache per versi store."""
+
+    def __init__(self, data_manager, windows=None):
+        self.data_manager = data_manager
+        self.store = data_manager.store
+        self.windows = tuple(windows or config.ANALYTICS_MA_WINDOWS)
+        self._rollups = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def on_commit(self, berat, row):
+        """Commit listener DataManager: terapkan tick ke rollup yang sudah ada"""
+        with self._lock:
+            rollup = self._rollups.get(berat)
+            if rollup is None:
+                return
+            version = self.store.version(berat)
+            if follows(rollup.version, version):
+                rollup.push(version, row)
+                ANALYTICS_UPDATES.inc(mode='incremental')
+            else:
+                # Ada commit yang terlewat: bangun ulang saat diminta berikutnya
+                del self._rollups[berat]
+
+    def rollup(self, berat):
+        version = self.store.version(berat)
+        with self._lock:
+            rollup = self._rollups.get(berat)
+            if rollup is not None and rollup.version == version:
+                return rollup
+        # Versi dibaca sebelum history: commit di tengah rebuild hanya memicu rebuild berikutnya
+        rollup = SeriesRollup.build(berat, version, self.data_manager.get_existing_data(berat), self.windows)
+        ANALYTICS_UPDATES.inc(mode='rebuild')
+        logger.debug(f"📐 Rebuilt analytics rollup for {berat}g ({rollup.ticks} ticks)")
+        with self._lock:
+            self._rollups[berat] = rollup
+        return rollup
+
+    def series(self, berat, days=None):
+        """Analytics satu berat (dict JSON-ready), di-cache per versi store"""
+        days = config.ANALYTICS_DAYS if days is None else days
+        rollup = self.rollup(berat)
+        key = (berat, days)
+        cached = self._results.get(key)
+        if cached is not None and cached[0] == rollup.version:
+            return cached[1]
+        with self._lock:
+            result = dict(rollup.to_dict(days), version=rollup.version)
+        self._results[key] = (rollup.version, result)
+        return result
+
+    def analytics(self, berat_list, days=None):
+        """Analytics beberapa berat + harga per gram per vendor lintas berat"""
+        weights = {berat: self.series(berat, days) for berat in berat_list}
+        per_gram = {}
+        for berat, result in weights.items():
+            for vendor, info in result['vendors'].items():
+                if info['per_gram']['jual'] is not None:
+                    per_gram.setdefault(vendor, {})[berat] = info['per_gram']
+        return {'weights': weights, 'per_gram': per_gram, 'windows': list(self.windows)}
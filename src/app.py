@@ -1,7 +1,25 @@
-from flask import Flask, render_template, jsonify, request
-from data_manager import DataManager
-from chart_generator import ChartGenerator
+from flask import Flask, render_template, jsonify, request, Response, g, send_file
+from data_manager import DataManager, scrape_breaker
+from chart_generator import ChartGenerator, ChartQuery, CHART_FORMATS, SERIES_COLUMNS
+from compression import EncodedBody, negotiate_encoding
+from downsample import RESOLUTIONS
+from event_stream import TickEventBroker, StreamHub, LOOPBACK_HOSTS, STREAM_PATH, parse_last_event_id
+from utils import get_logger, parse_time_param
+from scheduler import ScrapeScheduler
+from leader import LeaderElection, StoreWatcher
+from jobs import RefreshJobQueue
+from analytics import AnalyticsEngine
+from alerts import AlertEngine, rule_dict
+from export import HistoryExporter, EXPORT_FORMATS, export_filename, export_format, pyarrow_available
+from metrics import HTTP_REQUEST_SECONDS, SAVE_OUTCOMES, CONTENT_TYPE, render_metrics
+import scraper
+import sources
+import config
+import os
 import threading
+import time
+
+logger = get_logger('app')
 
 app = Flask(__name__)
 
@@ -9,140 +27,419 @@ app = Flask(__name__)
 data_manager = DataManager()
 chart_generator = ChartGenerator(data_manager)
 
-# Global variable untuk menyimpan data terbaru semua berat
-latest_data_cache = {
-    '1': None,
-    '2': None
-}
-cache_lock = threading.Lock()
+BERAT_LIST = config.WEIGHTS
+
+# Batas parameter max_points untuk downsampling chart
+MIN_CHART_POINTS = 3
+MAX_CHART_POINTS = 5000
+
+# Shell dashboard yang sudah dirender per URL stream (lihat home)
+shell_pages = {}
+MAX_SHELL_PAGES = 16
 
 def update_all_data():
-    """Update data untuk semua berat secara bersamaan"""
-    print("=== Updating data for all weights simultaneously ===")
+    """Update data untuk semua berat dari SATU kali scrape halaman, ditulis sebagai satu batch"""
+    logger.info("=== Updating data for all weights from a single scrape ===")
     
-    def update_weight(berat):
-        try:
-            print(f"🔄 Updating data for {berat}g...")
-            df_history = data_manager.update_excel_data(berat)
-            
-            with cache_lock:
-                latest_data_cache[berat] = df_history
-                
-            print(f"✅ Data updated for {berat}g")
-        except Exception as e:
-            print(f"❌ Error updating data for {berat}g: {e}")
+    # Scrape halaman sekali untuk semua berat & vendor
+    price_index = data_manager.fetch_price_index(BERAT_LIST)
     
-    # Buat thread untuk setiap berat
-    threads = []
-    for berat in ['1', '2']:
-        thread = threading.Thread(target=update_weight, args=(berat,))
-        thread.start()
-        threads.append(thread)
+    # 'saved' jika ada tick baru yang di-commit, 'confirmed' jika harga sama dengan tick terakhir,
+    # 'unchanged' jika halaman sama, 'skipped' jika data tidak lengkap
+    try:
+        results = data_manager.save_price_index(price_index, BERAT_LIST)
+    except Exception as e:
+        logger.error(f"❌ Error saving scraped prices: {e}")
+        results = {berat: 'error' for berat in BERAT_LIST}
+        for berat in BERAT_LIST:
+            SAVE_OUTCOMES.inc(berat=berat, outcome='error')
     
-    # Tunggu semua thread selesai
-    for thread in threads:
-        thread.join()
+    for berat in BERAT_LIST:
+        logger.info(f"✅ Data updated for {berat}g ({results[berat]})")
     
-    print("✅ All data updates completed")
+    logger.info("✅ All data updates completed")
+    return results
+
+# Tick baru di-push ke browser via SSE, bukan di-poll setiap tab
+stream_broker = TickEventBroker()
+stream_hub = StreamHub(stream_broker)
+stream_slots = threading.BoundedSemaphore(config.STREAM_FALLBACK_CLIENTS)
+
+def publish_tick(berat, row):
+    """Kirim event ringkas untuk tick yang baru di-commit"""
+    event = {
+        'berat': berat,
+        'version': data_manager.store.version(berat),
+        'tanggal': row.get('Tanggal'),
+        'jam': row.get('Jam')
+    }
+    event.update({key: row.get(col) for key, col in SERIES_COLUMNS.items()})
+    stream_broker.publish('tick', event)
+
+def publish_stored_tick(berat):
+    """Follower: tick baru ditulis proses leader, ambil baris terakhir dari store bersama"""
+    row = data_manager.store.last_row(berat)
+    if row is not None:
+        publish_tick(berat, row)
+
+data_manager.commit_listeners.append(publish_tick)
+
+# Export history streaming per chunk, file hasil di-cache per versi store
+exporter = HistoryExporter(data_manager.store)
+
+# Rollup analytics di-update per tick yang di-commit, bukan dihitung ulang dari seluruh history
+analytics = AnalyticsEngine(data_manager)
+data_manager.commit_listeners.append(analytics.on_commit)
+
+# Alert harga dievaluasi per tick yang di-commit (hanya proses yang menulis store, yaitu leader)
+alerts = AlertEngine(data_manager)
+data_manager.commit_listeners.append(alerts.on_commit)
+
+# Scrape berjalan di background; request langsung dilayani dari history yang tersimpan
+logger.info("=== Starting Gold Price Monitor with Background Scrape Scheduler ===")
+scheduler = ScrapeScheduler(update_all_data)
+store_watcher = StoreWatcher(data_manager.store, BERAT_LIST, publish_stored_tick)
+
+def become_leader():
+    """Proses ini yang scrape + menulis store dan menjalankan hub SSE untuk semua worker"""
+    store_watcher.stop()
+    if config.STREAM_HUB_ENABLED and stream_hub.start():
+        election.update_info(stream_port=stream_hub.port)
+    if config.SCHEDULER_ENABLED:
+        scheduler.start()
+
+election = LeaderElection(become_leader, on_follow=store_watcher.start, on_trigger=scheduler.trigger)
+if config.LEADER_ELECTION:
+    election.start()
+else:
+    # Setiap proses scrape sendiri (mode lama, satu proses saja)
+    if config.STREAM_HUB_ENABLED:
+        stream_hub.start()
+    if config.SCHEDULER_ENABLED:
+        scheduler.start()
+
+def is_follower():
+    return config.LEADER_ELECTION and not election.is_leader
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
 
-# Update data saat startup
-print("=== Starting Gold Price Monitor with Simultaneous Data Update ===")
-update_all_data()
+@app.after_request
+def record_request_latency(response):
+    """Latensi per route (pola URL, bukan path mentah, agar label tetap terbatas)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route,
+                                     method=request.method, status=response.status_code)
+    return response
+
+def stream_url():
+    """URL EventSource untuk browser: hub SSE jika berjalan, selain itu endpoint fallback"""
+    if config.STREAM_PUBLIC_URL:
+        return config.STREAM_PUBLIC_URL
+    port = stream_hub.port if stream_hub.running else None
+    if port is None and is_follower():
+        # Hub berjalan di proses leader
+        port = (election.leader_info() or {}).get('stream_port')
+    host = request.host if request.host.endswith(']') else request.host.rsplit(':', 1)[0]
+    # Hub yang listen di loopback hanya bisa dipakai browser di mesin yang sama
+    if port and (config.STREAM_HOST not in LOOPBACK_HOSTS or host.strip('[]') in LOOPBACK_HOSTS):
+        return f"{request.scheme}://{host}:{port}{STREAM_PATH}"
+    return STREAM_PATH
 
 @app.route('/')
 def home():
-    print("=== Home Route Called ===")
-    berat = request.args.get('berat', '1')
+    """Shell dashboard: HTML + JS saja, data chart diambil browser dari /api/gold-data.
+
+    Isi shell hanya bergantung pada URL stream, jadi dirender sekali per URL stream dan dikirim
+    dengan ETag (304 saat revalidasi) dan kompresi yang sudah di-cache."""
+    logger.debug("=== Home Route Called ===")
+    url = stream_url()
+    page = shell_pages.get(url)
+    if page is None:
+        page = EncodedBody(render_template('index.html', stream_url=url).encode('utf-8'), 'text/html')
+        if len(shell_pages) >= MAX_SHELL_PAGES:
+            shell_pages.clear()
+        shell_pages[url] = page
+    return encoded_response(page)
+
+def parse_chart_query(args):
+    """Parse parameter from/to/resolution/max_points/since; ValueError jika tidak valid"""
+    start = parse_time_param(args['from']) if args.get('from') else None
+    end = parse_time_param(args['to'], end_of_day=True) if args.get('to') else None
+    if start is not None and end is not None and start > end:
+        raise ValueError("'from' must not be after 'to'")
     
-    # Gunakan data dari cache
-    with cache_lock:
-        df_history = latest_data_cache.get(berat)
+    resolution = args.get('resolution') or None
+    if resolution is not None and resolution not in RESOLUTIONS:
+        raise ValueError(f"Invalid resolution '{resolution}', expected one of {', '.join(RESOLUTIONS)}")
     
-    # Jika cache kosong, ambil data existing
-    if df_history is None or df_history.empty:
-        print(f"🔄 Cache empty for {berat}g, getting existing data")
-        df_history = data_manager.get_existing_data(berat)
+    max_points = None
+    if args.get('max_points'):
+        try:
+            max_points = int(args['max_points'])
+        except ValueError:
+            raise ValueError(f"Invalid max_points '{args['max_points']}'")
+        max_points = min(max(max_points, MIN_CHART_POINTS), MAX_CHART_POINTS)
     
-    chart_data = chart_generator.get_chart_data(berat)
+    # Mode delta: hanya titik setelah cursor (epoch detik atau timestamp WIB dari respons sebelumnya)
+    since = parse_time_param(args['since']) if args.get('since') else None
+    if since is not None and resolution is not None:
+        raise ValueError("'since' cannot be combined with 'resolution'")
     
-    return render_template('index.html', 
-                          dates=chart_data['dates'],
-                          g24_jual=chart_data['g24_jual'],
-                          antam_jual=chart_data['antam_jual'],
-                          ubs_jual=chart_data['ubs_jual'],
-                          g24_buyback=chart_data['g24_buyback'],
-                          antam_buyback=chart_data['antam_buyback'],
-                          ubs_buyback=chart_data['ubs_buyback'],
-                          latest=chart_data['latest'],
-                          current_berat=berat)
+    return ChartQuery(start, end, resolution, max_points, since)
+
+def encoded_response(payload, conditional=True, last_modified=None):
+    """Kirim EncodedBody dengan ETag per encoding (dan Last-Modified) + encoding hasil negosiasi (br/gzip)"""
+    encoding = negotiate_encoding(request.accept_encodings)
+    etag = payload.entity_tag(encoding)
+    if conditional and (request.if_none_match.contains(etag) or
+                        (last_modified is not None and not request.if_none_match and request.if_modified_since and
+                         int(last_modified) <= request.if_modified_since.timestamp())):
+        response = Response(status=304)
+    else:
+        response = Response(payload.encoded(encoding), mimetype=payload.mimetype)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def chart_payload_response(berat, conditional=True):
+    """Kirim payload chart yang sudah di-serialize (?format=json|bin), dengan ETag/Last-Modified
+    dan kompresi"""
+    fmt = request.args.get('format', 'json')
+    if fmt not in CHART_FORMATS:
+        return jsonify({'error': f"Invalid format '{fmt}', expected one of {', '.join(CHART_FORMATS)}"}), 400
+    try:
+        query = parse_chart_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    payload = chart_generator.get_chart_payload(berat, query, fmt)
+    return encoded_response(payload, conditional, payload.last_modified)
 
 @app.route('/api/gold-data')
 def api_gold_data():
-    print("=== API Gold Data Called ===")
+    logger.debug("=== API Gold Data Called ===")
     berat = request.args.get('berat', '1')
-    chart_data = chart_generator.get_chart_data(berat)
-    if chart_data:
-        return jsonify(chart_data)
-    else:
-        return jsonify({'error': 'Data tidak tersedia'}), 404
+    return chart_payload_response(berat)
+
+@app.route(STREAM_PATH)
+def api_stream():
+    """Fallback SSE di dalam aplikasi (satu worker per koneksi, jumlah client dibatasi)"""
+    last_id = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('lastEventId'))
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many stream clients, use polling'}), 503
+    
+    response = Response(stream_broker.iter_stream(last_id), mimetype='text/event-stream')
+    response.call_on_close(stream_slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Refresh dari endpoint berjalan sebagai job background; request bersamaan untuk berat yang
+# sama digabung ke satu scrape (single-flight)
+refresh_jobs = RefreshJobQueue()
+
+def run_update(berat):
+    # Scrape gagal / data tidak lengkap / error store raise -> job 'failed' dengan pesannya
+    df_history = data_manager.update_excel_data(berat)
+    return {'rows': len(df_history)}
+
+def run_force_update(berat):
+    # Force save tanpa pengecekan kelengkapan
+    df_history = data_manager.force_update_data(berat)
+    logger.info(f"✅ Force updated data for {berat}g")
+    return {'rows': len(df_history)}
+
+def delegate_refresh():
+    """Follower: hanya leader yang scrape; tick baru datang lewat stream"""
+    election.request_refresh()
+    return {'delegated': True}
+
+def submit_refresh_job(kind, berat, fn):
+    """Antrikan job refresh; 202 + job id (Location ke endpoint status job)"""
+    if is_follower():
+        fn = delegate_refresh
+    job, created = refresh_jobs.submit(kind, berat, fn)
+    if not created:
+        logger.info(f"🔗 Coalesced {kind} request into running job {job.id}")
+    response = jsonify({'job': job.to_dict(), 'coalesced': not created})
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
 
 @app.route('/api/update-data')
 def api_update_data():
     """API untuk update data berdasarkan berat - HANYA JIKA DATA LENGKAP"""
     berat = request.args.get('berat', '1')
-    print(f"=== API Update Data Called for {berat}g ===")
-    
-    # Update data untuk berat tertentu
-    df_history = data_manager.update_excel_data(berat)
-    
-    # Update cache
-    with cache_lock:
-        latest_data_cache[berat] = df_history
-    
-    # Jika tidak ada data baru yang disimpan, beri warning
-    if df_history.empty or len(df_history) == 0:
-        print("⚠️ No new data saved in API call")
-    
-    chart_data = chart_generator.get_chart_data(berat)
-    if chart_data:
-        return jsonify(chart_data)
-    else:
-        return jsonify({'error': 'Data tidak tersedia'}), 404
+    logger.info(f"=== API Update Data Called for {berat}g ===")
+    return submit_refresh_job('update', berat, lambda: run_update(berat))
 
 @app.route('/api/force-update')
 def api_force_update():
     """API untuk force update data"""
     berat = request.args.get('berat', '1')
-    print(f"=== API Force Update Called for {berat}g ===")
-    
-    try:
-        # Force save tanpa pengecekan kelengkapan
-        df_history = data_manager.force_update_data(berat)
-        
-        # Update cache
-        with cache_lock:
-            latest_data_cache[berat] = df_history
-        
-        print(f"✅ Force updated data for {berat}g")
-        chart_data = chart_generator.get_chart_data(berat)
-        return jsonify(chart_data)
-        
-    except Exception as e:
-        print(f"❌ Error in force update: {e}")
-        return jsonify({'error': str(e)}), 500
+    logger.info(f"=== API Force Update Called for {berat}g ===")
+    return submit_refresh_job('force', berat, lambda: run_force_update(berat))
 
 @app.route('/api/update-all')
 def api_update_all():
     """API untuk update semua data sekaligus"""
-    print("=== API Update All Called ===")
+    logger.info("=== API Update All Called ===")
+    return submit_refresh_job('update-all', None, update_all_data)
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Status job refresh: queued / running / done / failed"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job id'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/scheduler-status')
+def api_scheduler_status():
+    """Status scheduler scrape: run terakhir, run berikutnya, durasi, hasil"""
+    status = scheduler.status()
+    status['last_scrape'] = scraper.last_scrape_stats
+    status['sources'] = sources.get_engine().status()
+    status['stream'] = stream_hub.stats()
+    status['leader'] = election.status() if config.LEADER_ELECTION else {'enabled': False}
+    status['jobs'] = refresh_jobs.stats()
+    status['breaker'] = scrape_breaker.status()
+    status['alerts'] = alerts.stats()
+    return jsonify(status)
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Spread Jual-Buyback, premium antar vendor, moving average, OHLC harian dan harga per gram.
+
+    berat: daftar dipisah koma atau 'all' (semua berat di store); days: jumlah hari OHLC"""
+    berat_param = request.args.get('berat')
+    if berat_param == 'all':
+        berat_list = data_manager.store.weights()
+    elif berat_param:
+        berat_list = [berat.strip() for berat in berat_param.split(',') if berat.strip()]
+    else:
+        berat_list = BERAT_LIST
+    try:
+        for berat in berat_list:
+            float(berat)
+        days = int(request.args['days']) if request.args.get('days') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    if days is not None and days < 0:
+        return jsonify({'error': "'days' must not be negative"}), 400
+    return jsonify(analytics.analytics(berat_list, days))
+
+@app.route('/api/export')
+def api_export():
+    """Download history satu berat (format=csv|parquet|xlsx, from/to opsional), di-stream per chunk"""
+    berat = request.args.get('berat', '1')
+    try:
+        float(berat)
+        fmt = export_format(request.args.get('format'))
+        start = parse_time_param(request.args['from']) if request.args.get('from') else None
+        end = parse_time_param(request.args['to'], end_of_day=True) if request.args.get('to') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if fmt == 'parquet' and not pyarrow_available():
+        return jsonify({'error': 'Parquet export requires pyarrow'}), 501
+    if not data_manager.series_exists(berat):
+        return jsonify({'error': f'Data untuk {berat} gram belum tersedia.'}), 404
     
+    mimetype = EXPORT_FORMATS[fmt][0]
+    filename = export_filename(berat, fmt, start, end)
+    kind, result = exporter.export(berat, fmt, start, end)
+    if kind == 'file':
+        return send_file(os.path.abspath(result), mimetype=mimetype, as_attachment=True, download_name=filename)
+    
+    # CSV baru: chunked transfer langsung dari store, tanpa memuat seluruh history
+    response = Response(result, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/api/confirmations')
+def api_confirmations():
+    """Timeline konfirmasi harga: kapan setiap harga pertama terlihat, terakhir dikonfirmasi, berapa kali"""
+    berat = request.args.get('berat', '1')
     try:
-        update_all_data()
-        return jsonify({'message': 'All data updated successfully'})
-    except Exception as e:
-        print(f"❌ Error updating all data: {e}")
-        return jsonify({'error': str(e)}), 500
+        start = parse_time_param(request.args['from']) if request.args.get('from') else None
+        end = parse_time_param(request.args['to'], end_of_day=True) if request.args.get('to') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not data_manager.store.records_confirmations:
+        return jsonify({'error': f"The {data_manager.store.name} store does not record confirmations "
+                                 f"(last_seen/seen), use the sqlite backend"}), 501
+    return jsonify({'berat': berat, 'runs': data_manager.store.confirmations(berat, start, end)})
+
+@app.route('/api/alerts', methods=['GET'])
+def api_alerts():
+    """Daftar rule alert (opsional per owner)"""
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'error': f"Invalid limit '{request.args['limit']}'"}), 400
+    rules = alerts.store.rules(request.args.get('owner'), limit)
+    return jsonify({'rules': [rule_dict(rule) for rule in rules]})
+
+@app.route('/api/alerts', methods=['POST'])
+def api_create_alerts():
+    """Tambah rule alert: satu objek JSON atau list (bulk), mis.
+    {"vendor": "ANTAM", "berat": "1", "side": "jual", "kind": "below", "threshold": 1500000}
+    {"vendor": "UBS", "berat": "1", "kind": "move", "direction": "any", "threshold": 1.0}"""
+    data = request.get_json(silent=True)
+    data_list = data if isinstance(data, list) else [data]
+    try:
+        rules = alerts.add_rules(data_list)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'rules': [rule_dict(rule) for rule in rules]}), 201
+
+@app.route('/api/alerts/<int:rule_id>', methods=['DELETE'])
+def api_delete_alert(rule_id):
+    rule = alerts.remove_rule(rule_id)
+    if rule is None:
+        return jsonify({'error': f'Unknown alert rule {rule_id}'}), 404
+    return jsonify({'deleted': rule_dict(rule)})
+
+@app.route('/api/alerts/events')
+def api_alert_events():
+    """Outbox event alert setelah cursor since (id event terakhir yang sudah diproses consumer)"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    events = alerts.store.events(since, request.args.get('owner'), limit)
+    return jsonify({'events': events, 'cursor': events[-1]['id'] if events else since})
+
+@app.route('/api/weights')
+def api_weights():
+    """Semua berat dan vendor yang tersimpan di store"""
+    return jsonify({
+        'weights': data_manager.store.weights(),
+        'vendors': data_manager.store.vendors(),
+        'dashboard': BERAT_LIST
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Metric jalur panas dalam format teks Prometheus"""
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+@app.route('/api/cache-stats')
+def api_cache_stats():
+    """Statistik hit/miss cache history"""
+    return jsonify(data_manager.history_cache.stats())
 
 if __name__ == '__main__':
-    print("=== Starting Flask Application with REAL Data ===")
+    logger.info("=== Starting Flask Application with REAL Data ===")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
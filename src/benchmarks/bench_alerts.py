@@ -0,0 +1,169 @@
+"""Benchmark + cek alert engine: index threshold terurut (bisect) vs scan semua rule per tick (offline).
+
+Rule acak below/above (Rupiah) dan move (% sejak pembukaan hari itu) untuk semua vendor x berat x
+sisi. Rule yang terpicu per tick harus sama persis dengan scan naif; debounce (cooldown) dicek
+terpisah, dan event yang lolos harus sampai di outbox.
+
+Jalankan dari folder src:  python benchmarks/bench_alerts.py --rules 100000 --ticks 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import Checks, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+import config  # noqa: E402
+from alerts import AlertEngine, AlertStore, SIDES, index_kinds, parse_rule  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import SQLiteTickStore, VENDOR_COLUMNS  # noqa: E402
+
+WEIGHTS = ('1', '2')
+
+def random_rules(count, seed=7):
+    rng = random.Random(seed)
+    rules = []
+    for _ in range(count):
+        kind = rng.choice(('below', 'above', 'move'))
+        rule = {'vendor': rng.choice(list(VENDOR_COLUMNS)), 'berat': rng.choice(WEIGHTS),
+                'side': rng.choice(list(SIDES)), 'kind': kind, 'cooldown': 0, 'owner': f'user{rng.randrange(1000)}'}
+        if kind == 'move':
+            rule.update(threshold=round(rng.uniform(0.05, 1.5), 2), direction=rng.choice(('up', 'down', 'any')))
+        else:
+            rule['threshold'] = rng.randrange(1_380_000, 1_480_000, 1000)
+        rules.append(rule)
+    return rules
+
+def ticks(count):
+    """Tick wide bergantian untuk setiap berat (harga 2g digeser agar index per berat berbeda)"""
+    rows = []
+    for row in history_rows(synthetic_history(count, change_rate=0.5, nan_rate=0.01)):
+        for berat in WEIGHTS:
+            offset = (int(berat) - 1) * 20000
+            rows.append((berat, {key: value if key in ('Tanggal', 'Jam') else None if value != value else value + offset
+                                 for key, value in row.items()}))
+    return rows
+
+class NaiveAlerts:
+    """Referensi: evaluasi setiap rule untuk setiap tick (jalur lama: poll + scan semua rule)"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.state = {}
+
+    def evaluate(self, berat, row):
+        moves = {}
+        for vendor, prefix in VENDOR_COLUMNS.items():
+            for side, field in SIDES.items():
+                price = row.get(f'{prefix}_{field}')
+                if price is None:
+                    continue
+                key = (vendor, berat, side)
+                state = self.state.get(key)
+                self.state[key] = state = [row['Tanggal'], float(price), float(price)] if state is None else state
+                day, opening, previous = state
+                previous_move = 0.0 if day != row['Tanggal'] else round((previous - opening) / opening * 100, 6)
+                opening = float(price) if day != row['Tanggal'] else opening
+                move = round((price - opening) / opening * 100, 6)
+                self.state[key] = [row['Tanggal'], opening, float(price)]
+                moves[key] = (previous, float(price), previous_move, move)
+        fired = set()
+        for rule in self.rules:
+            key = (rule.vendor, rule.berat, rule.side)
+            if rule.berat != berat or key not in moves:
+                continue
+            previous, price, previous_move, move = moves[key]
+            for kind in index_kinds(rule):
+                if ((kind == 'below' and price < rule.threshold <= previous) or
+                        (kind == 'above' and previous < rule.threshold <= price) or
+                        (kind == 'up' and previous_move < rule.threshold <= move) or
+                        (kind == 'down' and -previous_move < rule.threshold <= -move)):
+                    fired.add(rule.id)
+        return fired
+
+def new_engine(workdir, name, rules):
+    store = AlertStore(os.path.join(workdir, f'{name}.alerts.db'))
+    store.add([parse_rule(rule) for rule in rules])
+    manager = DataManager(store=SQLiteTickStore(os.path.join(workdir, f'{name}.db')))
+    return AlertEngine(manager, store)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, default=100000, help='jumlah rule alert')
+    parser.add_argument('--ticks', type=int, default=1000, help='jumlah tick per berat')
+    parser.add_argument('--naive-ticks', type=int, default=200, help='tick yang dibandingkan dengan scan naif')
+    args = parser.parse_args()
+
+    check = Checks()
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_alerts_')
+    rules = random_rules(args.rules)
+    rows = ticks(args.ticks)
+
+    with quiet():
+        engine = new_engine(workdir, 'indexed', rules)
+        started = time.perf_counter()
+        engine.load()
+        load_seconds = time.perf_counter() - started
+    results.append({'case': f'load_{args.rules}', 'seconds': round(load_seconds, 4)})
+    naive = NaiveAlerts(list(engine.rules.values()))
+
+    # Parity + waktu per tick: index (on_commit penuh: cek versi rule + bisect) vs scan semua rule
+    indexed_seconds = naive_seconds = 0.0
+    mismatches = fired_total = 0
+    compared = min(args.naive_ticks * len(WEIGHTS), len(rows))
+    with quiet():
+        for position, (berat, row) in enumerate(rows):
+            started = time.perf_counter()
+            events = engine.on_commit(berat, row)
+            indexed_seconds += time.perf_counter() - started
+            fired_total += len(events)
+            if position < compared:
+                started = time.perf_counter()
+                expected = naive.evaluate(berat, row)
+                naive_seconds += time.perf_counter() - started
+                mismatches += {event['rule_id'] for event in events} != expected
+        engine.dispatcher.flush()
+    indexed_per_tick = indexed_seconds / len(rows)
+    naive_per_tick = naive_seconds / compared
+    results += [{'case': 'indexed_per_tick', 'seconds': round(indexed_per_tick, 6), 'fired': fired_total},
+                {'case': 'naive_per_tick', 'seconds': round(naive_per_tick, 6)}]
+    check('indexed matches full scan', mismatches == 0, f"{compared} ticks, {mismatches} mismatches")
+    check('indexed much faster than scan', indexed_per_tick * 5 < naive_per_tick,
+          f"{indexed_per_tick * 1000:.3f} ms vs {naive_per_tick * 1000:.1f} ms per tick")
+    outbox = engine.store.events(0, limit=args.rules * 10)
+    check('fired events reach outbox', len(outbox) == min(fired_total, config.ALERT_EVENTS_KEEP) and
+          'webhook' not in outbox[-1], f"{fired_total} fired")
+
+    # Debounce: rule yang sama tidak terpicu lagi dalam cooldown
+    with quiet():
+        debounced = new_engine(workdir, 'debounced', [dict(rule, cooldown=3600) for rule in rules[:10000]])
+        fired = {}
+        gaps_ok = True
+        for berat, row in rows:
+            for event in debounced.on_commit(berat, row):
+                last = fired.get(event['rule_id'])
+                gaps_ok &= last is None or event['ts'] - last >= 3600
+                fired[event['rule_id']] = event['ts']
+        debounced.dispatcher.flush()
+    check('cooldown debounces repeat alerts', gaps_ok and bool(fired), f"{len(fired)} rules fired")
+
+    # Rule baru dari proses lain (versi rule berubah): index dibangun ulang pada tick berikutnya
+    with quiet():
+        berat, row = next((berat, row) for berat, row in reversed(rows) if berat == '1' and row['ANTAM_Jual'])
+        other = AlertStore(engine.store.path)
+        other.add([parse_rule({'vendor': 'ANTAM', 'berat': '1', 'kind': 'above', 'threshold': row['ANTAM_Jual'],
+                               'cooldown': 0, 'owner': 'late'})])
+        engine.on_commit(berat, dict(row, ANTAM_Jual=row['ANTAM_Jual'] - 1000))
+        late = engine.on_commit(berat, row)
+    check('rules added elsewhere are picked up', len(engine.rules) == args.rules + 1 and
+          any(event['owner'] == 'late' for event in late))
+
+    print(json.dumps({'benchmark': 'alerts', 'rules': args.rules, 'ticks': len(rows), 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Benchmark + cek parity analytics: update incremental per tick vs rebuild batch dari store (offline).
+
+Jalankan dari folder src:  python benchmarks/bench_analytics.py --size 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import Checks, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+from analytics import AnalyticsEngine  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import SQLiteTickStore  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100000, help='jumlah tick history')
+    parser.add_argument('--ticks', type=int, default=500, help='tick baru yang di-commit setelah build')
+    args = parser.parse_args()
+
+    check = Checks()
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_analytics_')
+    history = synthetic_history(args.size + args.ticks, change_rate=0.5, nan_rate=0.01)
+    rows = history_rows(history)
+    initial, new_rows = rows[:args.size], rows[args.size:]
+
+    with quiet():
+        store = SQLiteTickStore(os.path.join(workdir, 'analytics.db'))
+        store.ensure_structure(['1'])
+        store.migrate_from_excel('1', excel_file=os.path.join(workdir, 'missing.xlsx'))
+        conn = store._connect()
+        with conn:
+            store._insert_rows(conn, '1', initial)
+        manager = DataManager(store=store)
+        engine = AnalyticsEngine(manager)
+        manager.commit_listeners.append(engine.on_commit)
+
+    started = time.perf_counter()
+    with quiet():
+        engine.series('1')
+    rebuild = time.perf_counter() - started
+    results.append({'case': f'rebuild_{args.size}', 'seconds': round(rebuild, 4)})
+
+    # Tick baru: append ke store + commit listener (rollup incremental), lalu request analytics
+    update_seconds = 0.0
+    committed = 0
+    with quiet():
+        for row in new_rows:
+            row = {key: (None if value != value else value) for key, value in row.items()}
+            # Harga sama dengan tick terakhir hanya dikonfirmasi: tidak ada commit, rollup tetap
+            if not store.append('1', row):
+                continue
+            committed += 1
+            started = time.perf_counter()
+            manager.notify_commit('1', row)
+            incremental = engine.series('1')
+            update_seconds += time.perf_counter() - started
+    per_tick = update_seconds / committed
+    results.append({'case': 'incremental_per_tick', 'seconds': round(per_tick, 6)})
+
+    # Parity: rollup incremental == rollup batch dari seluruh store
+    with quiet():
+        rebuilt = AnalyticsEngine(DataManager(store=store)).series('1')
+    check('incremental matches batch rebuild', json.dumps(incremental, sort_keys=True) ==
+          json.dumps(rebuilt, sort_keys=True))
+    check('no rebuild after incremental ticks', engine._rollups['1'].ticks == args.size + committed)
+    check('cached per store version', engine.series('1') is incremental)
+    check('incremental much faster than rebuild', per_tick * 50 < rebuild,
+          f"{per_tick * 1000:.3f} ms/tick vs {rebuild * 1000:.1f} ms rebuild")
+
+    print(json.dumps({'benchmark': 'analytics', 'size': args.size, 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
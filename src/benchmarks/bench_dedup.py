@@ -0,0 +1,89 @@
+"""Benchmark + cek dedup saat tulis: poll dengan harga yang jarang berubah (offline).
+
+Tanpa dedup setiap poll = satu baris; dengan dedup hanya perubahan harga yang ditulis dan poll
+lain memperpanjang last_seen/seen tick terakhir. Timeline konfirmasi harus tetap lengkap.
+
+Jalankan dari folder src:  python benchmarks/bench_dedup.py --polls 5000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import Checks, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+from storage import SQLiteTickStore  # noqa: E402
+from utils import wib_epoch  # noqa: E402
+
+def new_store(path):
+    store = SQLiteTickStore(path)
+    store.ensure_structure(['1'])
+    store.migrate_from_excel('1', excel_file=os.path.join(os.path.dirname(path), 'missing.xlsx'))
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--polls', type=int, default=5000, help='jumlah poll (satu per menit)')
+    parser.add_argument('--change-rate', type=float, default=0.05, help='probabilitas harga berubah per poll')
+    args = parser.parse_args()
+
+    check = Checks()
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_dedup_')
+    rows = [{key: (None if value != value else value) for key, value in row.items()}
+            for row in history_rows(synthetic_history(args.polls, change_rate=args.change_rate))]
+
+    with quiet():
+        plain = new_store(os.path.join(workdir, 'plain.db'))
+        deduped = new_store(os.path.join(workdir, 'dedup.db'))
+
+        # Baseline: setiap poll ditulis sebagai tick (perilaku sebelum dedup)
+        started = time.perf_counter()
+        for row in rows:
+            conn = plain._connect()
+            plain._transaction(conn, lambda conn, row=row: plain._insert_rows(conn, '1', [row]))
+        plain_write = time.perf_counter() - started
+
+        started = time.perf_counter()
+        written = sum(deduped.append('1', row) for row in rows)
+        dedup_write = time.perf_counter() - started
+
+        plain_rows = len(plain.read('1'))
+        started = time.perf_counter()
+        plain.read('1')
+        plain_read = time.perf_counter() - started
+        started = time.perf_counter()
+        dedup_rows = len(deduped.read('1'))
+        dedup_read = time.perf_counter() - started
+
+    results += [
+        {'case': 'write_plain', 'seconds': round(plain_write, 3), 'rows': plain_rows},
+        {'case': 'write_dedup', 'seconds': round(dedup_write, 3), 'rows': dedup_rows},
+        {'case': 'read_plain', 'seconds': round(plain_read, 4)},
+        {'case': 'read_dedup', 'seconds': round(dedup_read, 4)}
+    ]
+    check('only price changes are stored', dedup_rows == written < plain_rows,
+          f"{dedup_rows} vs {plain_rows} rows")
+    check('store version bumps only on change', deduped.version('1') == written)
+
+    # Timeline: setiap poll tercakup tepat satu run, jumlah seen = jumlah poll
+    runs = deduped.confirmations('1')
+    poll_ts = [wib_epoch(row['Tanggal'], row['Jam']) for row in rows]
+    check('confirmations count every poll', sum(run['seen'] for run in runs) == len(rows))
+    check('confirmation runs cover first/last poll', runs[0]['since'] == poll_ts[0] and
+          runs[-1]['last_seen'] == poll_ts[-1])
+    check('runs do not overlap', all(a['last_seen'] < b['since'] for a, b in zip(runs, runs[1:])),
+          f"{len(runs)} runs")
+    middle = poll_ts[len(poll_ts) // 2]
+    window = deduped.confirmations('1', middle, middle)
+    check('range query finds the covering run', len(window) == 1 and
+          window[0]['since'] <= middle <= window[0]['last_seen'])
+
+    print(json.dumps({'benchmark': 'dedup', 'polls': args.polls, 'change_rate': args.change_rate,
+                      'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Benchmark + cek export history streaming (CSV/Excel/Parquet) dengan memori terbatas (offline).
+
+Jalankan dari folder src:  python benchmarks/bench_export.py --size 100000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import Checks, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+import pandas as pd  # noqa: E402
+
+from export import HistoryExporter, pyarrow_available  # noqa: E402
+from storage import COLUMNS, SQLiteTickStore, history_epoch  # noqa: E402
+
+def peak_memory(fn):
+    """(hasil, puncak alokasi Python dalam MB); tracemalloc memperlambat, jadi waktu diukur terpisah"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024 / 1024
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def drain(kind, result):
+    if kind == 'file':
+        with open(result, 'rb') as f:
+            return f.read()
+    return b''.join(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100000, help='jumlah tick history')
+    parser.add_argument('--xlsx-size', type=int, default=20000, help='tick untuk cek Excel (openpyxl lambat)')
+    args = parser.parse_args()
+
+    check = Checks()
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_export_')
+    history = synthetic_history(args.size, change_rate=0.5, nan_rate=0.01)
+    with quiet():
+        store = SQLiteTickStore(os.path.join(workdir, 'export.db'))
+        store.ensure_structure(['1'])
+        store.migrate_from_excel('1', excel_file=os.path.join(workdir, 'missing.xlsx'))
+        conn = store._connect()
+        with conn:
+            store._insert_rows(conn, '1', history_rows(history))
+    exporter = HistoryExporter(store, cache_dir=os.path.join(workdir, 'exports'))
+
+    # Baseline: muat seluruh history lalu to_csv (jalur pandas lama)
+    def full_csv():
+        return store.read('1').to_csv(index=False).encode('utf-8')
+
+    _, full_peak = peak_memory(full_csv)
+    _, full_seconds = timed(full_csv)
+    _, csv_seconds = timed(lambda: drain(*HistoryExporter(store, cache_dir=os.path.join(workdir, 'timing'))
+                                          .export('1', 'csv')))
+    body, csv_peak = peak_memory(lambda: drain(*exporter.export('1', 'csv')))
+    results += [{'case': 'csv_full_read', 'seconds': round(full_seconds, 3), 'peak_mb': round(full_peak, 1)},
+                {'case': 'csv_streamed', 'seconds': round(csv_seconds, 3), 'peak_mb': round(csv_peak, 1)}]
+
+    exported = pd.read_csv(io.BytesIO(body), dtype={'Tanggal': str, 'Jam': str})
+    expected = store.read('1')
+    check('csv matches store history', list(exported.columns) == COLUMNS and len(exported) == len(expected) and
+          exported.fillna(-1).equals(expected[COLUMNS].fillna(-1).astype(exported.dtypes.to_dict())))
+    check('csv memory bounded by chunk', csv_peak * 3 < full_peak, f"{csv_peak:.1f} MB vs {full_peak:.1f} MB")
+
+    kind, _ = exporter.export('1', 'csv')
+    check('repeat download served from cache', kind == 'file')
+    store.append('1', {'Tanggal': '2030-01-01', 'Jam': '00:00:00', 'GALERI24_Jual': 1.0, 'ANTAM_Jual': 2.0,
+                       'UBS_Jual': 3.0})
+    kind, result = exporter.export('1', 'csv')
+    body = drain(kind, result)
+    cached = [name for name in os.listdir(exporter.cache_dir) if not name.startswith('.tmp-')]
+    check('new store version regenerates', kind == 'stream' and body.count(b'\n') == len(expected) + 2)
+    check('stale cache versions removed', len(cached) == 1, f"{cached}")
+
+    # Range: hanya tick dalam [from, to]
+    ts = history_epoch(expected)
+    start, end = int(ts[len(ts) // 3]), int(ts[len(ts) // 2])
+    ranged = pd.read_csv(io.BytesIO(drain(*exporter.export('1', 'csv', start, end))), dtype={'Tanggal': str, 'Jam': str})
+    check('range export filters ticks', len(ranged) == int(((ts >= start) & (ts <= end)).sum()))
+
+    # Excel write-only dari chunk
+    small = HistoryExporter(store, cache_dir=exporter.cache_dir, chunk_rows=1000)
+    end_small = int(ts[args.xlsx_size - 1])
+    (kind, path), xlsx_seconds = timed(lambda: small.export('1', 'xlsx', None, end_small))
+    workbook = pd.read_excel(path, dtype={'Tanggal': str, 'Jam': str})
+    results.append({'case': f'xlsx_{args.xlsx_size}', 'seconds': round(xlsx_seconds, 3)})
+    check('xlsx export matches store', len(workbook) == args.xlsx_size and
+          workbook.iloc[-1].fillna(-1).tolist()[2:] == expected.iloc[args.xlsx_size - 1].fillna(-1).tolist()[2:])
+
+    if pyarrow_available():
+        kind, path = exporter.export('1', 'parquet')
+        table = pd.read_parquet(path)
+        check('parquet export matches store', len(table) == len(expected) + 1)
+    else:
+        print(f"  {'parquet export':36} SKIP  pyarrow not installed")
+
+    print(json.dumps({'benchmark': 'export', 'size': args.size, 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Benchmark filter_changed_prices (legacy row loop vs vectorized) dan series chart (build penuh vs
+append tick baru). Parity series incremental vs build penuh ada di tests/test_chart_generator.py.
+
+Jalankan dari folder src:  python benchmarks/bench_filter.py --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from common import history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+from chart_generator import ChartGenerator  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import PRICE_COLUMNS, SQLiteTickStore  # noqa: E402
+
+def legacy_filter_changed_prices(df):
+    """Implementasi lama (iloc per baris) sebagai referensi parity"""
+    if len(df) <= 1:
+        return df
+
+    df_sorted = df.sort_values(by=['Tanggal', 'Jam']).reset_index(drop=True)
+    filtered_indices = [0]
+
+    for i in range(1, len(df_sorted)):
+        current = df_sorted.iloc[i]
+        previous = df_sorted.iloc[i-1]
+        if any(current[col] != previous[col] for col in PRICE_COLUMNS):
+            filtered_indices.append(i)
+
+    if len(df_sorted) - 1 not in filtered_indices:
+        filtered_indices.append(len(df_sorted) - 1)
+
+    return df_sorted.iloc[filtered_indices].reset_index(drop=True)
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--ticks', type=int, default=200, help='tick baru yang di-append satu per satu')
+    parser.add_argument('--legacy-max-rows', type=int, default=50000,
+                        help='lewati implementasi lama untuk history lebih besar dari ini')
+    args = parser.parse_args()
+
+    chart_generator = ChartGenerator(data_manager=None)
+    df = synthetic_history(args.rows)
+
+    vectorized, t_vec = timed(chart_generator.filter_changed_prices, df)
+    print(f"vectorized   : {len(vectorized):>8} rows in {t_vec * 1000:10.2f} ms")
+
+    if args.rows <= args.legacy_max_rows:
+        legacy, t_legacy = timed(legacy_filter_changed_prices, df)
+        print(f"legacy       : {len(legacy):>8} rows in {t_legacy * 1000:10.2f} ms")
+        pd.testing.assert_frame_equal(vectorized, legacy)
+        print("parity legacy == vectorized: OK")
+
+    # Series chart: build penuh sekali, lalu tick baru di-append (hanya tick setelah tick terakhir dibaca)
+    workdir = tempfile.mkdtemp(prefix='bench_filter_')
+    split = max(1, args.rows - args.ticks)
+    with quiet():
+        store = SQLiteTickStore(os.path.join(workdir, 'filter.db'))
+        store.ensure_structure(['1'])
+        conn = store._connect()
+        with conn:
+            store._insert_rows(conn, '1', history_rows(df.iloc[:split]))
+        generator = ChartGenerator(DataManager(store=store))
+        series, t_build = timed(generator.get_chart_series, '1')
+    print(f"series build : {len(series.ts):>8} points in {t_build * 1000:10.2f} ms")
+
+    rows = history_rows(df.iloc[split:])
+    elapsed = 0.0
+    with quiet():
+        for row in rows:
+            with conn:
+                store._insert_rows(conn, '1', [row])
+            started = time.perf_counter()
+            series = generator.get_chart_series('1')
+            elapsed += time.perf_counter() - started
+    print(f"series append: {len(series.ts):>8} points, {elapsed / max(1, len(rows)) * 1e6:10.1f} us per tick")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Cek locking per series: scrape di luar lock, commit atomic, pembaca tanpa lock (offline).
+
+Jalankan dari folder src:  python benchmarks/bench_locking.py --delay 0.5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import Checks, fixture_server, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+import data_manager  # noqa: E402
+from data_manager import DataManager, hold_series_locks  # noqa: E402
+from jobs import RefreshJobQueue  # noqa: E402
+from sources import Galeri24Adapter, ScrapeEngine  # noqa: E402
+from storage import ExcelTickStore, SQLiteTickStore  # noqa: E402
+
+def use_fixture_source(url):
+    """Scrape dari server fixture lokal; engine baru per panggilan agar tidak dijawab 304"""
+    def scrape(deadline=None):
+        return ScrapeEngine([Galeri24Adapter(name='fixture', url=url, timeout=10)]).scrape(deadline)
+    data_manager.scrape_all_sources = scrape
+
+def wait_jobs(jobs):
+    while not all(job.done for job in jobs):
+        time.sleep(0.01)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--delay', type=float, default=0.5, help='latensi halaman fixture (detik)')
+    args = parser.parse_args()
+    delay = args.delay
+
+    check = Checks(width=38)
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_locking_')
+    os.chdir(workdir)
+
+    with fixture_server() as host:
+        use_fixture_source(f"{host}/page?delay={delay}")
+        with quiet():
+            manager = DataManager(SQLiteTickStore(os.path.join(workdir, 'locking.db')))
+
+        # Update 1g lalu 2g berurutan: dua scrape dijumlahkan
+        started = time.perf_counter()
+        with quiet():
+            for berat in ['1', '2']:
+                manager.update_excel_data(berat)
+        sequential = time.perf_counter() - started
+
+        # Dua job paralel: scrape tidak memegang lock, jadi durasi ~ max(scrape)
+        queue = RefreshJobQueue(max_workers=2)
+        started = time.perf_counter()
+        with quiet():
+            jobs = [queue.submit('update', berat, lambda berat=berat: manager.update_excel_data(berat))[0]
+                    for berat in ['1', '2']]
+            wait_jobs(jobs)
+        parallel = time.perf_counter() - started
+        results.append({'case': 'update_1g_2g_sequential', 'seconds': round(sequential, 3)})
+        results.append({'case': 'update_1g_2g_parallel_jobs', 'seconds': round(parallel, 3)})
+        check('parallel jobs all done', all(job.status == 'done' for job in jobs))
+        check('refresh takes max, not sum, of scrapes', parallel < sequential * 0.75,
+              f"{parallel:.2f}s vs {sequential:.2f}s")
+
+        # Lock 1g dipegang (commit lambat): update 2g tetap selesai, update 1g menunggu commit
+        with quiet():
+            with hold_series_locks(['1'], 'bench'):
+                jobs = [queue.submit('update', berat, lambda berat=berat: manager.update_excel_data(berat))[0]
+                        for berat in ['2', '1']]
+                deadline = time.monotonic() + delay * 10
+                while not jobs[0].done and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                other_done = jobs[0].status == 'done'
+                blocked = not jobs[1].done
+            wait_jobs(jobs)
+        check('other series commits while 1g is locked', other_done)
+        check('same series waits for its lock', blocked)
+
+    # Excel: penulis menulis ulang workbook berulang kali, pembaca tanpa lock tidak pernah melihat file rusak
+    store = ExcelTickStore()
+    with quiet():
+        store.ensure_structure(['1'])
+        store.append('1', history_rows(synthetic_history(1))[0])
+    rows = history_rows(synthetic_history(40, change_rate=1.0, seed=7))
+    errors = []
+    lengths = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                lengths.append(len(store.read('1')))
+            except Exception as e:
+                errors.append(repr(e))
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    started = time.perf_counter()
+    with quiet():
+        for row in rows:
+            with hold_series_locks(['1'], 'bench'):
+                store.append('1', row)
+    writes = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+    results.append({'case': 'excel_atomic_appends_40', 'seconds': round(writes, 3), 'reads': len(lengths)})
+    check('readers never see partial workbook', not errors and len(lengths) > 0,
+          f"{len(lengths)} reads" + (f", {errors[0]}" if errors else ''))
+    check('excel keeps every appended row', len(store.read('1')) == len(rows) + 1)
+    check('no temp files left behind', not [name for name in os.listdir(workdir) if name.startswith('.tmp-')])
+
+    print(json.dumps({'benchmark': 'locking', 'delay': delay, 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Benchmark + parity engine ekstraksi harga terhadap halaman fixture (offline).
+
+Jalankan dari folder src:  python benchmarks/bench_parse.py --repeat 20
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from common import FIXTURE_DIR, quiet  # juga menambahkan src ke sys.path
+import scraper  # noqa: E402
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+def parse_quietly(engine, content):
+    with quiet():
+        return scraper.PARSER_ENGINES[engine](content)
+
+def harga_emas_for_all_weights(price_index):
+    weights = sorted({berat for _, berat in price_index})
+    return {berat: scraper.build_harga_emas(price_index, berat) for berat in weights}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    engines = ['soup', 'strainer'] + (['lxml'] if scraper.lxml_available() else [])
+    results = []
+    failures = 0
+
+    for name, content in load_fixtures().items():
+        reference = parse_quietly('soup', content)
+        reference_harga = harga_emas_for_all_weights(reference)
+        print(f"{name} ({len(content) / 1024:.0f} KB, {len(reference)} price rows)")
+
+        for engine in engines:
+            index = parse_quietly(engine, content)
+            parity = index == reference and harga_emas_for_all_weights(index) == reference_harga
+            failures += not parity
+
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                parse_quietly(engine, content)
+            mean_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+            results.append({'fixture': name, 'engine': engine, 'mean_ms': round(mean_ms, 3), 'parity': parity})
+            print(f"  {engine:9} {mean_ms:9.2f} ms  parity {'OK' if parity else 'MISMATCH'}")
+
+    print(json.dumps({'benchmark': 'parse', 'results': results}))
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
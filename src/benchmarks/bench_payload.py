@@ -0,0 +1,96 @@
+"""Benchmark + cek payload chart: JSON vs biner (format=bin), mentah/gzip/brotli (offline).
+
+Payload biner di-decode ulang seperti di browser (base + cumsum delta, label dari epoch) dan harus
+sama persis dengan payload JSON untuk query yang sama.
+
+Jalankan dari folder src:  python benchmarks/bench_payload.py --size 100000
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from common import Checks, history_rows, quiet, synthetic_history  # juga menambahkan src ke sys.path
+import numpy as np  # noqa: E402
+
+from chart_generator import BINARY_MAGIC, ChartGenerator, ChartQuery  # noqa: E402
+from compression import brotli_available, compress  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import SQLiteTickStore  # noqa: E402
+from utils import display_labels  # noqa: E402
+
+def decode_binary(body):
+    """Mirror decodeChartBinary di index.html"""
+    assert body[:4] == BINARY_MAGIC
+    meta_length = struct.unpack_from('<I', body, 4)[0]
+    meta = json.loads(body[8:8 + meta_length])
+    start = 8 + meta_length
+    data = {key: value for key, value in meta.items() if key not in ('columns', 'n', 'utc_offset')}
+    for column in meta['columns']:
+        raw = np.frombuffer(body, dtype='<' + column['type'], count=meta['n'], offset=start + column['offset'])
+        missing = np.isnan(raw) if column['type'] == 'f8' else raw == np.iinfo(column['type']).min
+        deltas = np.where(missing, 0, raw).astype('int64') * column['scale']
+        data[column['key']] = np.where(missing, 0, column['base'] + np.cumsum(deltas)).tolist()
+    data['dates'] = display_labels(np.array(data.pop('t'), dtype='int64')).tolist()
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100000, help='jumlah tick history')
+    args = parser.parse_args()
+
+    check = Checks()
+    results = []
+
+    workdir = tempfile.mkdtemp(prefix='bench_payload_')
+    history = synthetic_history(args.size, change_rate=0.5, nan_rate=0.01)
+    with quiet():
+        store = SQLiteTickStore(os.path.join(workdir, 'payload.db'))
+        store.ensure_structure(['1'])
+        store.migrate_from_excel('1', excel_file=os.path.join(workdir, 'missing.xlsx'))
+        conn = store._connect()
+        with conn:
+            store._insert_rows(conn, '1', history_rows(history))
+        generator = ChartGenerator(DataManager(store=store))
+        generator.get_chart_series('1')
+
+    encodings = ['gzip'] + (['br'] if brotli_available() else [])
+    if not brotli_available():
+        print(f"  {'brotli sizes':36} SKIP  brotli not installed")
+
+    queries = {'full': None, 'lttb600': ChartQuery(max_points=600), 'ohlc1d': ChartQuery(resolution='1d')}
+    for name, query in queries.items():
+        with quiet():
+            started = time.perf_counter()
+            json_body = generator.get_chart_payload('1', query, 'json').body
+            json_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            bin_body = generator.get_chart_payload('1', query, 'bin').body
+            bin_seconds = time.perf_counter() - started
+        for fmt, body, seconds in (('json', json_body, json_seconds), ('bin', bin_body, bin_seconds)):
+            sizes = {'raw': len(body)}
+            sizes.update({encoding: len(compress(body, encoding)) for encoding in encodings})
+            results.append({'case': f'{name}_{fmt}', 'seconds': round(seconds, 4), 'bytes': sizes})
+
+        decoded = decode_binary(bin_body)
+        check(f'{name}: binary decodes to json', decoded == json.loads(json_body))
+        json_gzip, bin_gzip = len(compress(json_body, 'gzip')), len(compress(bin_body, 'gzip'))
+        check(f'{name}: binary gzip smaller', bin_gzip < json_gzip, f"{bin_gzip} vs {json_gzip} bytes")
+
+    # Delta dari cursor dan series kosong juga lewat jalur biner
+    with quiet():
+        full = json.loads(generator.get_chart_payload('1', None, 'json').body)
+        since = ChartQuery(since=full['cursor'] - 3600)
+        check('delta: binary decodes to json', decode_binary(generator.get_chart_payload('1', since, 'bin').body) ==
+              json.loads(generator.get_chart_payload('1', since, 'json').body))
+        missing = decode_binary(generator.get_chart_payload('9', None, 'bin').body)
+    check('missing series: empty binary payload', missing['isEmpty'] and missing['dates'] == [] and 'error' in missing)
+
+    print(json.dumps({'benchmark': 'payload', 'size': args.size, 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Benchmark + cek perilaku engine multi-sumber terhadap server fixture lokal (offline).
+
+Jalankan dari folder src:  python benchmarks/bench_sources.py --delay 0.5
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from common import Checks, fixture_server, load_fixture, quiet  # juga menambahkan src ke sys.path
+import scraper  # noqa: E402
+from sources import Galeri24Adapter, ScrapeEngine  # noqa: E402
+
+def adapter(name, url, timeout=5):
+    return Galeri24Adapter(name=name, url=url, timeout=timeout)
+
+def run(engine):
+    started = time.perf_counter()
+    with quiet():
+        try:
+            price_index = engine.scrape()
+        except Exception:
+            price_index = None
+    return price_index, time.perf_counter() - started
+
+def statuses(price_index):
+    return {name: info['status'] for name, info in price_index.sources.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--delay', type=float, default=0.5, help='latensi halaman fixture (detik)')
+    args = parser.parse_args()
+    delay = args.delay
+
+    with quiet():
+        reference = scraper.parse_price_index(load_fixture())
+    check = Checks(width=34)
+    results = []
+
+    with contextlib.ExitStack() as stack:
+        hosts = [stack.enter_context(fixture_server()) for _ in range(3)]
+
+        # Satu sumber sehat, satu lambat (lewat timeout sumber), satu error 500
+        engine = ScrapeEngine([adapter('healthy', hosts[0] + '/page'),
+                               adapter('slow', f"{hosts[1]}/page?delay={delay * 4}", timeout=delay),
+                               adapter('broken', hosts[2] + '/error')], deadline=delay * 8)
+        price_index, elapsed = run(engine)
+        check('partial merge keeps healthy source', price_index is not None and dict(price_index) == reference)
+        check('slow source times out', price_index is not None and statuses(price_index)['slow'] == 'timeout',
+              f"{elapsed:.2f}s")
+        check('failing source reported', price_index is not None and statuses(price_index)['broken'] == 'error')
+        check('partial refresh is not unchanged', price_index is not None and not price_index.unchanged)
+
+        # Conditional GET: run kedua (setelah hasil run pertama dicatat tersimpan) mendapat 304 -> unchanged
+        engine = ScrapeEngine([adapter('a', hosts[0] + '/page'), adapter('b', hosts[1] + '/page')])
+        scraper.commit_page_state(run(engine)[0])
+        price_index, _ = run(engine)
+        check('second run served 304 (unchanged)', price_index is not None and price_index.unchanged)
+
+        # Deadline refresh memotong sumber yang tidak selesai
+        engine = ScrapeEngine([adapter('a', hosts[0] + '/page'),
+                               adapter('late', f"{hosts[1]}/page?delay={delay * 4}", timeout=delay * 8)],
+                              deadline=delay)
+        price_index, elapsed = run(engine)
+        check('refresh deadline bounds duration', price_index is not None and elapsed < delay * 2 and
+              statuses(price_index)['late'] == 'timeout', f"{elapsed:.2f}s")
+
+        # Per-host limit: 4 request lambat ke host yang sama, maksimal 2 sekaligus -> 2 gelombang
+        engine = ScrapeEngine([adapter(f"same{i}", f"{hosts[0]}/page?delay={delay}&n={i}") for i in range(4)],
+                              max_workers=4, host_limit=2, deadline=delay * 8)
+        _, elapsed = run(engine)
+        check('per-host limit serialises requests', delay * 1.8 < elapsed < delay * 3, f"{elapsed:.2f}s")
+        results.append({'case': 'same_host_x4_limit2', 'seconds': round(elapsed, 3)})
+
+        # Tiga host berbeda: paralel vs berurutan
+        adapters = [adapter(f"host{i}", f"{url}/page?delay={delay}&n=c") for i, url in enumerate(hosts)]
+        _, concurrent = run(ScrapeEngine(adapters, max_workers=4, deadline=delay * 8))
+        adapters = [adapter(f"host{i}", f"{url}/page?delay={delay}&n=s") for i, url in enumerate(hosts)]
+        _, sequential = run(ScrapeEngine(adapters, max_workers=1, deadline=delay * 8))
+        check('concurrent faster than sequential', concurrent < sequential * 0.6,
+              f"{concurrent:.2f}s vs {sequential:.2f}s")
+        results.append({'case': 'three_hosts_concurrent', 'seconds': round(concurrent, 3)})
+        results.append({'case': 'three_hosts_sequential', 'seconds': round(sequential, 3)})
+
+    print(json.dumps({'benchmark': 'sources', 'delay': delay, 'results': results}))
+    return check.exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
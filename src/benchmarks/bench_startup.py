@@ -0,0 +1,74 @@
+"""Benchmark cold start: waktu dari spawn proses sampai response pertama (time-to-first-response).
+
+Jalankan dari folder src:  python benchmarks/bench_startup.py --runs 5 --max-ms 2000
+Exit code 1 jika median melebihi --max-ms (untuk menangkap regresi).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def measure_once(path, workdir, timeout):
+    """Spawn app, poll path sampai HTTP 200, return detik sejak spawn"""
+    port = free_port()
+    env = dict(os.environ, GOLD_SCHEDULER_ENABLED='0', PYTHONPATH=SRC_DIR)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c',
+         f"import app; app.app.run(host='127.0.0.1', port={port}, debug=False, use_reloader=False)"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}{path}'
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise TimeoutError(f'No response from {path} within {timeout}s')
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', action='append', default=None,
+                        help='endpoint yang diukur (bisa diulang); default /api/scheduler-status dan /api/gold-data')
+    parser.add_argument('--workdir', default=None, help='folder berisi store (default: folder kosong sementara)')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    paths = args.path or ['/api/scheduler-status', '/api/gold-data?berat=1']
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        for path in paths:
+            samples = [measure_once(path, workdir, args.timeout) * 1000 for _ in range(args.runs)]
+            results[path] = {'median_ms': round(statistics.median(samples), 1),
+                             'min_ms': round(min(samples), 1), 'max_ms': round(max(samples), 1)}
+            print(f"{path:30} median {results[path]['median_ms']:8.1f} ms  (min {results[path]['min_ms']}, max {results[path]['max_ms']})")
+
+    print(json.dumps({'benchmark': 'startup', 'results': results}))
+    if args.max_ms is not None and any(r['median_ms'] > args.max_ms for r in results.values()):
+        print(f"❌ Startup regression: median above {args.max_ms} ms")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Helper bersama untuk benchmark offline (history sintetis, timing, output senyap)."""
+import contextlib
+import hashlib
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from storage import COLUMNS, PRICE_COLUMNS  # noqa: E402
+
+def synthetic_history(rows, change_rate=0.05, nan_rate=0.0, seed=42):
+    """History sintetis: satu tick per menit, harga berubah dengan probabilitas change_rate"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01 08:00:00')
+    stamps = start + pd.to_timedelta(np.arange(rows), unit='min')
+    data = {
+        'Tanggal': stamps.strftime('%Y-%m-%d'),
+        'Jam': stamps.strftime('%H:%M:%S'),
+    }
+    for i, col in enumerate(PRICE_COLUMNS):
+        steps = np.where(rng.random(rows) < change_rate, rng.integers(-5, 6, rows) * 1000, 0)
+        values = (1_400_000 + i * 10_000 + np.cumsum(steps)).astype('float64')
+        if nan_rate:
+            values[rng.random(rows) < nan_rate] = np.nan
+        data[col] = values
+    return pd.DataFrame(data, columns=COLUMNS)
+
+def history_rows(df):
+    """DataFrame history -> list dict baris untuk store"""
+    return df.to_dict('records')
+
+class Checks:
+    """Cek OK/FAIL benchmark: check(name, ok, detail) mencetak satu baris; exit_code 1 jika ada yang gagal"""
+
+    def __init__(self, width=36):
+        self.width = width
+        self.outcomes = []
+
+    def __call__(self, name, ok, detail=''):
+        self.outcomes.append(bool(ok))
+        print(f"  {name:{self.width}} {'OK' if ok else 'FAIL'}  {detail}")
+        return ok
+
+    @property
+    def exit_code(self):
+        return 0 if all(self.outcomes) else 1
+
+def load_fixture(name='galeri24_harga_emas.html'):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+@contextlib.contextmanager
+def quiet():
+    """Buang print emoji aplikasi selama pengukuran"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def measure(fn, repeat=5, setup=None):
+    """Jalankan fn beberapa kali (setup tidak dihitung), return statistik dalam milidetik"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            with quiet():
+                setup()
+        with quiet():
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'min_ms': round(min(samples), 4),
+        'repeat': repeat
+    }
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Stand-in halaman dealer: /page?delay=detik (ETag/304), /error (500)"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        delay = float(parse_qs(url.query).get('delay', ['0'])[0])
+        if delay:
+            time.sleep(delay)
+        if url.path == '/error':
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content = self.server.content
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        try:
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client sudah menyerah (timeout), memang yang diuji
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def fixture_server(content=None):
+    """Server HTTP lokal (127.0.0.1, port acak) yang menyajikan halaman fixture; yield base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    server.content = content if content is not None else load_fixture()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
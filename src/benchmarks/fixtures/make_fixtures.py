@@ -0,0 +1,69 @@
+"""Generate halaman fixture tiruan Galeri24 (struktur markup sama dengan yang ditarget scraper).
+
+Jalankan dari folder src:  python benchmarks/fixtures/make_fixtures.py
+"""
+import os
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WEIGHTS = ['0.5', '1', '2', '3', '5', '10', '25', '50', '100', '250', '500', '1000']
+VENDOR_BASES = {'GALERI 24': 2_150_000, 'ANTAM': 2_290_000, 'UBS': 2_210_000}
+
+def format_rupiah(value):
+    return 'Rp' + f'{value:,}'.replace(',', '.')
+
+def price_row(berat, jual, buyback):
+    return (
+        '<div class="grid grid-cols-5 divide-x lg:divide-x-0 divide-neutral-200 border-b border-neutral-200">'
+        f'<div class="p-3 col-span-1 text-center">{berat}</div>'
+        f'<div class="p-3 col-span-2 text-right"><span class="font-semibold">{format_rupiah(jual)}</span></div>'
+        f'<div class="p-3 col-span-2 text-right">{format_rupiah(buyback)}</div>'
+        '</div>'
+    )
+
+def container(vendor, base):
+    rows = [
+        '<div class="grid grid-cols-5 divide-x divide-neutral-200">'
+        '<div class="bg-neutral-50 p-3 col-span-1">Berat</div>'
+        '<div class="bg-neutral-50 p-3 col-span-2">Harga Jual</div>'
+        '<div class="bg-neutral-50 p-3 col-span-2">Harga Buyback</div>'
+        '</div>'
+    ]
+    for berat in WEIGHTS:
+        jual = int(base * float(berat))
+        rows.append(price_row(berat, jual, int(jual * 0.92)))
+    return (
+        '<div class="grid divide-y divide-neutral-200 border border-neutral-200 rounded-lg overflow-hidden">'
+        f'<div class="bg-primary-100 p-4 font-bold text-lg">Harga {vendor}</div>'
+        + ''.join(rows) +
+        '</div>'
+    )
+
+def page(vendor_bases=None, filler_sections=400):
+    vendor_bases = vendor_bases or VENDOR_BASES
+    filler = ''.join(
+        f'<section class="py-6 px-4"><h3 class="text-xl font-semibold">Artikel {i}</h3>'
+        f'<p class="text-neutral-600">Informasi produk emas dan layanan nomor {i}.</p>'
+        f'<a class="text-primary-600" href="/artikel/{i}">Baca selengkapnya</a></section>'
+        for i in range(filler_sections)
+    )
+    script = '<script>window.__NUXT__=' + '{"state":' + ','.join(['"x"'] * 2000) + '}</script>'
+    containers = ''.join(container(vendor, base) for vendor, base in vendor_bases.items())
+    return (
+        '<!DOCTYPE html><html lang="id"><head><meta charset="utf-8"><title>Harga Emas Hari Ini - Galeri 24</title>'
+        '<link rel="stylesheet" href="/_nuxt/entry.css"></head><body>'
+        f'<header class="sticky top-0">Navigasi</header><main class="container mx-auto">{filler}'
+        f'<div class="grid gap-6 lg:grid-cols-3">{containers}</div>{filler}</main>{script}</body></html>'
+    )
+
+FIXTURES = {
+    'galeri24_harga_emas.html': lambda: page(),
+    'galeri24_harga_emas_changed.html': lambda: page({'GALERI 24': 2_155_000, 'ANTAM': 2_290_000, 'UBS': 2_205_000}),
+    'galeri24_harga_emas_small.html': lambda: page(filler_sections=10),
+}
+
+if __name__ == '__main__':
+    for name, build in FIXTURES.items():
+        with open(os.path.join(FIXTURE_DIR, name), 'w', encoding='utf-8') as f:
+            f.write(build())
+        print(f'wrote {name}')
@@ -0,0 +1,208 @@
+"""Suite microbenchmark offline untuk jalur scrape, store dan chart.
+
+Semua data berasal dari fixture HTML dan history sintetis; tidak ada request ke galeri24.co.id.
+
+Jalankan dari folder src:
+    python benchmarks/run_benchmarks.py                         # 10k, 100k, 1M ticks
+    python benchmarks/run_benchmarks.py --sizes 10000 --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline         # tulis benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.25
+
+Exit code 1 jika ada benchmark yang median-nya lebih lambat dari baseline * (1 + threshold).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from common import history_rows, load_fixture, measure, quiet, synthetic_history  # juga menambahkan src ke sys.path
+import pandas as pd  # noqa: E402
+
+import scraper  # noqa: E402
+from chart_generator import ChartGenerator, ChartQuery  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import ExcelTickStore, SQLiteTickStore, get_excel_file  # noqa: E402
+from utils import extract_price  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+class TickClock:
+    """Timestamp tick baru setelah akhir history sintetis; harga naik setiap tick agar
+    append selalu menulis tick baru (bukan konfirmasi harga yang sama)"""
+
+    def __init__(self, history):
+        last = history.iloc[-1]
+        self.current = pd.Timestamp(f"{last['Tanggal']} {last['Jam']}")
+        self.price = 1_500_000.0
+
+    def row(self, price=None):
+        self.current += pd.Timedelta(minutes=1)
+        if price is None:
+            self.price += 1_000
+            price = self.price
+        return {
+            'Tanggal': self.current.strftime('%Y-%m-%d'),
+            'Jam': self.current.strftime('%H:%M:%S'),
+            'GALERI24_Jual': price, 'GALERI24_Buyback': price * 0.92,
+            'ANTAM_Jual': price + 10_000, 'ANTAM_Buyback': price * 0.93,
+            'UBS_Jual': price + 5_000, 'UBS_Buyback': price * 0.925
+        }
+
+def bench_scrape(results, repeat):
+    """Parsing scrape_galeri24_data dari fixture (fetch diganti konten lokal)"""
+    content = load_fixture()
+    original_fetch = scraper.fetch_galeri24_page
+    scraper.fetch_galeri24_page = lambda conditional=True, **kwargs: (200, content, {}, {})
+
+    def reset_page_state():
+        scraper._page_state.update(etag=None, last_modified=None, section_hash=None, price_index=None)
+
+    try:
+        for engine in ['soup', 'auto']:
+            scraper.config.PARSER_ENGINE = engine
+            results[f'scrape_galeri24_data[{engine}]'] = measure(
+                lambda: scraper.scrape_galeri24_data('1'), repeat, setup=reset_page_state)
+        # Unchanged: tabel harga yang sama sudah tersimpan (commit_page_state) sebelum scrape berikutnya
+        scraper.commit_page_state(scraper.scrape_galeri24_prices())
+        results['scrape_galeri24_data[unchanged]'] = measure(lambda: scraper.scrape_galeri24_data('1'), repeat)
+    finally:
+        scraper.fetch_galeri24_page = original_fetch
+
+    texts = ['Rp1.234.567', 'Rp 2.150.000', '-', 'Rp12.500.000', 'abc'] * 2000
+    results['extract_price[x10000]'] = measure(lambda: [extract_price(text) for text in texts], repeat)
+
+    with quiet():
+        price_index = scraper.PriceIndex(scraper.parse_price_index(content))
+    return price_index
+
+def bench_history(results, size, backend, price_index, repeat, workdir):
+    """Benchmark store + chart untuk satu ukuran history"""
+    history = synthetic_history(size)
+    clock = TickClock(history)
+    label = f'{backend}:{size}'
+
+    with quiet():
+        if backend == 'sqlite':
+            store = SQLiteTickStore(os.path.join(workdir, f'bench_{size}.db'))
+            store.ensure_structure(['1'])
+            store.migrate_from_excel('1', excel_file=os.path.join(workdir, 'missing.xlsx'))
+            conn = store._connect()
+            with conn:
+                store._insert_rows(conn, '1', history_rows(history))
+        else:
+            store = ExcelTickStore()
+            history.to_excel(get_excel_file('1'), index=False, sheet_name='Data_Harian')
+        data_manager = DataManager(store=store)
+
+    results[f'store_append[{label}]'] = measure(lambda: store.append('1', clock.row()), repeat)
+    results[f'update_excel_data[{label}]'] = measure(
+        lambda: data_manager.update_excel_data('1', price_index), repeat)
+    # Satu siklus scrape untuk semua vendor x berat di fixture dalam satu batch
+    results[f'save_price_index[{label}]'] = measure(
+        lambda: data_manager.save_price_index(price_index, ['1']), repeat)
+    results[f'get_existing_data_cold[{label}]'] = measure(
+        lambda: data_manager.get_existing_data('1'), repeat, setup=data_manager.history_cache.invalidate)
+    results[f'get_existing_data_warm[{label}]'] = measure(lambda: data_manager.get_existing_data('1'), repeat)
+
+    with quiet():
+        df = data_manager.get_existing_data('1')
+    chart_generator = ChartGenerator(data_manager)
+    results[f'filter_changed_prices[{label}]'] = measure(lambda: chart_generator.filter_changed_prices(df), repeat)
+
+    def reset_chart():
+        data_manager.history_cache.invalidate()
+        chart_generator.series.clear()
+        chart_generator.payloads.clear()
+
+    results[f'get_chart_data_cold[{label}]'] = measure(
+        lambda: chart_generator.get_chart_data('1'), repeat, setup=reset_chart)
+    results[f'get_chart_data_after_tick[{label}]'] = measure(
+        lambda: chart_generator.get_chart_data('1'), repeat, setup=lambda: store.append('1', clock.row()))
+    with quiet():
+        chart_generator.get_chart_payload('1')
+    results[f'get_chart_payload_hit[{label}]'] = measure(lambda: chart_generator.get_chart_payload('1'), repeat)
+    results[f'get_chart_data_lttb600[{label}]'] = measure(
+        lambda: chart_generator.get_chart_data('1', ChartQuery(max_points=600)), repeat)
+    results[f'get_chart_data_ohlc1d[{label}]'] = measure(
+        lambda: chart_generator.get_chart_data('1', ChartQuery(resolution='1d')), repeat)
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Bandingkan median dengan baseline; return list regresi"""
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference['median_ms'] * (1 + threshold)
+        if stats['median_ms'] > limit and stats['median_ms'] - reference['median_ms'] > min_delta_ms:
+            regressions.append((name, reference['median_ms'], stats['median_ms']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='ukuran history (ticks), dipisah koma')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--excel-max-rows', type=int, default=10000,
+                        help='backend Excel hanya diukur sampai ukuran ini (rewrite O(history))')
+    parser.add_argument('--output', default=None, help='tulis hasil JSON ke file')
+    parser.add_argument('--baseline', default=None, help='file baseline untuk deteksi regresi')
+    parser.add_argument('--threshold', type=float, default=0.25, help='toleransi relatif terhadap baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='abaikan selisih absolut di bawah ini')
+    parser.add_argument('--save-baseline', action='store_true', help=f'simpan hasil sebagai {DEFAULT_BASELINE}')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = {}
+    started = time.time()
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            price_index = bench_scrape(results, args.repeat)
+            for size in sizes:
+                # History besar: cukup beberapa ulangan
+                repeat = args.repeat if size < 1_000_000 else max(1, min(args.repeat, 2))
+                bench_history(results, size, 'sqlite', price_index, repeat, workdir)
+                if size <= args.excel_max_rows:
+                    bench_history(results, size, 'excel', price_index, min(repeat, 3), workdir)
+                print(f"✅ size {size} done ({time.time() - started:.1f}s)", file=sys.stderr)
+        finally:
+            os.chdir(original_cwd)
+
+    for name, stats in results.items():
+        print(f"{name:55} median {stats['median_ms']:12.3f} ms")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sizes': sizes
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for name, before, after in regressions:
+            print(f"❌ REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+if __name__ == '__main__':
+    main()
@@ -1,110 +1,471 @@
-import pandas as pd
 import os  # Tambahkan ini
-from utils import format_display_date
+import json
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from utils import display_labels, get_logger, lazy_import, WIB_OFFSET_SECONDS
+from storage import PRICE_COLUMNS
+from downsample import RESOLUTIONS, bucket_offset, lttb_indices, ohlc_buckets
+from compression import EncodedBody
+from metrics import CHART_BUILD_SECONDS
+
+logger = get_logger('chart_generator')
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+JUAL_COLUMNS = ['GALERI24_Jual', 'ANTAM_Jual', 'UBS_Jual']
+
+# Key series di payload chart -> kolom history
+SERIES_COLUMNS = {
+    'g24_jual': 'GALERI24_Jual',
+    'antam_jual': 'ANTAM_Jual',
+    'ubs_jual': 'UBS_Jual',
+    'g24_buyback': 'GALERI24_Buyback',
+    'antam_buyback': 'ANTAM_Buyback',
+    'ubs_buyback': 'UBS_Buyback'
+}
+
+# Jumlah payload (berat x query) yang disimpan sekaligus
+MAX_CACHED_PAYLOADS = 64
+
+class ChartQuery(namedtuple('ChartQuery', ['start', 'end', 'resolution', 'max_points', 'since'])):
+    """Parameter chart: range epoch detik (inklusif), key RESOLUTIONS, jumlah titik maksimum,
+    atau cursor since (epoch detik) untuk mode delta"""
+    __slots__ = ()
+
+    def __new__(cls, start=None, end=None, resolution=None, max_points=None, since=None):
+        return super().__new__(cls, start, end, resolution, max_points, since)
+
+    @property
+    def active(self):
+        return any(value is not None for value in self)
+
+    @property
+    def mode(self):
+        """Label jenis query untuk metric"""
+        if self.since is not None:
+            return 'delta'
+        if self.resolution is not None:
+            return 'ohlc'
+        if self.max_points is not None:
+            return 'lttb'
+        return 'range' if self.active else 'full'
+
+def tick_epoch(df):
+    """Epoch detik dari kolom Tanggal + Jam (WIB), vectorized; return (ts, mask baris yang terbaca)"""
+    stamps = pd.to_datetime(df['Tanggal'].astype(str) + ' ' + df['Jam'].astype(str), errors='coerce')
+    valid = stamps.notna().to_numpy()
+    seconds = stamps.to_numpy(dtype='datetime64[s]').astype('int64') - WIB_OFFSET_SECONDS
+    return seconds, valid
+
+# Titik chart (perubahan harga) untuk satu versi store, sebagai array kontigu terurut waktu:
+# ts int64 epoch detik, prices int64 rupiah (n, 6), labels string sumbu chart. ticks_ts/ticks = semua tick
+# valid (float, untuk OHLC); last_change = harga titik perubahan terakhir, extra = titik terakhir hanya
+# disertakan sebagai data valid terakhir (bukan perubahan) dan diganti saat tick baru datang
+ChartSeries = namedtuple('ChartSeries', ['version', 'ts', 'prices', 'labels', 'latest', 'error',
+                                         'ticks_ts', 'ticks', 'last_change', 'extra'])
+
+def sorted_ticks(df):
+    """History wide -> (ts, harga float (n, 6), df) untuk baris dengan timestamp terbaca dan minimal
+    satu harga Jual, terurut epoch (stable)"""
+    ts, valid = tick_epoch(df)
+    valid &= ~np.isnan(df.reindex(columns=JUAL_COLUMNS).to_numpy(dtype='float64')).all(axis=1)
+    positions = np.flatnonzero(valid)
+    positions = positions[np.argsort(ts[positions], kind='stable')]
+    df = df.iloc[positions].reset_index(drop=True)
+    return ts[positions], df.reindex(columns=PRICE_COLUMNS).to_numpy(dtype='float64'), df
+
+def same_tick(a, b):
+    return bool(((a == b) | (np.isnan(a) & np.isnan(b))).all())
+
+def range_mask(ts, valid, query):
+    mask = np.ones(len(ts), dtype=bool) if valid is None else valid.copy()
+    if query.start is not None:
+        mask &= ts >= query.start
+    if query.end is not None:
+        mask &= ts <= query.end
+    return mask
+
+def nullable_list(values):
+    """Array float -> list JSON dengan NaN sebagai null"""
+    return [None if value != value else value for value in values.tolist()]
+
+def changed_price_mask(prices, previous=None):
+    """Mask baris yang harganya berubah dibanding baris sebelumnya (NaN == NaN dianggap sama).
+
+    prices: array float (n_rows, n_kolom). previous: baris sebelum prices[0] (None = selalu berubah)."""
+    changed = np.ones(len(prices), dtype=bool)
+    if len(prices) == 0:
+        return changed
+    if previous is not None:
+        prices_prev = np.vstack([previous, prices[:-1]])
+        start = 0
+    else:
+        prices_prev = prices[:-1]
+        start = 1
+    current = prices[start:]
+    different = (current != prices_prev) & ~(np.isnan(current) & np.isnan(prices_prev))
+    changed[start:] = different.any(axis=1)
+    return changed
+
+class ChartPayload(EncodedBody):
+    """Payload chart yang sudah di-serialize (JSON atau biner) untuk satu versi store"""
+
+    def __init__(self, version, body, last_modified, mimetype='application/json'):
+        super().__init__(body, mimetype)
+        self.version = version
+        self.last_modified = last_modified
+
+# Format /api/gold-data?format=: JSON (default) atau biner ringkas (typed array di browser)
+CHART_FORMATS = ('json', 'bin')
+BINARY_MAGIC = b'GCB1'
+BINARY_MIMETYPE = 'application/octet-stream'
+
+# Lebar delta yang dicoba, dari yang terkecil; nilai minimum tiap tipe = sentinel harga kosong (0)
+DELTA_TYPES = ('i1', 'i2', 'i4')
+
+def delta_column(values):
+    """Kolom int64 -> (deskripsi, delta bytes). Nilai ke-i = base + scale * cumsum(delta)[i].
+
+    Harga kosong (0) ditulis sebagai sentinel (nilai minimum tipe, NaN untuk f8) dan tidak mengubah
+    akumulator, jadi delta hanya antar harga yang ada. Delta dibagi FPB-nya (harga bergerak per
+    ribuan rupiah, tick per menit) lalu disimpan dengan tipe int terkecil yang muat; float64
+    (eksak < 2^53) jika tidak ada yang muat."""
+    present = values != 0
+    if not present.any():
+        return {'type': 'i1', 'base': 0, 'scale': 1}, np.full(len(values), np.iinfo('int8').min, dtype='i1').tobytes()
+    base = int(values[present][0])
+    # Harga kosong diisi harga terakhir yang ada (forward fill) agar delta-nya 0
+    filled = values[present][np.maximum(np.cumsum(present) - 1, 0)]
+    deltas = np.diff(filled, prepend=base)
+    scale = int(np.gcd.reduce(np.abs(deltas))) or 1
+    deltas //= scale
+    largest = int(np.abs(deltas).max())
+    for kind in DELTA_TYPES:
+        info = np.iinfo(kind)
+        if largest < info.max:
+            encoded = deltas.astype(kind)
+            encoded[~present] = info.min
+            break
+    else:
+        kind = 'f8'
+        encoded = deltas.astype('float64')
+        encoded[~present] = np.nan
+    return {'type': kind, 'base': base, 'scale': scale}, encoded.astype(f'<{kind}').tobytes()
+
+def encode_chart_binary(ts, prices, info):
+    """Payload biner: magic 'GCB1', uint32 panjang header, header JSON (metadata + deskripsi kolom),
+    lalu kolom delta little-endian (delta_column; epoch detik 't' dan keenam series harga),
+    tiap kolom rata 8 byte.
+
+    Label sumbu dibuat client dari epoch ('utc_offset'), jadi tidak ada string per titik."""
+    columns = [('t', ts)] + [(key, prices[:, PRICE_COLUMNS.index(col)]) for key, col in SERIES_COLUMNS.items()]
+    descriptors, blocks, offset = [], [], 0
+    for key, values in columns:
+        descriptor, data = delta_column(np.asarray(values, dtype='int64'))
+        data += b'\0' * (-len(data) % 8)
+        descriptors.append(dict(descriptor, key=key, offset=offset))
+        blocks.append(data)
+        offset += len(data)
+
+    header = dict(info, n=len(ts), utc_offset=WIB_OFFSET_SECONDS, columns=descriptors)
+    meta = json.dumps(header, separators=(',', ':'), default=str).encode('utf-8')
+    # Padding spasi agar kolom pertama mulai di offset kelipatan 8 (bisa dibaca langsung sebagai typed array)
+    meta += b' ' * (-(len(meta) + 8) % 8)
+    return BINARY_MAGIC + struct.pack('<I', len(meta)) + meta + b''.join(blocks)
 
 class ChartGenerator:
     def __init__(self, data_manager):
         self.data_manager = data_manager
+        # Titik chart + timestamp terurut per berat, di-extend dengan tick baru saat versi store berubah
+        self.series = {}
+        self.series_lock = threading.Lock()
+        # Payload siap kirim per (berat, query), dibangun sekali per versi store (LRU)
+        self.payloads = OrderedDict()
+        self.payloads_lock = threading.Lock()
     
-    def get_chart_data(self, berat='1'):
-        """Mengambil data untuk chart dari file Excel"""
-        excel_file = self.data_manager.get_excel_file(berat)
+    def get_chart_payload(self, berat='1', query=None, fmt='json'):
+        """Payload JSON atau biner untuk /api/gold-data, di-cache per versi store, query dan format"""
+        key = (berat, query if query is not None and query.active else None, fmt)
+        version = self.data_manager.store.version(berat)
+        payload = self.payloads.get(key)
+        if payload is not None and payload.version == version:
+            return payload
         
-        if not os.path.exists(excel_file):
-            print(f"❌ File Excel untuk {berat}g tidak ditemukan: {excel_file}")
-            return self.create_empty_chart_data(berat, f'Data untuk {berat} gram belum tersedia.')
-        
-        try:
-            df_history = self.data_manager.get_existing_data(berat)
+        with self.payloads_lock:
+            payload = self.payloads.get(key)
+            if payload is not None and payload.version == version:
+                return payload
             
-            if df_history.empty:
-                print(f"📭 File Excel untuk {berat}g kosong")
-                return self.create_empty_chart_data(berat, f'Data untuk {berat} gram masih kosong.')
-                
-            print(f"📊 Data loaded for chart {berat}g: {len(df_history)} rows")
+            if fmt == 'bin':
+                body, mimetype = self.get_chart_binary(berat, key[1]), BINARY_MIMETYPE
+            else:
+                chart_data = self.get_chart_data(berat, key[1])
+                body = json.dumps(chart_data, separators=(',', ':'), default=str).encode('utf-8')
+                mimetype = 'application/json'
             
-            # Pastikan kolom UBS ada
-            if 'UBS_Jual' not in df_history.columns:
-                df_history['UBS_Jual'] = None
-                print("➕ Added missing UBS_Jual column")
-            if 'UBS_Buyback' not in df_history.columns:
-                df_history['UBS_Buyback'] = None
-                print("➕ Added missing UBS_Buyback column")
+            # Last-Modified hanya maju jika isi payload benar-benar berubah
+            previous = payload
+            payload = ChartPayload(version, body, time.time(), mimetype)
+            if previous is not None and previous.etag == payload.etag:
+                payload.last_modified = previous.last_modified
             
-            # Filter hanya data yang memiliki harga (tidak null)
-            df_history = df_history.dropna(subset=['GALERI24_Jual', 'ANTAM_Jual', 'UBS_Jual'], how='all')
+            self.payloads[key] = payload
+            self.payloads.move_to_end(key)
+            while len(self.payloads) > MAX_CACHED_PAYLOADS:
+                self.payloads.popitem(last=False)
+            return payload
+    
+    def get_chart_series(self, berat='1'):
+        """Titik perubahan harga + epoch detik terurut, di-cache per versi store.
+
+        Saat versi naik, hanya tick setelah tick terakhir series yang dibaca dari store dan
+        di-append (klasifikasi, epoch dan label untuk tick baru saja); history penuh dibaca
+        ulang hanya untuk build pertama atau jika tick lama ternyata berubah."""
+        version = self.data_manager.store.version(berat)
+        series = self.series.get(berat)
+        if series is not None and series.version == version:
+            return series
+        
+        with self.series_lock:
+            series = self.series.get(berat)
+            if series is not None and series.version == version:
+                return series
             
-            if df_history.empty:
-                print(f"📭 Tidak ada data valid untuk {berat}g")
-                return self.create_empty_chart_data(berat, f'Data untuk {berat} gram tidak valid.')
+            if series is not None and series.error is None:
+                series = self.extend_chart_series(berat, series, version)
+            else:
+                series = None
+            if series is None:
+                series = self.build_chart_series(berat, version)
+            self.series[berat] = series
+            return series
+    
+    def build_chart_series(self, berat, version):
+        if not self.data_manager.series_exists(berat):
+            logger.warning(f"❌ Data store untuk {berat}g tidak ditemukan")
+            return self.empty_series(version, f'Data untuk {berat} gram belum tersedia.')
+        
+        df_history = self.data_manager.get_existing_data(berat)
+        
+        if df_history.empty:
+            logger.debug(f"📭 File Excel untuk {berat}g kosong")
+            return self.empty_series(version, f'Data untuk {berat} gram masih kosong.')
             
-            # FILTER: Hanya ambil data ketika harga berubah
-            df_filtered = self.filter_changed_prices(df_history)
-            print(f"📈 Filtered data (price changes only): {len(df_filtered)} rows")
+        logger.debug(f"📊 Data loaded for chart {berat}g: {len(df_history)} rows")
+        
+        # Pastikan kolom UBS ada (tanpa mengubah snapshot cache)
+        if 'UBS_Jual' not in df_history.columns:
+            df_history = df_history.assign(UBS_Jual=None)
+            logger.debug("➕ Added missing UBS_Jual column")
+        if 'UBS_Buyback' not in df_history.columns:
+            df_history = df_history.assign(UBS_Buyback=None)
+            logger.debug("➕ Added missing UBS_Buyback column")
+        
+        # Hanya data yang memiliki harga Jual, terurut pada epoch int64 (bukan string Tanggal + Jam)
+        ticks_ts, ticks, df_history = sorted_ticks(df_history)
+        
+        if df_history.empty:
+            logger.debug(f"📭 Tidak ada data valid untuk {berat}g")
+            return self.empty_series(version, f'Data untuk {berat} gram tidak valid.')
+        
+        empty = self.empty_series(version, None)
+        return self.append_ticks(empty, version, ticks_ts, ticks, df_history)
+    
+    def extend_chart_series(self, berat, series, version):
+        """Series versi baru = series lama + tick setelah tick terakhirnya; None jika harus build ulang"""
+        last_ts = int(series.ticks_ts[-1])
+        chunks = [chunk for chunk in self.data_manager.store.iter_read(berat, start=last_ts) if not chunk.empty]
+        if not chunks:
+            return None
+        ticks_ts, ticks, df_new = sorted_ticks(pd.concat(chunks, ignore_index=True))
+        
+        # Tick terakhir harus tetap sama (INSERT OR REPLACE pada detik yang sama mengubahnya)
+        same_second = ticks_ts == last_ts
+        if same_second.sum() != 1 or not same_tick(ticks[same_second][0], series.ticks[-1]):
+            logger.debug(f"🔁 Tick terakhir {berat}g berubah, build ulang series chart")
+            return None
+        
+        fresh = ticks_ts > last_ts
+        logger.debug(f"📈 Append {int(fresh.sum())} tick baru ke series chart {berat}g")
+        return self.append_ticks(series, version, ticks_ts[fresh], ticks[fresh],
+                                 df_new[fresh].reset_index(drop=True))
+    
+    def append_ticks(self, series, version, ticks_ts, ticks, df):
+        """Klasifikasi tick baru (terurut, setelah tick terakhir series) terhadap harga perubahan terakhir
+        dan append titiknya; titik data valid terakhir selalu disertakan (seperti filter_changed_prices)"""
+        if len(ticks_ts) == 0:
+            return series._replace(version=version)
+        
+        changed = changed_price_mask(ticks, series.last_change)
+        extra = not changed[-1]
+        changed[-1] = True
+        points_ts, points = ticks_ts[changed], ticks[changed]
+        
+        # Titik 'data terakhir' sebelumnya bukan perubahan: diganti oleh titik baru
+        keep = len(series.ts) - 1 if series.extra else len(series.ts)
+        last_change = series.last_change
+        if extra:
+            if changed.sum() > 1:
+                last_change = points[-2]
+        else:
+            last_change = points[-1]
+        
+        return ChartSeries(
+            version,
+            np.concatenate([series.ts[:keep], points_ts]),
+            np.concatenate([series.prices[:keep], np.nan_to_num(points, nan=0.0).astype('int64')]),
+            np.concatenate([series.labels[:keep], display_labels(points_ts)]),
+            df.iloc[-1].fillna(0).to_dict(),
+            None,
+            np.concatenate([series.ticks_ts, ticks_ts]),
+            np.concatenate([series.ticks, ticks]),
+            last_change,
+            extra)
+    
+    def empty_series(self, version, error):
+        empty_ts = np.empty(0, dtype='int64')
+        return ChartSeries(version, empty_ts, np.empty((0, len(PRICE_COLUMNS)), dtype='int64'),
+                           np.empty(0, dtype='U12'), None, error, empty_ts,
+                           np.empty((0, len(PRICE_COLUMNS))), None, False)
+    
+    def get_chart_data(self, berat='1', query=None):
+        """Mengambil data untuk chart dari store, opsional dengan range/resolusi/downsampling
+        atau delta sejak cursor (ChartQuery)"""
+        with CHART_BUILD_SECONDS.time(mode=query.mode if query is not None else 'full'):
+            ts, prices, labels, info = self.build_chart_frame(berat, query)
+            if ts is None:
+                return info
             
-            df_filtered['Tanggal'] = df_filtered['Tanggal'].astype(str)
-            df_filtered['Jam'] = df_filtered['Jam'].astype(str)
-            df_filtered['TanggalJam'] = df_filtered['Tanggal'] + ' ' + df_filtered['Jam']
+            # Harga int64 (kosong = 0) dan label langsung dari array, tanpa loop per baris
+            result = {'berat': berat, 'dates': labels.tolist()}
+            for key, col in SERIES_COLUMNS.items():
+                result[key] = prices[:, PRICE_COLUMNS.index(col)].tolist()
+            result.update(info)
+            return result
+    
+    def get_chart_binary(self, berat='1', query=None):
+        """Data chart yang sama dengan get_chart_data sebagai payload biner (encode_chart_binary)"""
+        with CHART_BUILD_SECONDS.time(mode=query.mode if query is not None else 'full'):
+            ts, prices, _, info = self.build_chart_frame(berat, query)
+            if ts is None:
+                ts, prices = np.empty(0, dtype='int64'), np.empty((0, len(PRICE_COLUMNS)), dtype='int64')
+                info = {key: value for key, value in info.items() if key not in SERIES_COLUMNS and key != 'dates'}
+            return encode_chart_binary(ts, prices, info)
+    
+    def build_chart_frame(self, berat, query):
+        """Titik chart untuk query sebagai array: (ts epoch, prices int64, labels, info metadata).
+        Jika data tidak tersedia: (None, None, None, data chart kosong)"""
+        try:
+            series = self.get_chart_series(berat)
+            if series.error is not None:
+                return None, None, None, self.create_empty_chart_data(berat, series.error)
             
-            df_sorted = df_filtered.sort_values(by='TanggalJam', ascending=True)
+            ts, prices, labels = series.ts, series.prices, series.labels
+            cursor = int(ts[-1]) if len(ts) else None
             
-            dates_display = []
-            for index, row in df_sorted.iterrows():
-                dates_display.append(format_display_date(row['Tanggal'], row['Jam']))
+            query_info = None
+            if query is not None and query.since is not None:
+                # Mode delta: binary search pada timestamp terurut, hanya titik setelah cursor
+                first = int(np.searchsorted(ts, query.since, side='right'))
+                ts, prices, labels = ts[first:], prices[first:], labels[first:]
+                cursor = query.since if cursor is None else max(cursor, query.since)
+                query_info = {'delta': True, 'since': query.since}
+            elif query is not None and query.active:
+                ts, prices, labels, query_info = self.apply_chart_query(series, query)
             
-            # Pastikan tidak ada nilai NaN dalam data chart
-            result = {
+            info = {
                 'berat': berat,
-                'dates': dates_display,
-                'g24_jual': df_sorted['GALERI24_Jual'].fillna(0).tolist(),
-                'antam_jual': df_sorted['ANTAM_Jual'].fillna(0).tolist(),
-                'ubs_jual': df_sorted['UBS_Jual'].fillna(0).tolist(),
-                'g24_buyback': df_sorted['GALERI24_Buyback'].fillna(0).tolist(),
-                'antam_buyback': df_sorted['ANTAM_Buyback'].fillna(0).tolist(),
-                'ubs_buyback': df_sorted['UBS_Buyback'].fillna(0).tolist(),
-                'latest': df_history.iloc[-1].fillna(0).to_dict() if not df_history.empty else {},
+                'latest': series.latest,
+                'cursor': cursor,
                 'isEmpty': False
             }
+            if query_info is not None:
+                info.update(query_info)
             
-            print(f"✅ Chart data prepared untuk {berat}g: {len(result['dates'])} data points")
-            return result
+            logger.debug(f"✅ Chart data prepared untuk {berat}g: {len(ts)} data points")
+            return ts, prices, labels, info
             
         except Exception as e:
-            print(f"❌ Error membaca data Excel untuk {berat}g: {e}")
+            logger.error(f"❌ Error membaca data Excel untuk {berat}g: {e}")
             import traceback
             traceback.print_exc()
-            return self.create_empty_chart_data(berat, f'Error membaca data: {str(e)}')
+            return None, None, None, self.create_empty_chart_data(berat, f'Error membaca data: {str(e)}')
+    
+    def apply_chart_query(self, series, query):
+        """Terapkan range waktu, bucket OHLC (resolution) dan downsampling LTTB (max_points).
+        
+        Tanpa resolution, garis chart = titik perubahan harga dalam range, di-downsample LTTB
+        jika lebih dari max_points. Dengan resolution, OHLC dihitung dari semua tick valid dalam
+        range dan garis chart = harga close per bucket (max_points tidak berlaku).
+        Return (ts, prices int64, labels, info)."""
+        in_range = range_mask(series.ts, None, query)
+        ts, prices, labels = series.ts[in_range], series.prices[in_range], series.labels[in_range]
+        info = {
+            'query': {
+                'from': query.start,
+                'to': query.end,
+                'resolution': query.resolution,
+                'max_points': query.max_points,
+                'total_points': len(ts)
+            }
+        }
+        
+        if query.resolution is not None:
+            in_range = range_mask(series.ticks_ts, None, query)
+            
+            # Bucket harian/mingguan dimulai tengah malam WIB (minggu mulai Senin)
+            buckets, opens, highs, lows, closes = ohlc_buckets(
+                series.ticks_ts[in_range], series.ticks[in_range], RESOLUTIONS[query.resolution],
+                offset=bucket_offset(query.resolution, WIB_OFFSET_SECONDS))
+            
+            ohlc = {'t': buckets.tolist()}
+            for key, col in SERIES_COLUMNS.items():
+                column = PRICE_COLUMNS.index(col)
+                ohlc[key] = {
+                    'o': nullable_list(opens[:, column]),
+                    'h': nullable_list(highs[:, column]),
+                    'l': nullable_list(lows[:, column]),
+                    'c': nullable_list(closes[:, column])
+                }
+            info['ohlc'] = ohlc
+            
+            # Garis chart = close per bucket, label = awal bucket
+            ts = buckets
+            prices = np.nan_to_num(closes, nan=0.0).astype('int64')
+            labels = display_labels(buckets)
+        elif query.max_points is not None and len(ts) > query.max_points:
+            # Harga kosong (0) sebagai NaN agar tidak dianggap lonjakan oleh LTTB
+            values = np.where(prices == 0, np.nan, prices.astype('float64'))
+            selected = lttb_indices(ts, values, query.max_points)
+            ts, prices, labels = ts[selected], prices[selected], labels[selected]
+        
+        info['query']['points'] = len(prices)
+        return ts, prices, labels, info
     
     def filter_changed_prices(self, df):
-        """Filter data hanya ketika harga berubah - INCLUDING UBS"""
+        """Filter data hanya ketika harga berubah - INCLUDING UBS (vectorized shift/compare).
+        
+        Harga kosong == kosong (bukan perubahan); loop lama menghitung NaN != NaN sebagai perubahan,
+        sehingga setiap tick dengan harga kosong ikut ter-emit (lihat tests/test_chart_generator.py)."""
         if len(df) <= 1:
             return df
         
         df_sorted = df.sort_values(by=['Tanggal', 'Jam']).reset_index(drop=True)
-        filtered_indices = [0]  # Selalu sertakan data pertama
         
-        for i in range(1, len(df_sorted)):
-            current = df_sorted.iloc[i]
-            previous = df_sorted.iloc[i-1]
-            
-            # Cek apakah ada perubahan harga (termasuk UBS)
-            price_changed = (
-                current['GALERI24_Jual'] != previous['GALERI24_Jual'] or
-                current['GALERI24_Buyback'] != previous['GALERI24_Buyback'] or
-                current['ANTAM_Jual'] != previous['ANTAM_Jual'] or
-                current['ANTAM_Buyback'] != previous['ANTAM_Buyback'] or
-                current['UBS_Jual'] != previous['UBS_Jual'] or
-                current['UBS_Buyback'] != previous['UBS_Buyback']
-            )
-            
-            if price_changed:
-                filtered_indices.append(i)
+        # Bandingkan keenam kolom harga sekaligus dengan baris sebelumnya
+        for col in PRICE_COLUMNS:
+            if col not in df_sorted.columns:
+                df_sorted[col] = np.nan
+        changed = changed_price_mask(df_sorted[PRICE_COLUMNS].to_numpy(dtype='float64'))
         
-        # Selalu sertakan data terakhir
-        if len(df_sorted) - 1 not in filtered_indices:
-            filtered_indices.append(len(df_sorted) - 1)
+        # Selalu sertakan data pertama dan terakhir
+        changed[0] = True
+        changed[-1] = True
         
-        return df_sorted.iloc[filtered_indices].reset_index(drop=True)
+        return df_sorted[changed].reset_index(drop=True)
     
     def create_empty_chart_data(self, berat, error_message):
         """Membuat data chart kosong dengan pesan error"""
@@ -0,0 +1,57 @@
+import functools
+import gzip
+import hashlib
+import config
+
+# Content-Encoding yang didukung, urutan preferensi server (br hanya jika modul brotli terpasang)
+ENCODINGS = ('br', 'gzip')
+
+@functools.lru_cache(maxsize=None)
+def brotli_available():
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def compress(body, encoding):
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(body, quality=config.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=config.GZIP_LEVEL)
+
+def negotiate_encoding(accept_encodings):
+    """Encoding terbaik dari header Accept-Encoding (werkzeug MIMEAccept); None = kirim apa adanya"""
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        if encoding == 'br' and not (config.BROTLI_ENABLED and brotli_available()):
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class EncodedBody:
+    """Body respons yang sudah di-serialize + varian terkompresi, dibuat sekali per encoding.
+
+    Dipakai untuk payload yang di-cache (chart per versi store, shell dashboard): kompresi tidak
+    diulang setiap request. etag = hash isi yang belum dikompresi; ETag kuat yang dikirim berbeda
+    per encoding (entity_tag), karena byte gzip/br bukan representasi yang sama dengan identity."""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._encoded = {}
+
+    def entity_tag(self, encoding):
+        """ETag untuk representasi dengan Content-Encoding ini ('<sha1>-gzip', '<sha1>-br')"""
+        return self.etag if encoding is None else f'{self.etag}-{encoding}'
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
@@ -0,0 +1,100 @@
+import os
+
+# Konfigurasi aplikasi, bisa di-override lewat environment variable
+
+# Level log aplikasi: DEBUG (detail per baris/request), INFO, WARNING, ERROR
+LOG_LEVEL = os.environ.get('GOLD_LOG_LEVEL', 'INFO').upper()
+
+# Backend penyimpanan tick: 'sqlite' (append-only, default) atau 'excel' (legacy)
+STORE_BACKEND = os.environ.get('GOLD_STORE_BACKEND', 'sqlite')
+SQLITE_PATH = os.environ.get('GOLD_SQLITE_PATH', 'Harga_Emas.db')
+
+# Export history (/api/export): folder cache file per versi store, jumlah tick per chunk/row group
+EXPORT_DIR = os.environ.get('GOLD_EXPORT_DIR', 'exports')
+EXPORT_CHUNK_ROWS = int(os.environ.get('GOLD_EXPORT_CHUNK_ROWS', '5000'))
+
+# Kompresi respons (payload chart, shell dashboard): brotli dipakai jika modul brotli terpasang
+# dan client mengirim 'br' di Accept-Encoding, selain itu gzip
+BROTLI_ENABLED = os.environ.get('GOLD_BROTLI_ENABLED', '1') == '1'
+BROTLI_QUALITY = int(os.environ.get('GOLD_BROTLI_QUALITY', '5'))
+GZIP_LEVEL = int(os.environ.get('GOLD_GZIP_LEVEL', '6'))
+
+# Berat yang ditampilkan di dashboard (disimpan hanya jika semua vendor inti punya harga Jual)
+WEIGHTS = [berat.strip() for berat in os.environ.get('GOLD_WEIGHTS', '1,2').split(',') if berat.strip()]
+# Simpan juga semua berat lain di halaman (0.5 g sampai 1 kg) untuk vendor yang punya harga
+RECORD_ALL_WEIGHTS = os.environ.get('GOLD_RECORD_ALL_WEIGHTS', '1') == '1'
+
+# Scheduler scrape di background (detik)
+SCHEDULER_ENABLED = os.environ.get('GOLD_SCHEDULER_ENABLED', '1') == '1'
+SCRAPE_INTERVAL = int(os.environ.get('GOLD_SCRAPE_INTERVAL', '900'))
+SCRAPE_JITTER = int(os.environ.get('GOLD_SCRAPE_JITTER', '60'))
+OFF_HOURS_INTERVAL = int(os.environ.get('GOLD_OFF_HOURS_INTERVAL', '3600'))
+
+# Jam pasar (WIB) dan hari aktif (0 = Senin ... 6 = Minggu)
+MARKET_OPEN = os.environ.get('GOLD_MARKET_OPEN', '08:00')
+MARKET_CLOSE = os.environ.get('GOLD_MARKET_CLOSE', '18:00')
+MARKET_DAYS = [int(day) for day in os.environ.get('GOLD_MARKET_DAYS', '0,1,2,3,4,5').split(',') if day.strip()]
+
+# Multi-worker (gunicorn -w N): hanya satu proses, dipilih lewat lock file OS, yang scrape dan menulis.
+# Worker lain membaca store bersama dan memantau versinya. Jalankan tanpa --preload.
+LEADER_ELECTION = os.environ.get('GOLD_LEADER_ELECTION', '1') == '1'
+LEADER_LOCK_PATH = os.environ.get('GOLD_LEADER_LOCK_PATH', 'Harga_Emas.leader.lock')
+LEADER_TRIGGER_PATH = os.environ.get('GOLD_LEADER_TRIGGER_PATH', 'Harga_Emas.refresh')
+LEADER_RETRY_INTERVAL = float(os.environ.get('GOLD_LEADER_RETRY_INTERVAL', '10'))
+FOLLOWER_POLL_INTERVAL = float(os.environ.get('GOLD_FOLLOWER_POLL_INTERVAL', '2'))
+
+# Sumber harga (nama adapter di sources.SOURCE_ADAPTERS), di-scrape paralel dalam satu refresh
+SOURCES = [name.strip() for name in os.environ.get('GOLD_SOURCES', 'galeri24').split(',') if name.strip()]
+SOURCE_TIMEOUT = float(os.environ.get('GOLD_SOURCE_TIMEOUT', '20'))
+SOURCE_HOST_LIMIT = int(os.environ.get('GOLD_SOURCE_HOST_LIMIT', '2'))
+SOURCE_MAX_WORKERS = int(os.environ.get('GOLD_SOURCE_MAX_WORKERS', '4'))
+REFRESH_DEADLINE = float(os.environ.get('GOLD_REFRESH_DEADLINE', '30'))
+
+# Retry scrape: backoff eksponensial dalam satu deadline total, circuit breaker setelah kegagalan beruntun
+FETCH_DEADLINE = float(os.environ.get('GOLD_FETCH_DEADLINE', '60'))
+RETRY_BASE_DELAY = float(os.environ.get('GOLD_RETRY_BASE_DELAY', '1'))
+RETRY_MAX_DELAY = float(os.environ.get('GOLD_RETRY_MAX_DELAY', '8'))
+BREAKER_FAILURES = int(os.environ.get('GOLD_BREAKER_FAILURES', '3'))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('GOLD_BREAKER_RESET_TIMEOUT', '300'))
+
+# Analytics (/api/analytics): jendela moving average (jumlah tick) dan jumlah hari OHLC default
+ANALYTICS_MA_WINDOWS = [int(window) for window in os.environ.get('GOLD_ANALYTICS_MA_WINDOWS', '10,50,200').split(',')
+                        if window.strip()]
+ANALYTICS_DAYS = int(os.environ.get('GOLD_ANALYTICS_DAYS', '30'))
+
+# Alert harga (/api/alerts): rule + outbox event di SQLite terpisah, dievaluasi setiap tick di-commit.
+# Cooldown default (detik) antar alert dari rule yang sama, antrean pengiriman dan timeout webhook
+ALERTS_PATH = os.environ.get('GOLD_ALERTS_PATH', 'Harga_Emas.alerts.db')
+ALERT_COOLDOWN = int(os.environ.get('GOLD_ALERT_COOLDOWN', '3600'))
+ALERT_QUEUE_SIZE = int(os.environ.get('GOLD_ALERT_QUEUE_SIZE', '1000'))
+ALERT_WEBHOOK_TIMEOUT = float(os.environ.get('GOLD_ALERT_WEBHOOK_TIMEOUT', '5'))
+ALERT_EVENTS_KEEP = int(os.environ.get('GOLD_ALERT_EVENTS_KEEP', '10000'))
+# Prefix URL webhook yang boleh dipakai rule (scheme://host[:port][/path], dipisah koma). Kosong = webhook
+# ditolak, event hanya masuk outbox (/api/alerts/events); server tidak pernah POST ke URL sembarang
+ALERT_WEBHOOK_ALLOWLIST = [prefix.strip() for prefix in os.environ.get('GOLD_ALERT_WEBHOOK_ALLOWLIST', '').split(',')
+                           if prefix.strip()]
+
+# Job refresh dari endpoint update (202 + job id); jumlah job selesai yang disimpan untuk status
+JOB_HISTORY = int(os.environ.get('GOLD_JOB_HISTORY', '200'))
+# Job untuk berat berbeda berjalan paralel (lock per series hanya saat commit)
+JOB_WORKERS = int(os.environ.get('GOLD_JOB_WORKERS', '4'))
+
+# Engine ekstraksi harga: 'auto', 'lxml', 'strainer' atau 'soup' (parse penuh, jalur lama)
+PARSER_ENGINE = os.environ.get('GOLD_PARSER_ENGINE', 'auto')
+
+# Push tick baru via Server-Sent Events. Hub SSE berjalan di port terpisah dengan satu event loop
+# untuk semua client; /api/stream di aplikasi Flask adalah fallback (satu worker per koneksi, dibatasi)
+STREAM_HUB_ENABLED = os.environ.get('GOLD_STREAM_HUB_ENABLED', '1') == '1'
+# Hub hanya listen di loopback secara default; set GOLD_STREAM_HOST=0.0.0.0 untuk diakses langsung
+# dari jaringan (tanpa reverse proxy)
+STREAM_HOST = os.environ.get('GOLD_STREAM_HOST', '127.0.0.1')
+STREAM_PORT = int(os.environ.get('GOLD_STREAM_PORT', '5001'))
+# URL stream untuk browser jika hub ada di belakang reverse proxy (default: host yang sama, STREAM_PORT)
+STREAM_PUBLIC_URL = os.environ.get('GOLD_STREAM_PUBLIC_URL', '')
+# Origin browser yang boleh membaca stream hub (CORS), dipisah koma; '*' = semua origin.
+# Kosong = hanya origin dengan host yang sama dengan hub (dashboard di port Flask)
+STREAM_ALLOWED_ORIGINS = [origin.strip().rstrip('/') for origin in
+                          os.environ.get('GOLD_STREAM_ALLOWED_ORIGINS', '').split(',') if origin.strip()]
+STREAM_HEARTBEAT = int(os.environ.get('GOLD_STREAM_HEARTBEAT', '15'))
+STREAM_MAX_CLIENTS = int(os.environ.get('GOLD_STREAM_MAX_CLIENTS', '1000'))
+STREAM_FALLBACK_CLIENTS = int(os.environ.get('GOLD_STREAM_FALLBACK_CLIENTS', '8'))
@@ -1,144 +1,139 @@
-import pandas as pd
 import os
 import threading
 import time  # Tambahkan ini
-from utils import get_current_timestamp
-from scraper import scrape_galeri24_data
+from contextlib import ExitStack, contextmanager
+import config
+from utils import get_current_timestamp, get_logger, lazy_import
+from scraper import build_harga_emas, commit_page_state, VENDORS
+from sources import scrape_all_sources
+from history_cache import HistoryCache
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from metrics import (COMPLETENESS_SCORES, FETCH_ATTEMPTS, FILE_LOCK_WAIT_SECONDS, SAVE_OUTCOMES,
+                     STORE_APPEND_SECONDS)
+from storage import create_store, export_excel, get_excel_file, wide_row, EXCEL_FILE_1G, EXCEL_FILE_2G, SHEET_NAME
 
-# Constants
-EXCEL_FILE_1G = 'Harga_Emas_1Gram.xlsx'
-EXCEL_FILE_2G = 'Harga_Emas_2Gram.xlsx'
-SHEET_NAME = 'Data_Harian'
+logger = get_logger('data_manager')
 
-# Lock untuk mencegah race condition
-file_lock = threading.Lock()
+pd = lazy_import('pandas')
+
+# Satu breaker untuk scrape halaman harga (dipakai bersama scheduler dan job refresh)
+scrape_breaker = CircuitBreaker('scrape')
+
+class RefreshError(Exception):
+    """Refresh tidak menyimpan apa pun (scrape kosong / data tidak lengkap); job dilaporkan failed"""
+
+# Lock per series (berat): hanya dipegang saat commit ke store, bukan selama scrape.
+# Update 1g dan 2g tidak saling menunggu; pembaca tidak pernah mengambil lock ini.
+series_locks = {}
+series_locks_guard = threading.Lock()
+
+def series_lock(berat):
+    with series_locks_guard:
+        return series_locks.setdefault(berat, threading.Lock())
+
+@contextmanager
+def hold_series_locks(berat_list, operation):
+    """Ambil lock semua berat yang akan ditulis (urutan tetap agar tidak deadlock) dan catat waktu tunggunya"""
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for berat in sorted(set(berat_list)):
+            stack.enter_context(series_lock(berat))
+        FILE_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        yield
 
 class DataManager:
-    def __init__(self):
-        self.ensure_excel_structure()
+    def __init__(self, store=None):
+        # Backend penyimpanan tick (SQLite append-only atau Excel legacy)
+        self.store = store or create_store()
+        self.store.ensure_structure()
+        # Snapshot history per berat, reload hanya saat versi store berubah
+        self.history_cache = HistoryCache(self.store.read, self.store.version)
+        # Callback (berat, row) setiap kali tick baru di-commit ke store (mis. push SSE)
+        self.commit_listeners = []
     
     def get_excel_file(self, berat):
         """Get Excel file path based on weight"""
-        return EXCEL_FILE_1G if berat == '1' else EXCEL_FILE_2G
+        return get_excel_file(berat)
     
-    def ensure_excel_structure(self):
-        """Memastikan file Excel memiliki struktur kolom yang benar termasuk UBS"""
-        print("🔄 Ensuring Excel file structure...")
-        
-        for berat in ['1', '2']:
-            excel_file = self.get_excel_file(berat)
-            
-            if os.path.exists(excel_file):
-                try:
-                    # Baca file
-                    df = pd.read_excel(excel_file, sheet_name=SHEET_NAME)
-                    
-                    # Definisikan struktur kolom yang diharapkan
-                    expected_columns = {
-                        'Tanggal': 'object',
-                        'Jam': 'object', 
-                        'GALERI24_Jual': 'float64',
-                        'GALERI24_Buyback': 'float64',
-                        'ANTAM_Jual': 'float64',
-                        'ANTAM_Buyback': 'float64',
-                        'UBS_Jual': 'float64',
-                        'UBS_Buyback': 'float64'
-                    }
-                    
-                    needs_update = False
-                    
-                    # Tambahkan kolom yang missing
-                    for col, dtype in expected_columns.items():
-                        if col not in df.columns:
-                            df[col] = None
-                            needs_update = True
-                            print(f"➕ Added missing column '{col}' to {berat}g file")
-                    
-                    # Konversi tipe data
-                    for col, dtype in expected_columns.items():
-                        if col in df.columns:
-                            try:
-                                df[col] = df[col].astype(dtype)
-                            except:
-                                # Jika konversi gagal, set ke None
-                                df[col] = None
-                    
-                    if needs_update:
-                        # Simpan kembali dengan struktur yang benar
-                        df = df[list(expected_columns.keys())]
-                        df.to_excel(excel_file, index=False, sheet_name=SHEET_NAME)
-                        print(f"✅ Updated structure for {berat}g file")
-                    else:
-                        print(f"✅ Structure already correct for {berat}g file")
-                    
-                except Exception as e:
-                    print(f"❌ Error checking structure for {berat}g: {e}")
-                    # Buat file baru jika corrupt
-                    self.create_new_excel_file(berat)
-            else:
-                # Buat file baru jika tidak ada
-                self.create_new_excel_file(berat)
+    def series_exists(self, berat):
+        """Apakah storage untuk berat ini sudah ada"""
+        return self.store.exists(berat)
     
-    def create_new_excel_file(self, berat):
-        """Create new Excel file with proper structure"""
-        try:
-            expected_columns = ['Tanggal', 'Jam', 'GALERI24_Jual', 'GALERI24_Buyback', 
-                              'ANTAM_Jual', 'ANTAM_Buyback', 'UBS_Jual', 'UBS_Buyback']
-            df_new = pd.DataFrame(columns=expected_columns)
-            excel_file = self.get_excel_file(berat)
-            df_new.to_excel(excel_file, index=False, sheet_name=SHEET_NAME)
-            print(f"🆕 Created new file for {berat}g")
-        except Exception as e:
-            print(f"❌ Failed to create new file for {berat}g: {e}")
+    def export_excel(self, berat='1', excel_file=None):
+        """Export history dari store ke format Excel legacy"""
+        return export_excel(self.store, berat, excel_file)
+    
+    def notify_commit(self, berat, row):
+        """Beritahu listener bahwa tick baru sudah tersimpan"""
+        for listener in list(self.commit_listeners):
+            try:
+                listener(berat, row)
+            except Exception as e:
+                logger.error(f"❌ Commit listener failed for {berat}g: {e}")
     
-    def get_gold_data(self, berat='1'):
-        """Fungsi utama untuk mendapatkan data harga emas berdasarkan berat"""
-        print(f"=== Getting COMPLETE gold data for {berat} gram ===")
+    def fetch_price_index(self, berat_list=('1', '2'), deadline=None):
+        """Scrape semua sumber harga (retry dengan backoff dalam satu deadline) dan kembalikan
+        price index gabungan untuk semua berat. Circuit breaker menolak scrape selama sumber
+        terus gagal, sehingga request/job tidak menunggu timeout berulang."""
+        logger.info(f"=== Getting COMPLETE gold data for {', '.join(berat_list)} gram ===")
         
-        max_retries = 3
-        best_data = None
+        policy = RetryPolicy(deadline)
+        best_index = {}
         best_data_score = 0  # Score berdasarkan jumlah vendor yang berhasil
+        attempts = 0
         
-        for attempt in range(max_retries):
+        for attempt in policy.attempts():
+            if not scrape_breaker.allow():
+                logger.warning(f"🔌 Scrape skipped, circuit open (retry in {scrape_breaker.retry_in():.0f}s)")
+                break
+            attempts = attempt
             try:
-                print(f"🔄 Attempt {attempt + 1}/{max_retries} - Focus on getting UBS data")
-                harga_emas_hari_ini = scrape_galeri24_data(berat)
-                
-                # Hitung score: 3 point jika semua vendor ada
-                score = 0
-                if harga_emas_hari_ini['GALERI 24']['Jual']: score += 1
-                if harga_emas_hari_ini['ANTAM']['Jual']: score += 1
-                if harga_emas_hari_ini['UBS']['Jual']: score += 1
-                
-                print(f"📊 Data score: {score}/3 (GALERI24: {bool(harga_emas_hari_ini['GALERI 24']['Jual'])}, ANTAM: {bool(harga_emas_hari_ini['ANTAM']['Jual'])}, UBS: {bool(harga_emas_hari_ini['UBS']['Jual'])})")
-                
-                # Jika dapat data lengkap, langsung break
-                if score == 3:
-                    print(f"🎉 PERFECT! Got complete data on attempt {attempt + 1}")
-                    best_data = harga_emas_hari_ini
-                    break
-                
-                # Simpan data terbaik yang didapat
-                if score > best_data_score:
-                    best_data_score = score
-                    best_data = harga_emas_hari_ini
-                    print(f"📈 New best data with score {score}")
-                
-                # Jika belum dapat data lengkap, tunggu dan coba lagi
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 3  # Tunggu lebih lama
-                    print(f"⏳ Waiting {wait_time}s for next attempt...")
-                    time.sleep(wait_time)
-                    
+                logger.debug(f"🔄 Attempt {attempt}/{policy.max_attempts} - Focus on getting UBS data")
+                price_index = scrape_all_sources(deadline=policy.remaining())
+                scrape_breaker.record_success()
             except Exception as e:
-                print(f"❌ Attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 3
-                    print(f"⏳ Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
+                scrape_breaker.record_failure()
+                logger.error(f"❌ Attempt {attempt} failed: {e}")
+                continue
+            
+            # Hitung score per berat: satu point per vendor yang punya harga Jual, ambil yang terendah
+            score = min(self.score_harga_emas(build_harga_emas(price_index, berat))
+                        for berat in berat_list)
+            COMPLETENESS_SCORES.inc(score=score)
+            
+            logger.info(f"📊 Data score: {score}/{len(VENDORS)} for {len(berat_list)} weight(s)")
+            
+            # Jika dapat data lengkap, langsung break
+            if score == len(VENDORS):
+                logger.info(f"🎉 PERFECT! Got complete data on attempt {attempt}")
+                FETCH_ATTEMPTS.observe(attempt)
+                return price_index
+            
+            # Simpan data terbaik yang didapat
+            if score > best_data_score or not best_index:
+                best_data_score = score
+                best_index = price_index
+                logger.debug(f"📈 New best data with score {score}")
+        
+        logger.info(f"🎯 Final data score: {best_data_score}/{len(VENDORS)}")
+        FETCH_ATTEMPTS.observe(attempts)
+        return best_index
+    
+    def score_harga_emas(self, harga_emas):
+        """Jumlah vendor yang memiliki harga Jual"""
+        return sum(1 for vendor in VENDORS if harga_emas[vendor]['Jual'])
+    
+    def get_gold_data(self, berat='1', price_index=None):
+        """Fungsi utama untuk mendapatkan data harga emas berdasarkan berat.
+        
+        Jika price_index (hasil satu kali scrape) diberikan, tidak ada scrape ulang."""
+        if price_index is None:
+            price_index = self.fetch_price_index([berat])
         
-        # Gunakan data terbaik yang berhasil dikumpulkan
-        if best_data is None:
+        if price_index:
+            best_data = build_harga_emas(price_index, berat)
+        else:
+            # Gunakan data terbaik yang berhasil dikumpulkan
             best_data = {
                 'GALERI 24': {'Jual': None, 'Buyback': None, 'error': 'All attempts failed'},
                 'ANTAM': {'Jual': None, 'Buyback': None, 'error': 'All attempts failed'},
@@ -152,140 +147,224 @@ class DataManager:
         best_data['berat'] = berat
         best_data['date'] = today_date
         
-        print(f"🎯 Final data score: {best_data_score}/3")
         return today_date, current_time_str, now_wib, best_data
     
-    def update_excel_data(self, berat='1'):
-        """Mengambil data terbaru dan menyimpannya ke Excel HANYA JIKA SEMUA DATA LENGKAP"""
-        # Gunakan lock untuk mencegah race condition
-        with file_lock:
+    def update_excel_data(self, berat='1', price_index=None):
+        """Mengambil data terbaru dan menyimpannya ke store HANYA JIKA SEMUA DATA LENGKAP.
+        
+        Raise jika tidak ada yang disimpan/dikonfirmasi (scrape gagal, circuit open, data tidak
+        lengkap, error store) agar job refresh dilaporkan 'failed'; sukses return history terbaru."""
+        if price_index is None:
+            price_index = self.fetch_price_index([berat])
+        if not price_index:
+            if scrape_breaker.state == 'open':
+                raise CircuitOpenError(f"Scrape circuit is open, retry in {scrape_breaker.retry_in():.0f}s")
+            raise RefreshError(f"Tidak ada harga yang berhasil di-scrape untuk {berat}g")
+        
+        # Tabel harga sama persis dengan scrape sebelumnya: tidak ada tick baru, tick terakhir dikonfirmasi
+        if getattr(price_index, 'unchanged', False):
+            logger.info(f"🟰 Price table unchanged since last scrape, confirming last tick for {berat}g")
             try:
-                excel_file = self.get_excel_file(berat)
-                today_date, current_time_str, current_datetime, data = self.get_gold_data(berat)
-                
-                print(f"🔄 Processing data for {berat}g - {today_date} {current_time_str}")
-                
-                # Check jika data berhasil diambil - DENGAN VALIDASI KETAT
-                g24_jual = data['GALERI 24']['Jual']
-                g24_buyback = data['GALERI 24']['Buyback']
-                antam_jual = data['ANTAM']['Jual']
-                antam_buyback = data['ANTAM']['Buyback']
-                ubs_jual = data['UBS']['Jual']
-                ubs_buyback = data['UBS']['Buyback']
-                
-                print(f"📊 Data validation for {berat}g:")
-                print(f"   GALERI24: Jual={g24_jual}, Buyback={g24_buyback}")
-                print(f"   ANTAM: Jual={antam_jual}, Buyback={antam_buyback}")
-                print(f"   UBS: Jual={ubs_jual}, Buyback={ubs_buyback}")
-                
-                # ✅ KRITERIA UNTUK MENYIMPAN: SEMUA VENDOR HARUS ADA HARGA JUALNYA
-                all_vendors_have_data = all([
-                    g24_jual is not None,
-                    antam_jual is not None, 
-                    ubs_jual is not None
-                ])
-                
-                if not all_vendors_have_data:
-                    missing_vendors = []
-                    if g24_jual is None: missing_vendors.append("GALERI24")
-                    if antam_jual is None: missing_vendors.append("ANTAM")
-                    if ubs_jual is None: missing_vendors.append("UBS")
-                    
-                    print(f"🚫 SKIPPING SAVE: Data tidak lengkap. Missing: {', '.join(missing_vendors)}")
-                    
-                    # Return data lama jika ada, tanpa menyimpan data baru
-                    return self.get_existing_data(berat)
-                
-                # ✅ JIKA SEMUA DATA LENGKAP, LANJUTKAN PENYIMPANAN
-                print(f"✅ ALL DATA COMPLETE: Proceeding with save for {berat}g")
-                
-                df_old = self.get_existing_data(berat)
-                
-                print(f"💾 Saving COMPLETE data for {berat}g")
-                
-                # Buat DataFrame baru
-                df_new_series = pd.DataFrame({
-                    'Tanggal': [today_date],
-                    'Jam': [current_time_str],
-                    'GALERI24_Jual': [g24_jual],
-                    'GALERI24_Buyback': [g24_buyback],
-                    'ANTAM_Jual': [antam_jual],
-                    'ANTAM_Buyback': [antam_buyback],
-                    'UBS_Jual': [ubs_jual],
-                    'UBS_Buyback': [ubs_buyback]
-                })
-                
-                # Gabungkan dengan data lama
-                if not df_old.empty:
-                    df_combined = pd.concat([df_old, df_new_series], ignore_index=True)
-                else:
-                    df_combined = df_new_series
-                
-                # Pastikan urutan kolom
-                column_order = ['Tanggal', 'Jam', 'GALERI24_Jual', 'GALERI24_Buyback', 
-                              'ANTAM_Jual', 'ANTAM_Buyback', 'UBS_Jual', 'UBS_Buyback']
-                df_combined = df_combined[column_order]
-                
-                try:
-                    # Simpan ke Excel
-                    df_combined.to_excel(excel_file, index=False, sheet_name=SHEET_NAME)
-                    print(f"✅ Data lengkap berhasil disimpan ke {excel_file}")
-                    print(f"📈 Total rows untuk {berat}g: {len(df_combined)}")
-                    
-                    # Verifikasi data yang disimpan
-                    print(f"💾 VERIFIED SAVED DATA for {berat}g:")
-                    print(f"   GALERI 24 Jual: Rp {g24_jual:,}")
-                    print(f"   GALERI 24 Buyback: Rp {g24_buyback:,}")
-                    print(f"   ANTAM Jual: Rp {antam_jual:,}")
-                    print(f"   ANTAM Buyback: Rp {antam_buyback:,}")
-                    print(f"   UBS Jual: Rp {ubs_jual:,}")
-                    print(f"   UBS Buyback: Rp {ubs_buyback:,}")
-                    
-                except Exception as e:
-                    print(f"❌ Error menyimpan ke Excel: {e}")
-                
-                return df_combined
-                
+                _, prices = self.select_prices(price_index, [berat])
+                _, written = self.confirm_prices({key: value for key, value in prices.items() if key[1] == berat})
             except Exception as e:
-                print(f"❌ Error dalam update_excel_data untuk {berat}g: {e}")
-                # Return data lama jika ada
-                return self.get_existing_data(berat)
+                logger.error(f"❌ Error mengonfirmasi tick terakhir {berat}g: {e}")
+                SAVE_OUTCOMES.inc(berat=berat, outcome='error')
+                raise
+            SAVE_OUTCOMES.inc(berat=berat, outcome='saved' if written else 'unchanged')
+            return self.get_existing_data(berat)
+        
+        today_date, current_time_str, current_datetime, data = self.get_gold_data(berat, price_index)
+        
+        logger.debug(f"🔄 Processing data for {berat}g - {today_date} {current_time_str}")
+        
+        # Check jika data berhasil diambil - DENGAN VALIDASI KETAT
+        g24_jual = data['GALERI 24']['Jual']
+        g24_buyback = data['GALERI 24']['Buyback']
+        antam_jual = data['ANTAM']['Jual']
+        antam_buyback = data['ANTAM']['Buyback']
+        ubs_jual = data['UBS']['Jual']
+        ubs_buyback = data['UBS']['Buyback']
+        
+        logger.debug(f"📊 Data validation for {berat}g:")
+        logger.debug(f"   GALERI24: Jual={g24_jual}, Buyback={g24_buyback}")
+        logger.debug(f"   ANTAM: Jual={antam_jual}, Buyback={antam_buyback}")
+        logger.debug(f"   UBS: Jual={ubs_jual}, Buyback={ubs_buyback}")
+        
+        # ✅ KRITERIA UNTUK MENYIMPAN: SEMUA VENDOR HARUS ADA HARGA JUALNYA
+        all_vendors_have_data = all([
+            g24_jual is not None,
+            antam_jual is not None, 
+            ubs_jual is not None
+        ])
+        
+        if not all_vendors_have_data:
+            missing_vendors = []
+            if g24_jual is None: missing_vendors.append("GALERI24")
+            if antam_jual is None: missing_vendors.append("ANTAM")
+            if ubs_jual is None: missing_vendors.append("UBS")
+            
+            logger.warning(f"🚫 SKIPPING SAVE: Data tidak lengkap. Missing: {', '.join(missing_vendors)}")
+            SAVE_OUTCOMES.inc(berat=berat, outcome='skipped')
+            
+            # Data lama tetap utuh, tapi job harus tahu bahwa tidak ada yang disimpan
+            raise RefreshError(f"Data {berat}g tidak lengkap, tidak disimpan. Missing: {', '.join(missing_vendors)}")
+        
+        # ✅ JIKA SEMUA DATA LENGKAP, LANJUTKAN PENYIMPANAN
+        logger.debug(f"💾 Saving COMPLETE data for {berat}g")
+        
+        # Append satu tick ke store (O(1), tanpa menulis ulang history)
+        row = {
+            'Tanggal': today_date,
+            'Jam': current_time_str,
+            'GALERI24_Jual': g24_jual,
+            'GALERI24_Buyback': g24_buyback,
+            'ANTAM_Jual': antam_jual,
+            'ANTAM_Buyback': antam_buyback,
+            'UBS_Jual': ubs_jual,
+            'UBS_Buyback': ubs_buyback
+        }
+        try:
+            # Lock series hanya di sekitar commit; scrape & validasi di atas berjalan tanpa lock
+            with hold_series_locks([berat], 'update'), \
+                    STORE_APPEND_SECONDS.time(backend=self.store.name, method='append'):
+                written = self.store.append(berat, row)
+        except Exception as e:
+            logger.error(f"❌ Error menyimpan ke store: {e}")
+            SAVE_OUTCOMES.inc(berat=berat, outcome='error')
+            raise
+        
+        if not written:
+            # Harga sama dengan tick terakhir: hanya dikonfirmasi (last_seen), tidak ada tick baru
+            logger.info(f"🟰 Prices unchanged for {berat}g, confirmed last tick")
+            SAVE_OUTCOMES.inc(berat=berat, outcome='confirmed')
+            return self.get_existing_data(berat)
+        SAVE_OUTCOMES.inc(berat=berat, outcome='saved')
+        logger.info(f"✅ Data lengkap berhasil disimpan ke {self.store.name} store")
+        self.notify_commit(berat, row)
+        
+        # Verifikasi data yang disimpan
+        logger.debug(f"💾 VERIFIED SAVED DATA for {berat}g:")
+        logger.debug(f"   GALERI 24 Jual: Rp {g24_jual:,}")
+        logger.debug(f"   GALERI 24 Buyback: Rp {g24_buyback:,}")
+        logger.debug(f"   ANTAM Jual: Rp {antam_jual:,}")
+        logger.debug(f"   ANTAM Buyback: Rp {antam_buyback:,}")
+        logger.debug(f"   UBS Jual: Rp {ubs_jual:,}")
+        logger.debug(f"   UBS Buyback: Rp {ubs_buyback:,}")
+        
+        # Return history terbaru (snapshot, dibaca tanpa lock)
+        return self.get_existing_data(berat)
     
-    def get_existing_data(self, berat='1'):
-        """Hanya mengambil data existing dari Excel tanpa scraping baru"""
-        excel_file = self.get_excel_file(berat)
+    def save_price_index(self, price_index, berat_list=None):
+        """Simpan SATU siklus scrape sebagai satu batch untuk semua vendor x berat di halaman.
         
-        if not os.path.exists(excel_file):
-            return pd.DataFrame()
+        Berat dashboard (berat_list) tetap hanya disimpan jika semua vendor inti punya harga Jual;
+        berat lain disimpan per vendor yang punya harga (jika config.RECORD_ALL_WEIGHTS).
+        Return hasil per berat dashboard: 'saved', 'confirmed' (harga sama dengan tick terakhir),
+        'unchanged' atau 'skipped'."""
+        berat_list = list(berat_list or config.WEIGHTS)
+        complete, prices = self.select_prices(price_index, berat_list)
         
+        if getattr(price_index, 'unchanged', False):
+            # Tidak ada tick baru; tick terakhir setiap series dikonfirmasi (last_seen/seen)
+            logger.info("🟰 Price table unchanged since last scrape, confirming last ticks")
+            _, written = self.confirm_prices(prices)
+            results = {berat: 'saved' if berat in written else 'unchanged' for berat in berat_list}
+            for berat, outcome in results.items():
+                SAVE_OUTCOMES.inc(berat=berat, outcome=outcome)
+            return results
+        
+        written = []
+        if prices:
+            today_date, current_time_str, now_wib = get_current_timestamp()
+            with hold_series_locks([berat for _, berat in prices], 'save_batch'), \
+                    STORE_APPEND_SECONDS.time(backend=self.store.name, method='append_prices'):
+                written = self.store.append_prices(int(now_wib.timestamp()), prices, today_date, current_time_str)
+            logger.info(f"💾 Saved {len(prices)} series in one batch ({len(written)} weights) to {self.store.name} store")
+            self.notify_prices(written, prices, today_date, current_time_str)
+        
+        results = {berat: 'saved' if berat in written else 'confirmed' if complete[berat] else 'skipped'
+                   for berat in berat_list}
+        for berat, outcome in results.items():
+            SAVE_OUTCOMES.inc(berat=berat, outcome=outcome)
+        # Semua series dari scrape ini sudah tersimpan: baru sekarang halaman boleh dianggap unchanged
+        commit_page_state(price_index)
+        return results
+    
+    def select_prices(self, price_index, berat_list):
+        """Harga yang boleh disimpan dari satu scrape: berat dashboard hanya jika semua vendor inti punya
+        harga Jual, berat lain per vendor (jika config.RECORD_ALL_WEIGHTS). Return (complete, prices)."""
+        complete = {}
+        for berat in berat_list:
+            harga_emas = build_harga_emas(price_index, berat)
+            complete[berat] = self.score_harga_emas(harga_emas) == len(VENDORS)
+            if not complete[berat]:
+                missing = [vendor for vendor in VENDORS if harga_emas[vendor]['Jual'] is None]
+                logger.warning(f"🚫 SKIPPING SAVE for {berat}g: Data tidak lengkap. Missing: {', '.join(missing)}")
+        
+        prices = {}
+        for (vendor, berat), value in price_index.items():
+            if berat in complete:
+                if complete[berat]:
+                    prices[(vendor, berat)] = value
+            elif config.RECORD_ALL_WEIGHTS:
+                prices[(vendor, berat)] = value
+        return complete, prices
+    
+    def confirm_prices(self, prices):
+        """Perpanjang tick terakhir (last_seen, seen + 1) setiap series yang harganya masih sama.
+        
+        Series yang ternyata berbeda dari tick terakhirnya (tabel halaman sama, tetapi harganya belum
+        pernah tersimpan) ditulis sebagai tick baru. Return (berat dikonfirmasi, berat ditulis)."""
+        if not prices:
+            return [], []
+        today_date, current_time_str, now_wib = get_current_timestamp()
+        tick_ts = int(now_wib.timestamp())
+        written = []
+        with hold_series_locks([berat for _, berat in prices], 'confirm'):
+            with STORE_APPEND_SECONDS.time(backend=self.store.name, method='confirm_prices'):
+                confirmed, changed = self.store.confirm_prices(tick_ts, prices)
+            if changed:
+                with STORE_APPEND_SECONDS.time(backend=self.store.name, method='append_prices'):
+                    written = self.store.append_prices(tick_ts, changed, today_date, current_time_str)
+        logger.debug(f"🟰 Confirmed last tick for {len(confirmed)} weight(s), wrote {len(written)} changed")
+        self.notify_prices(written, changed, today_date, current_time_str)
+        return confirmed, written
+    
+    def notify_prices(self, written, prices, tanggal, jam):
+        """notify_commit untuk setiap berat yang ditulis dari batch {(vendor, berat): harga}"""
+        for berat in written:
+            vendor_prices = {vendor: value for (vendor, key), value in prices.items() if key == berat}
+            self.notify_commit(berat, wide_row(tanggal, jam, vendor_prices))
+    
+    def get_existing_data(self, berat='1'):
+        """Hanya mengambil data existing dari store tanpa scraping baru (snapshot read-only dari cache)"""
         try:
-            df = pd.read_excel(excel_file, sheet_name=SHEET_NAME, dtype={'Tanggal': str, 'Jam': str})
-            print(f"📁 Using existing data with {len(df)} rows for {berat}g")
+            df = self.history_cache.get(berat)
+            logger.debug(f"📁 Using existing data with {len(df)} rows for {berat}g")
             return df
         except Exception as e:
-            print(f"❌ Error reading existing data: {e}")
+            logger.error(f"❌ Error reading existing data: {e}")
             return pd.DataFrame()
     
-    def force_update_data(self, berat='1'):
+    def force_update_data(self, berat='1', price_index=None):
         """Force update data tanpa pengecekan kelengkapan"""
-        excel_file = self.get_excel_file(berat)
-        today_date, current_time_str, current_datetime, data = self.get_gold_data(berat)
-        
-        df_old = self.get_existing_data(berat)
-        
-        df_new_series = pd.DataFrame({
-            'Tanggal': [today_date],
-            'Jam': [current_time_str],
-            'GALERI24_Jual': [data['GALERI 24']['Jual']],
-            'GALERI24_Buyback': [data['GALERI 24']['Buyback']],
-            'ANTAM_Jual': [data['ANTAM']['Jual']],
-            'ANTAM_Buyback': [data['ANTAM']['Buyback']],
-            'UBS_Jual': [data['UBS']['Jual']],
-            'UBS_Buyback': [data['UBS']['Buyback']]
-        })
+        today_date, current_time_str, current_datetime, data = self.get_gold_data(berat, price_index)
         
-        df_combined = pd.concat([df_old, df_new_series], ignore_index=True)
-        df_combined.to_excel(excel_file, index=False, sheet_name=SHEET_NAME)
+        row = {
+            'Tanggal': today_date,
+            'Jam': current_time_str,
+            'GALERI24_Jual': data['GALERI 24']['Jual'],
+            'GALERI24_Buyback': data['GALERI 24']['Buyback'],
+            'ANTAM_Jual': data['ANTAM']['Jual'],
+            'ANTAM_Buyback': data['ANTAM']['Buyback'],
+            'UBS_Jual': data['UBS']['Jual'],
+            'UBS_Buyback': data['UBS']['Buyback']
+        }
+        with hold_series_locks([berat], 'force_update'), STORE_APPEND_SECONDS.time(backend=self.store.name, method='append'):
+            written = self.store.append(berat, row)
+        if written:
+            self.notify_commit(berat, row)
         
-        print(f"✅ Force updated data for {berat}g")
-        return df_combined
\ No newline at end of file
+        logger.info(f"✅ Force updated data for {berat}g")
+        return self.get_existing_data(berat)
@@ -0,0 +1,87 @@
+from utils import lazy_import
+
+np = lazy_import('numpy')
+
+# Resolusi bucket OHLC yang didukung (detik)
+RESOLUTIONS = {
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '4h': 4 * 60 * 60,
+    '1d': 24 * 60 * 60,
+    '1w': 7 * 24 * 60 * 60
+}
+
+# Epoch 0 jatuh pada hari Kamis; bucket mingguan digeser 4 hari agar mulai hari Senin
+WEEK_START_OFFSET = 4 * 24 * 60 * 60
+
+def bucket_offset(resolution, tz_offset=0):
+    """Offset batas bucket untuk resolusi tertentu (zona waktu lokal + awal minggu)"""
+    return tz_offset - (WEEK_START_OFFSET if resolution == '1w' else 0)
+
+def lttb_indices(x, ys, max_points):
+    """Largest-Triangle-Three-Buckets untuk beberapa series sekaligus.
+
+    x: array waktu (n,), ys: array harga (n, k). Luas segitiga dijumlahkan antar series
+    (setelah dinormalisasi ke rentang masing-masing), jadi semua series berbagi index yang sama
+    dan label tanggal tetap satu array. Return index terurut, selalu termasuk titik pertama dan terakhir."""
+    n = len(x)
+    if max_points is None or max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    ys = np.asarray(ys, dtype='float64').reshape(n, -1)
+
+    # Normalisasi per series; NaN diganti nilai tengah agar tidak membuat lonjakan palsu
+    low = np.nanmin(ys, axis=0)
+    span = np.nanmax(ys, axis=0) - low
+    span[~np.isfinite(span) | (span == 0)] = 1.0
+    ys = (ys - np.nan_to_num(low)) / span
+    ys = np.where(np.isnan(ys), 0.5, ys)
+
+    every = (n - 2) / (max_points - 2)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Titik rata-rata bucket berikutnya (atau titik terakhir)
+        if end < next_end:
+            avg_x = x[end:next_end].mean()
+            avg_y = ys[end:next_end].mean(axis=0)
+        else:
+            avg_x = x[n - 1]
+            avg_y = ys[n - 1]
+
+        area = np.abs((x[a] - avg_x) * (ys[start:end] - ys[a]) -
+                      (x[a] - x[start:end])[:, None] * (avg_y - ys[a])).sum(axis=1)
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    selected[-1] = n - 1
+    return selected
+
+def ohlc_buckets(ts, values, interval, offset=0):
+    """Bucket OHLC per interval detik untuk setiap kolom values.
+
+    ts: epoch detik terurut (n,), values: (n, k). offset menggeser batas bucket (mis. +7 jam agar
+    bucket harian mulai tengah malam WIB). Return (bucket_start (m,), open, high, low, close (m, k));
+    NaN diabaikan untuk high/low."""
+    ts = np.asarray(ts, dtype='int64')
+    values = np.asarray(values, dtype='float64')
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if len(ts) == 0:
+        empty = np.empty((0, values.shape[1]))
+        return np.empty(0, dtype='int64'), empty, empty, empty, empty
+
+    bucket = (ts + offset) // interval
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    high = np.fmax.reduceat(values, starts, axis=0)
+    low = np.fmin.reduceat(values, starts, axis=0)
+    return bucket[starts] * interval - offset, values[starts], high, low, values[ends]
@@ -0,0 +1,371 @@
+import json
+import selectors
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from urllib.parse import parse_qs, urlsplit
+import config
+from utils import get_logger
+
+logger = get_logger('event_stream')
+
+STREAM_PATH = '/api/stream'
+HEARTBEAT = b': ping\n\n'
+RETRY_MS = 5000
+
+# Batas request header dan buffer keluar per client (client lambat diputus, bukan ditunggu)
+MAX_REQUEST_BYTES = 8192
+MAX_CLIENT_BUFFER = 256 * 1024
+
+# Host bind yang hanya bisa dihubungi dari mesin yang sama
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+StreamEvent = namedtuple('StreamEvent', ['id', 'type', 'message'])
+
+def format_sse(event_id, event_type, data):
+    """Serialisasi satu event SSE (data JSON satu baris)"""
+    body = json.dumps(data, separators=(',', ':'), default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {body}\n\n".encode('utf-8')
+
+def parse_last_event_id(value):
+    """Last-Event-ID dari header/query; None jika kosong atau tidak valid"""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class TickEventBroker:
+    """Ring buffer event tick dengan id naik monoton untuk resume via Last-Event-ID.
+
+    Id berbasis waktu (ms) sehingga tetap naik setelah restart; client dengan id lebih lama
+    dari event tertua yang masih disimpan (atau dari sebelum proses ini start) diberi 'resync'."""
+
+    def __init__(self, buffer_size=256):
+        self._events = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._listeners = []
+        self.last_id = int(time.time() * 1000)
+        # Event dengan id <= floor mungkin sudah tidak ada di buffer
+        self.floor = self.last_id
+
+    def add_listener(self, listener):
+        """listener() dipanggil setelah setiap publish (di thread publisher)"""
+        self._listeners.append(listener)
+
+    def publish(self, event_type, data):
+        with self._condition:
+            event_id = max(self.last_id + 1, int(time.time() * 1000))
+            if len(self._events) == self._events.maxlen:
+                self.floor = self._events[0].id
+            self._events.append(StreamEvent(event_id, event_type, format_sse(event_id, event_type, data)))
+            self.last_id = event_id
+            self._condition.notify_all()
+
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"❌ Stream listener failed: {e}")
+        return event_id
+
+    def events_since(self, last_id, upto=None):
+        """Return (events setelah last_id sampai upto, perlu_resync)"""
+        with self._condition:
+            upto = self.last_id if upto is None else upto
+            if last_id is None:
+                return [], False
+            if last_id < self.floor or last_id > self.last_id:
+                return [], True
+            return [event for event in self._events if last_id < event.id <= upto], False
+
+    def wait(self, last_id, timeout):
+        """Tunggu sampai ada event setelah last_id (atau timeout)"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.last_id > last_id, timeout)
+
+    def handshake(self, last_id, upto=None):
+        """Bytes awal stream: retry, lalu replay event yang terlewat atau 'resync'"""
+        events, resync = self.events_since(last_id, upto)
+        chunks = [f"retry: {RETRY_MS}\n\n".encode('ascii')]
+        if resync:
+            chunks.append(format_sse(self.last_id if upto is None else upto, 'resync', {}))
+        chunks.extend(event.message for event in events)
+        return b''.join(chunks)
+
+    def iter_stream(self, last_id, heartbeat=None):
+        """Generator SSE untuk response WSGI biasa (satu worker per koneksi, dipakai sebagai fallback)"""
+        heartbeat = heartbeat or config.STREAM_HEARTBEAT
+        cursor = self.last_id
+        yield self.handshake(last_id, cursor)
+        while True:
+            if self.wait(cursor, heartbeat):
+                events, resync = self.events_since(cursor)
+                if resync:
+                    # Client terlalu lambat, buffer sudah berputar
+                    yield format_sse(self.last_id, 'resync', {})
+                    cursor = self.last_id
+                    continue
+                for event in events:
+                    yield event.message
+                    cursor = event.id
+            else:
+                yield HEARTBEAT
+
+class StreamClient:
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.inbuf = b''
+        self.outbuf = bytearray()
+        self.streaming = False
+        self.closing = False
+        self.cors = b''
+
+class StreamHub:
+    """Server SSE satu thread (selectors): semua koneksi idle dilayani satu event loop,
+    bukan satu worker/thread per client. Event datang dari TickEventBroker."""
+
+    def __init__(self, broker, host=None, port=None, heartbeat=None, max_clients=None, allowed_origins=None):
+        self.broker = broker
+        self.host = host if host is not None else config.STREAM_HOST
+        self.allowed_origins = allowed_origins if allowed_origins is not None else config.STREAM_ALLOWED_ORIGINS
+        self.port = port if port is not None else config.STREAM_PORT
+        self.heartbeat = heartbeat or config.STREAM_HEARTBEAT
+        self.max_clients = max_clients or config.STREAM_MAX_CLIENTS
+
+        self._selector = None
+        self._server = None
+        self._wake_r = self._wake_w = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._clients = {}
+        self._cursor = None
+        self.dropped = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Bind port dan mulai event loop; return False jika port tidak bisa dipakai"""
+        if self.running:
+            return True
+        try:
+            server = socket.create_server((self.host, self.port), reuse_port=False, backlog=128)
+        except OSError as e:
+            logger.warning(f"⚠️ Stream hub disabled, cannot bind {self.host}:{self.port}: {e}")
+            return False
+        server.setblocking(False)
+        if self.port == 0:
+            self.port = server.getsockname()[1]
+
+        self._server = server
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(server, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._cursor = self.broker.last_id
+        self.broker.add_listener(self.wake)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='stream-hub', daemon=True)
+        self._thread.start()
+        logger.info(f"📡 Stream hub listening on {self.host}:{self.port}{STREAM_PATH}")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (AttributeError, BlockingIOError, OSError):
+            pass
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'port': self.port,
+            'clients': sum(1 for client in list(self._clients.values()) if client.streaming),
+            'dropped': self.dropped,
+            'last_event_id': self.broker.last_id
+        }
+
+    def _loop(self):
+        next_heartbeat = time.monotonic() + self.heartbeat
+        try:
+            while not self._stop.is_set():
+                for key, mask in self._selector.select(max(0.0, next_heartbeat - time.monotonic())):
+                    if key.fileobj is self._server:
+                        self._accept()
+                    elif key.fileobj is self._wake_r:
+                        self._drain_wake()
+                        self._broadcast_new()
+                    else:
+                        client = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._read(client)
+                        if mask & selectors.EVENT_WRITE and client.sock.fileno() != -1:
+                            self._flush(client)
+
+                if time.monotonic() >= next_heartbeat:
+                    self._broadcast(HEARTBEAT)
+                    next_heartbeat = time.monotonic() + self.heartbeat
+        finally:
+            for client in list(self._clients.values()):
+                self._close(client)
+            self._selector.close()
+            self._server.close()
+            self._wake_r.close()
+            self._wake_w.close()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self._server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            client = StreamClient(sock, address)
+            self._clients[sock.fileno()] = client
+            self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(client)
+            return
+        if client.streaming:
+            return  # Setelah handshake, data dari client diabaikan
+
+        client.inbuf += data
+        if b'\r\n\r\n' not in client.inbuf:
+            if len(client.inbuf) > MAX_REQUEST_BYTES:
+                self._reject(client, '431 Request Header Fields Too Large')
+            return
+        self._handshake(client)
+
+    def _handshake(self, client):
+        head = client.inbuf.split(b'\r\n\r\n', 1)[0].decode('latin-1')
+        lines = head.split('\r\n')
+        parts = lines[0].split(' ')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        client.cors = self._cors_headers(headers)
+
+        if len(parts) != 3 or parts[0] != 'GET':
+            self._reject(client, '405 Method Not Allowed')
+            return
+        url = urlsplit(parts[1])
+        if url.path != STREAM_PATH:
+            self._reject(client, '404 Not Found')
+            return
+        if sum(1 for other in self._clients.values() if other.streaming) >= self.max_clients:
+            self._reject(client, '503 Service Unavailable')
+            return
+
+        last_id = parse_last_event_id(headers.get('last-event-id') or
+                                      parse_qs(url.query).get('lastEventId', [None])[0])
+
+        client.streaming = True
+        client.inbuf = b''
+        self._send(client, b'HTTP/1.1 200 OK\r\n'
+                           b'Content-Type: text/event-stream\r\n'
+                           b'Cache-Control: no-cache\r\n'
+                           b'Connection: keep-alive\r\n' + client.cors +
+                           b'X-Accel-Buffering: no\r\n\r\n' +
+                   self.broker.handshake(last_id, self._cursor))
+
+    def _reject(self, client, status):
+        client.closing = True
+        self._send(client, f'HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n'.encode('latin-1') +
+                   client.cors + b'\r\n')
+
+    def _cors_headers(self, headers):
+        """Header CORS untuk Origin request: origin dikembalikan hanya jika diizinkan
+        (config.STREAM_ALLOWED_ORIGINS, default host yang sama dengan hub di port lain)"""
+        origin = headers.get('origin')
+        if not origin:
+            return b''
+        if '*' in self.allowed_origins:
+            return b'Access-Control-Allow-Origin: *\r\n'
+        if self.allowed_origins:
+            allowed = origin.rstrip('/') in self.allowed_origins
+        else:
+            host = urlsplit(f"//{headers.get('host', '')}").hostname
+            allowed = host is not None and urlsplit(origin).hostname == host
+        if not allowed:
+            return b'Vary: Origin\r\n'
+        return f'Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n'.encode('latin-1')
+
+    def _broadcast_new(self):
+        events, resync = self.broker.events_since(self._cursor)
+        if resync:
+            payload = format_sse(self.broker.last_id, 'resync', {})
+        else:
+            payload = b''.join(event.message for event in events)
+        self._cursor = self.broker.last_id if resync or not events else events[-1].id
+        if payload:
+            self._broadcast(payload)
+
+    def _broadcast(self, payload):
+        for client in list(self._clients.values()):
+            if client.streaming and not client.closing:
+                self._send(client, payload)
+
+    def _send(self, client, payload):
+        client.outbuf += payload
+        if len(client.outbuf) > MAX_CLIENT_BUFFER:
+            # Client tidak membaca: putuskan, browser akan reconnect dengan Last-Event-ID
+            self.dropped += 1
+            self._close(client)
+            return
+        self._flush(client)
+
+    def _flush(self, client):
+        try:
+            while client.outbuf:
+                sent = client.sock.send(client.outbuf)
+                del client.outbuf[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._close(client)
+            return
+
+        if not client.outbuf and client.closing:
+            self._close(client)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outbuf else 0)
+        self._selector.modify(client.sock, events, client)
+
+    def _close(self, client):
+        fileno = client.sock.fileno()
+        if fileno == -1:
+            return
+        self._clients.pop(fileno, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
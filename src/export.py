@@ -0,0 +1,163 @@
+import glob
+import hashlib
+import os
+import tempfile
+import config
+from storage import COLUMNS, PRICE_COLUMNS, write_excel_chunks
+from utils import get_logger, lazy_import
+from metrics import EXPORTS
+
+logger = get_logger('export')
+
+np = lazy_import('numpy')
+
+# Format export -> (mimetype, ekstensi file)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx')
+}
+FORMAT_ALIASES = {'excel': 'xlsx'}
+
+def pyarrow_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def export_format(name):
+    """Nama format dari query string ('excel' = 'xlsx'); ValueError jika tidak dikenal"""
+    name = FORMAT_ALIASES.get((name or 'csv').lower(), (name or 'csv').lower())
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{name}', expected one of {', '.join(EXPORT_FORMATS)}")
+    return name
+
+def export_filename(berat, fmt, start=None, end=None):
+    """Nama file download, mis. harga_emas_1g_1704067200-1706745599.csv"""
+    span = f"_{start or 'awal'}-{end or 'akhir'}" if start is not None or end is not None else ''
+    return f'harga_emas_{berat}g{span}.{EXPORT_FORMATS[fmt][1]}'
+
+def csv_chunk(df):
+    """Chunk history wide -> bytes CSV (tanpa header); harga kosong = field kosong"""
+    values = df.reindex(columns=COLUMNS)
+    return values.to_csv(header=False, index=False, float_format='%.0f', lineterminator='\n').encode('utf-8')
+
+class HistoryExporter:
+    """Export history satu berat dari store, chunk demi chunk (store.iter_read), ke CSV/Parquet/Excel.
+
+    File hasil di-cache di disk per (berat, range, format, versi store): download ulang range yang
+    tidak berubah langsung dikirim dari file. CSV di-stream ke client sambil ditulis ke cache;
+    Parquet (row group per chunk) dan Excel (openpyxl write-only) ditulis ke file dulu. Versi pada
+    nama file diambil dari snapshot yang sama dengan chunk (store.iter_snapshot), bukan dibaca terpisah."""
+
+    def __init__(self, store, cache_dir=None, chunk_rows=None):
+        self.store = store
+        self.cache_dir = cache_dir or config.EXPORT_DIR
+        self.chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+
+    def cache_prefix(self, berat, fmt, start, end):
+        key = hashlib.sha1(f'{berat}|{start}|{end}|{fmt}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{key}_')
+
+    def cache_path(self, berat, fmt, start, end, version=None):
+        if version is None:
+            version = self.store.version(berat)
+        if isinstance(version, tuple):
+            version = '-'.join(str(part) for part in version)
+        return f'{self.cache_prefix(berat, fmt, start, end)}v{version}.{EXPORT_FORMATS[fmt][1]}'
+
+    def snapshot(self, berat, start, end):
+        """(versi, chunk) dibaca dari satu snapshot store"""
+        return self.store.iter_snapshot(berat, start, end, self.chunk_rows)
+
+    def _commit(self, tmp_path, path, berat, fmt, start, end):
+        """Pindahkan file sementara ke cache dan hapus file versi lama untuk range yang sama"""
+        os.replace(tmp_path, path)
+        for stale in glob.glob(f'{self.cache_prefix(berat, fmt, start, end)}v*'):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def _tmp_file(self, fmt):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix=f'.{EXPORT_FORMATS[fmt][1]}', dir=self.cache_dir)
+        os.close(handle)
+        return tmp_path
+
+    def export(self, berat, fmt, start=None, end=None):
+        """Return ('file', path) jika file cache siap dikirim, atau ('stream', generator bytes) untuk CSV baru"""
+        path = self.cache_path(berat, fmt, start, end)
+        if os.path.exists(path):
+            EXPORTS.inc(format=fmt, cache='hit')
+            return 'file', path
+
+        EXPORTS.inc(format=fmt, cache='miss')
+        if fmt == 'csv':
+            return 'stream', self.stream_csv(berat, start, end)
+
+        tmp_path = self._tmp_file(fmt)
+        try:
+            version, chunks = self.snapshot(berat, start, end)
+            if fmt == 'parquet':
+                total = self.write_parquet(chunks, tmp_path)
+            else:
+                total = write_excel_chunks(chunks, tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        path = self.cache_path(berat, fmt, start, end, version)
+        self._commit(tmp_path, path, berat, fmt, start, end)
+        logger.info(f"📤 Exported {total} rows for {berat}g as {fmt}")
+        return 'file', path
+
+    def stream_csv(self, berat, start, end):
+        """Generator chunk CSV; isi yang sama ditulis ke cache (nama file dari versi snapshot) dan baru
+        dipakai jika stream selesai"""
+        tmp_path = self._tmp_file('csv')
+        completed = False
+        try:
+            version, chunks = self.snapshot(berat, start, end)
+            path = self.cache_path(berat, 'csv', start, end, version)
+            with open(tmp_path, 'wb') as cache_file:
+                header = (','.join(COLUMNS) + '\n').encode('utf-8')
+                cache_file.write(header)
+                yield header
+                total = 0
+                for chunk in chunks:
+                    data = csv_chunk(chunk)
+                    cache_file.write(data)
+                    total += len(chunk)
+                    yield data
+            completed = True
+        finally:
+            # Client putus di tengah stream: file parsial tidak masuk cache
+            if completed:
+                self._commit(tmp_path, path, berat, 'csv', start, end)
+                logger.info(f"📤 Streamed {total} rows for {berat}g as csv")
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def write_parquet(self, chunks, path):
+        """Satu row group per chunk (pyarrow ParquetWriter); harga int64 nullable"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([('Tanggal', pa.string()), ('Jam', pa.string())] +
+                           [(col, pa.int64()) for col in PRICE_COLUMNS])
+        total = 0
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for chunk in chunks:
+                chunk = chunk.reindex(columns=COLUMNS)
+                arrays = [pa.array(chunk['Tanggal'].astype(str).tolist(), pa.string()),
+                          pa.array(chunk['Jam'].astype(str).tolist(), pa.string())]
+                for col in PRICE_COLUMNS:
+                    values = chunk[col].to_numpy(dtype='float64')
+                    missing = np.isnan(values)
+                    arrays.append(pa.array(np.where(missing, 0, values).astype('int64'), pa.int64(), mask=missing))
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                total += len(chunk)
+        return total
@@ -0,0 +1,60 @@
+import threading
+
+class HistoryCache:
+    """Cache in-memory history per berat, di-invalidate oleh versi store (counter atau mtime/size file).
+
+    Snapshot disimpan sebagai tuple (version, df) yang tidak pernah diubah, jadi pembaca
+    cukup mengambil referensi tanpa lock. DataFrame snapshot harus diperlakukan read-only.
+
+    Versi dibaca SEBELUM load: commit yang terjadi di tengah load hanya membuat get berikutnya
+    reload lagi, tidak pernah menyimpan snapshot basi dengan versi baru."""
+
+    def __init__(self, loader, version_fn):
+        self.loader = loader
+        self.version_fn = version_fn
+        self._snapshots = {}
+        self._load_locks = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_lock(self, berat):
+        with self._locks_guard:
+            return self._load_locks.setdefault(berat, threading.Lock())
+
+    def get(self, berat):
+        """Ambil snapshot history; reload hanya jika versi store berubah"""
+        version = self.version_fn(berat)
+        snapshot = self._snapshots.get(berat)
+        if snapshot is not None and snapshot[0] == version:
+            self.hits += 1
+            return snapshot[1]
+
+        # Hanya satu thread yang reload per berat, yang lain menunggu hasilnya
+        with self._load_lock(berat):
+            version = self.version_fn(berat)
+            snapshot = self._snapshots.get(berat)
+            if snapshot is not None and snapshot[0] == version:
+                self.hits += 1
+                return snapshot[1]
+
+            self.misses += 1
+            df = self.loader(berat)
+            self._snapshots[berat] = (version, df)
+            return df
+
+    def invalidate(self, berat=None):
+        if berat is None:
+            self._snapshots = {}
+        else:
+            self._snapshots.pop(berat, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+            'versions': {berat: snapshot[0] for berat, snapshot in self._snapshots.items()},
+            'rows': {berat: len(snapshot[1]) for berat, snapshot in self._snapshots.items()}
+        }
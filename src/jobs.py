@@ -0,0 +1,109 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import config
+from utils import get_logger
+
+logger = get_logger('jobs')
+
+class RefreshJob:
+    """Satu permintaan refresh (scrape + simpan) yang dijalankan di background"""
+
+    def __init__(self, kind, berat, fn):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.berat = berat
+        self.fn = fn
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        # Jumlah request yang digabung ke job ini (single-flight)
+        self.requests = 1
+
+    @property
+    def key(self):
+        return (self.kind, self.berat)
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'berat': self.berat,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'duration': round(self.finished - self.started, 3) if self.finished and self.started else None,
+            'requests': self.requests,
+            'result': self.result,
+            'error': self.error
+        }
+
+class RefreshJobQueue:
+    """Antrian job refresh dengan single-flight: request untuk (kind, berat) yang sama selama
+    job masih queued/running mendapat job yang sama, jadi klik refresh bersamaan = satu scrape.
+
+    Job yang berbeda berjalan paralel (scrape di luar lock, commit memakai lock per series);
+    job yang sudah selesai disimpan terbatas untuk endpoint status."""
+
+    def __init__(self, max_workers=None, history=None):
+        self._executor = ThreadPoolExecutor(max_workers or config.JOB_WORKERS, thread_name_prefix='refresh-job')
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._jobs = OrderedDict()
+        self.history = history or config.JOB_HISTORY
+
+    def submit(self, kind, berat, fn):
+        """Return (job, created); created False jika digabung ke job yang sedang berjalan"""
+        with self._lock:
+            job = self._inflight.get((kind, berat))
+            if job is not None:
+                job.requests += 1
+                return job, False
+
+            job = RefreshJob(kind, berat, fn)
+            self._inflight[job.key] = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.done:
+                    break
+                del self._jobs[oldest_id]
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            job.result = job.fn()
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"❌ Refresh job {job.kind}:{job.berat} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'inflight': [job.to_dict() for job in jobs if not job.done],
+            'recent': [job.to_dict() for job in jobs[-10:] if job.done]
+        }
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+import config
+from utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger('leader')
+
+class LeaderLock:
+    """Lock file OS (flock) non-blocking: hanya satu proses yang memegangnya.
+
+    Lock dilepas otomatis oleh OS saat proses mati, jadi worker lain bisa mengambil alih.
+    Isi file = info leader (pid, waktu, port hub SSE) untuk dibaca worker lain."""
+
+    def __init__(self, path=None):
+        self.path = path or config.LEADER_LOCK_PATH
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self, info=None):
+        if self._file is not None:
+            return True
+        handle = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        self.write_info(info or {})
+        return True
+
+    def write_info(self, info):
+        """Tulis info leader ke file lock (hanya pemegang lock)"""
+        if self._file is None:
+            return
+        info = dict(info, pid=os.getpid())
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(json.dumps(info))
+        self._file.flush()
+
+    def read_info(self):
+        """Info leader saat ini (dari proses mana pun); None jika belum ada"""
+        try:
+            with open(self.path) as f:
+                text = f.read()
+            return json.loads(text) if text else None
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            self._file.seek(0)
+            self._file.truncate()
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+class LeaderElection:
+    """Pemilihan satu proses scrape/writer di antara worker (gunicorn -w N).
+
+    Proses yang mendapat LeaderLock menjalankan on_elected (scheduler scrape, hub SSE);
+    proses lain menjadi follower: mencoba lagi setiap retry_interval dan memanggil on_follow
+    sekali saat start. Leader juga memantau file trigger agar follower bisa meminta refresh."""
+
+    def __init__(self, on_elected, on_follow=None, on_trigger=None, lock=None, retry_interval=None,
+                 trigger_path=None):
+        self.on_elected = on_elected
+        self.on_follow = on_follow
+        self.on_trigger = on_trigger
+        self.lock = lock or LeaderLock()
+        self.retry_interval = retry_interval or config.LEADER_RETRY_INTERVAL
+        self.trigger_path = trigger_path or config.LEADER_TRIGGER_PATH
+
+        self.info = {}
+        self.elected_at = None
+        self._trigger_mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def start(self):
+        """Coba jadi leader sekarang; thread background terus mencoba (follower) / memantau trigger"""
+        if not self._try_elect() and self.on_follow is not None:
+            self.on_follow()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='leader-election', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.lock.release()
+
+    def update_info(self, **info):
+        """Tambah info yang diumumkan leader (mis. port hub SSE)"""
+        self.info.update(info)
+        if self.is_leader:
+            self.lock.write_info(dict(self.info, since=self.elected_at))
+
+    def leader_info(self):
+        return self.lock.read_info()
+
+    def request_refresh(self):
+        """Minta leader scrape secepatnya (dari proses mana pun)"""
+        if self.is_leader:
+            if self.on_trigger is not None:
+                self.on_trigger()
+            return
+        with open(self.trigger_path, 'a'):
+            pass
+        os.utime(self.trigger_path)
+
+    def _trigger_changed(self):
+        try:
+            mtime = os.stat(self.trigger_path).st_mtime_ns
+        except OSError:
+            mtime = 0
+        changed = self._trigger_mtime is not None and mtime != self._trigger_mtime
+        self._trigger_mtime = mtime
+        return changed
+
+    def _try_elect(self):
+        if self.is_leader:
+            return True
+        since = time.time()
+        if not self.lock.try_acquire(dict(self.info, since=since)):
+            return False
+        self.elected_at = since
+        logger.info(f"👑 Process {os.getpid()} elected scrape leader ({self.lock.path})")
+        self._trigger_changed()
+        self.on_elected()
+        return True
+
+    def _loop(self):
+        while not self._stop.wait(self.retry_interval if not self.is_leader else 1.0):
+            try:
+                if not self.is_leader:
+                    self._try_elect()
+                elif self._trigger_changed() and self.on_trigger is not None:
+                    logger.info("🔔 Refresh requested by a follower worker")
+                    self.on_trigger()
+            except Exception as e:
+                logger.error(f"❌ Leader election failed: {e}")
+
+    def status(self):
+        return {
+            'enabled': True,
+            'is_leader': self.is_leader,
+            'pid': os.getpid(),
+            'leader': self.leader_info()
+        }
+
+class StoreWatcher:
+    """Follower: pantau counter versi store (query kecil ke SQLite bersama) dan panggil
+    on_change(berat) saat leader meng-commit tick baru, tanpa scrape atau parse ulang."""
+
+    def __init__(self, store, berat_list, on_change, interval=None):
+        self.store = store
+        self.berat_list = list(berat_list)
+        self.on_change = on_change
+        self.interval = interval or config.FOLLOWER_POLL_INTERVAL
+        self._versions = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._versions = {berat: self.store.version(berat) for berat in self.berat_list}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='store-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self):
+        for berat in self.berat_list:
+            version = self.store.version(berat)
+            if version != self._versions.get(berat):
+                self._versions[berat] = version
+                self.on_change(berat)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"❌ Store watcher failed: {e}")
@@ -0,0 +1,174 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket latensi default (detik), dari operasi in-memory sampai scrape jaringan yang lambat
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Metric:
+    """Basis metric berlabel; nilai per kombinasi label disimpan di dict (thread-safe)"""
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}_total{format_labels(self.labelnames, key)} {format_value(value)}"]
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Ukur durasi blok with (juga saat blok melempar exception)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = format_labels(self.labelnames, key, [('le', format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Semua metric dalam format teks Prometheus (exposition format 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def counter(name, help, labelnames=()):
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+def render_metrics():
+    return REGISTRY.render()
+
+# Metric jalur panas (didefinisikan di sini agar semua modul berbagi instance yang sama)
+SCRAPE_PHASE_SECONDS = histogram('gold_scrape_phase_seconds',
+                                 'Durasi fase scrape halaman harga (connect, download, parse).',
+                                 ['source', 'phase'])
+SCRAPE_OUTCOMES = counter('gold_scrape_outcomes',
+                          'Hasil scrape per sumber (parsed, unchanged, not-modified, timeout, error).',
+                          ['source', 'outcome'])
+FETCH_ATTEMPTS = histogram('gold_fetch_attempts',
+                           'Jumlah percobaan scrape per panggilan fetch_price_index / get_gold_data.',
+                           buckets=(1, 2, 3, 4, 5))
+COMPLETENESS_SCORES = counter('gold_completeness_score',
+                              'Skor kelengkapan (jumlah vendor inti dengan harga Jual) per percobaan scrape.',
+                              ['score'])
+FILE_LOCK_WAIT_SECONDS = histogram('gold_file_lock_wait_seconds',
+                                   'Waktu tunggu untuk mendapatkan lock series sebelum commit ke store.',
+                                   ['operation'])
+STORE_APPEND_SECONDS = histogram('gold_store_append_seconds',
+                                 'Latensi append tick ke store.',
+                                 ['backend', 'method'])
+SAVE_OUTCOMES = counter('gold_save_outcomes',
+                        'Hasil penyimpanan per berat (saved, confirmed, unchanged, skipped, error).',
+                        ['berat', 'outcome'])
+CHART_BUILD_SECONDS = histogram('gold_chart_build_seconds',
+                                'Waktu membangun data chart di get_chart_data.',
+                                ['mode'])
+ANALYTICS_UPDATES = counter('gold_analytics_updates',
+                            'Update rollup analytics (incremental per tick atau rebuild batch dari store).',
+                            ['mode'])
+EXPORTS = counter('gold_exports',
+                  'Request export history per format (cache hit = file versi store yang sama sudah ada).',
+                  ['format', 'cache'])
+ALERT_EVALUATE_SECONDS = histogram('gold_alert_evaluate_seconds',
+                                   'Waktu evaluasi rule alert untuk satu tick yang di-commit.')
+ALERTS_FIRED = counter('gold_alerts_fired',
+                       'Rule alert yang terpicu per jenis (fired, atau debounced karena cooldown).',
+                       ['kind', 'outcome'])
+ALERT_DELIVERIES = counter('gold_alert_deliveries',
+                           'Pengiriman event alert per channel (outbox, webhook) dan hasil (ok, error, dropped, rejected).',
+                           ['channel', 'outcome'])
+HTTP_REQUEST_SECONDS = histogram('gold_http_request_seconds',
+                                 'Latensi request HTTP per route.',
+                                 ['route', 'method', 'status'])
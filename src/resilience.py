@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+import config
+from utils import get_logger
+
+logger = get_logger('resilience')
+
+class RetryPolicy:
+    """Retry dengan backoff eksponensial + jitter, dibatasi jumlah percobaan DAN deadline total.
+
+    Tidak ada sleep tetap: jeda berikutnya hanya dijalankan jika masih ada waktu untuk percobaan."""
+
+    def __init__(self, deadline=None, max_attempts=3, base_delay=None, max_delay=None):
+        self.deadline = deadline if deadline is not None else config.FETCH_DEADLINE
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay if base_delay is not None else config.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else config.RETRY_MAX_DELAY
+        self.started = None
+
+    def remaining(self):
+        return max(0.0, self.deadline - (time.monotonic() - self.started))
+
+    def backoff(self, attempt):
+        """Jeda sebelum percobaan ke-attempt (attempt >= 2), full jitter setengah"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 2))
+        return delay * random.uniform(0.5, 1.0)
+
+    def attempts(self):
+        """Generator nomor percobaan; berhenti jika percobaan habis atau deadline tidak cukup"""
+        self.started = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                delay = self.backoff(attempt)
+                if self.remaining() <= delay:
+                    logger.warning(f"⌛ Retry deadline reached after {attempt - 1} attempt(s)")
+                    return
+                logger.info(f"⏳ Waiting {delay:.1f}s before attempt {attempt}...")
+                time.sleep(delay)
+            yield attempt
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Circuit breaker sederhana: setelah failure_threshold kegagalan berturut-turut, sirkuit
+    'open' dan panggilan langsung ditolak selama reset_timeout; lalu 'half-open' mengizinkan
+    satu percobaan, sukses menutup kembali, gagal membuka lagi."""
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or config.BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or config.BREAKER_RESET_TIMEOUT
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Boleh mencoba sekarang? (half-open: hanya satu percobaan sekaligus)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open, retry in {self.retry_in():.0f}s")
+
+    def retry_in(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"✅ Circuit '{self.name}' closed")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"🔌 Circuit '{self.name}' opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'retry_in': round(self.retry_in(), 1) if self.state == 'open' else 0
+        }
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+import config
+from utils import INDONESIA_TZ, get_logger
+
+logger = get_logger('scheduler')
+
+def parse_hhmm(text):
+    hour, minute = text.split(':')
+    return int(hour), int(minute)
+
+def is_market_hours(now_wib):
+    """Apakah waktu WIB ini berada di jam pasar yang dikonfigurasi"""
+    if now_wib.weekday() not in config.MARKET_DAYS:
+        return False
+    open_hour, open_minute = parse_hhmm(config.MARKET_OPEN)
+    close_hour, close_minute = parse_hhmm(config.MARKET_CLOSE)
+    open_at = now_wib.replace(hour=open_hour, minute=open_minute, second=0, microsecond=0)
+    close_at = now_wib.replace(hour=close_hour, minute=close_minute, second=0, microsecond=0)
+    return open_at <= now_wib < close_at
+
+def seconds_until_market_open(now_wib):
+    """Detik sampai jam buka pasar berikutnya (0 jika sedang buka)"""
+    if is_market_hours(now_wib):
+        return 0
+    open_hour, open_minute = parse_hhmm(config.MARKET_OPEN)
+    for days_ahead in range(8):
+        candidate = (now_wib + timedelta(days=days_ahead)).replace(
+            hour=open_hour, minute=open_minute, second=0, microsecond=0)
+        if candidate > now_wib and candidate.weekday() in config.MARKET_DAYS:
+            return (candidate - now_wib).total_seconds()
+    return None
+
+def format_time(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, INDONESIA_TZ).isoformat(timespec='seconds')
+
+class ScrapeScheduler:
+    """Menjalankan job scrape di background thread dengan interval + jitter, sadar jam pasar"""
+
+    def __init__(self, job, interval=None, jitter=None, off_hours_interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else config.SCRAPE_INTERVAL
+        self.jitter = jitter if jitter is not None else config.SCRAPE_JITTER
+        self.off_hours_interval = off_hours_interval if off_hours_interval is not None else config.OFF_HOURS_INTERVAL
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state_lock = threading.Lock()
+
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_outcome = None
+        self.last_result = None
+        self.last_error = None
+        self.next_run = None
+
+    def next_delay(self, now_wib=None):
+        """Delay sampai run berikutnya: interval ± jitter di jam pasar, lebih jarang di luar jam pasar"""
+        now_wib = now_wib or datetime.now(INDONESIA_TZ)
+        if is_market_hours(now_wib):
+            delay = self.interval + random.uniform(-self.jitter, self.jitter)
+        else:
+            delay = self.off_hours_interval
+            until_open = seconds_until_market_open(now_wib)
+            if until_open is not None:
+                # Bangun tepat setelah pasar buka (plus jitter), bukan menunggu interval penuh
+                delay = min(delay, until_open + random.uniform(0, self.jitter))
+        return max(1.0, delay)
+
+    def start(self, run_immediately=True):
+        """Mulai thread scheduler; tidak memblokir startup aplikasi"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.next_run = time.time() if run_immediately else time.time() + self.next_delay()
+        self._thread = threading.Thread(target=self._loop, name='scrape-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"⏰ Scheduler started (interval {self.interval}s ± {self.jitter}s, off-hours {self.off_hours_interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def trigger(self):
+        """Jalankan job secepatnya tanpa menunggu jadwal"""
+        self.next_run = time.time()
+        self._wake.set()
+
+    def run_once(self):
+        """Jalankan job sekali dan catat durasi + hasil"""
+        started = time.time()
+        with self._state_lock:
+            self.running = True
+        result = None
+        try:
+            result = self.job()
+            # Job boleh mengembalikan hasil per berat: {'1': 'saved', '2': 'skipped'}
+            ok_results = ('saved', 'confirmed', 'unchanged')
+            if isinstance(result, dict) and any(value not in ok_results for value in result.values()):
+                outcome = 'partial' if any(value in ok_results for value in result.values()) else 'skipped'
+            else:
+                outcome = 'success'
+            error = None
+        except Exception as e:
+            logger.error(f"❌ Scheduled scrape failed: {e}")
+            outcome, error = 'error', str(e)
+        finally:
+            with self._state_lock:
+                self.running = False
+        with self._state_lock:
+            self.runs += 1
+            if outcome != 'success':
+                self.failures += 1
+            self.last_run = started
+            self.last_duration = time.time() - started
+            self.last_outcome = outcome
+            self.last_result = result
+            self.last_error = error
+
+    def _loop(self):
+        while not self._stop.is_set():
+            wait = self.next_run - time.time()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                if self.next_run - time.time() > 0:
+                    continue
+
+            self.run_once()
+            self.next_run = time.time() + self.next_delay()
+
+    def status(self):
+        with self._state_lock:
+            return {
+                'running': self.running,
+                'alive': self._thread is not None and self._thread.is_alive(),
+                'market_hours': is_market_hours(datetime.now(INDONESIA_TZ)),
+                'interval': self.interval,
+                'jitter': self.jitter,
+                'off_hours_interval': self.off_hours_interval,
+                'runs': self.runs,
+                'failures': self.failures,
+                'last_run': format_time(self.last_run),
+                'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+                'last_outcome': self.last_outcome,
+                'last_result': self.last_result,
+                'last_error': self.last_error,
+                'next_run': format_time(self.next_run)
+            }
@@ -1,184 +1,450 @@
-import requests
-from bs4 import BeautifulSoup
+import hashlib
+import threading
 import time
-from utils import extract_price
+from decimal import Decimal, InvalidOperation
+from utils import extract_price, get_logger, lazy_import
+from metrics import SCRAPE_OUTCOMES, SCRAPE_PHASE_SECONDS
+import config
 import os  # Tambahkan ini
 
-def scrape_galeri24_data(berat='1'):
-    """Scrape data harga emas REAL dari website Galeri24 - OPTIMIZED VERSION"""
+logger = get_logger('scraper')
+
+# Module berat di-load saat scrape pertama
+requests = lazy_import('requests')
+bs4 = lazy_import('bs4')
+
+URL_HARGA_EMAS = "https://galeri24.co.id/harga-emas"
+PRICE_SECTION_MARGIN = 4096
+VENDORS = ['GALERI 24', 'ANTAM', 'UBS']
+VENDOR_HEADERS = {
+    'Harga GALERI 24': 'GALERI 24',
+    'Harga ANTAM': 'ANTAM',
+    'Harga UBS': 'UBS'
+}
+
+def vendor_from_header(text):
+    """Nama vendor dari judul container ('Harga ANTAM' -> 'ANTAM'); vendor di luar VENDORS juga dikenali"""
+    vendor = VENDOR_HEADERS.get(text)
+    if vendor is None and text.startswith('Harga '):
+        vendor = text[len('Harga '):].strip().upper() or None
+    return vendor
+
+def normalize_berat(text):
+    """Normalisasi teks berat ('1', '0,5 gr', '2.0') menjadi key Decimal string ('1', '0.5', '2')"""
+    if text is None:
+        return None
+    clean_text = str(text).strip().lower()
+    for suffix in ('gram', 'gr', 'g'):
+        if clean_text.endswith(suffix):
+            clean_text = clean_text[:-len(suffix)].strip()
+            break
+    # Format Indonesia: koma = desimal
+    clean_text = clean_text.replace(',', '.')
     try:
-        url = "https://galeri24.co.id/harga-emas"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'id,en;q=0.9,en-US;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        print(f"🔍 Scraping data REAL untuk {berat} gram dari: {url}")
-        
-        # Gunakan session untuk koneksi yang lebih efisien
-        session = requests.Session()
-        session.headers.update(headers)
-        
-        # Timeout bertahap
-        timeouts = [10, 15, 20]
-        response = None
-        
-        for timeout in timeouts:
+        value = Decimal(clean_text)
+    except (InvalidOperation, ValueError):
+        return None
+    if not value.is_finite() or value <= 0:
+        return None
+    return format(value.normalize(), 'f')
+
+class PriceIndex(dict):
+    """Index (vendor, berat) -> (jual, buyback) hasil satu scrape, plus metadata.
+
+    unchanged=True berarti bagian tabel harga sama dengan scrape sebelumnya yang sudah tersimpan
+    (tidak di-parse ulang)."""
+
+    def __init__(self, *args, unchanged=False, section_hash=None, sources=None, pending=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unchanged = unchanged
+        self.section_hash = section_hash
+        # Status per sumber jika index hasil gabungan beberapa adapter
+        self.sources = sources
+        # (state, nilai) halaman yang baru dicatat lewat commit_page_state setelah index tersimpan
+        self.pending = pending or []
+
+# Client HTTP jangka panjang (connection pool) + state conditional request
+_session = None
+_session_lock = threading.Lock()
+_page_state_lock = threading.Lock()
+
+def new_page_state():
+    """State conditional request + hash tabel harga untuk satu URL sumber"""
+    return {
+        'etag': None,
+        'last_modified': None,
+        'section_hash': None,
+        'price_index': None
+    }
+
+_page_state = new_page_state()
+
+def commit_page_state(price_index):
+    """Catat validator conditional request + hash/index tabel harga dari scrape ini.
+
+    Dipanggil setelah SEMUA series dari index berhasil disimpan; sebelum itu scrape berikutnya
+    tetap mem-parse halaman, jadi kegagalan simpan (atau simpan satu berat saja) tidak membuat
+    harga baru dianggap unchanged."""
+    with _page_state_lock:
+        for state, values in getattr(price_index, 'pending', ()):
+            state.update(values)
+
+# Statistik scrape terakhir (status, ukuran, timing per fase dalam detik)
+last_scrape_stats = {}
+
+def get_session():
+    """Session requests yang dipakai ulang antar scrape (DNS/TCP/TLS tidak diulang)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'id,en;q=0.9,en-US;q=0.8',
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1'
+            })
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+def fetch_galeri24_page(conditional=True, url=None, timeout=None, state=None):
+    """Download halaman harga-emas Galeri24 (conditional GET jika bisa).
+
+    timeout: satu percobaan dengan batas ini (dipakai engine multi-sumber), default timeout bertahap.
+    Return (status_code, content, timings, validators); content None jika server menjawab 304.
+    validators (ETag/Last-Modified) tidak langsung disimpan ke state, lihat commit_page_state."""
+    url = url or URL_HARGA_EMAS
+    state = _page_state if state is None else state
+    logger.debug(f"🔍 Scraping data REAL dari: {url}")
+
+    session = get_session()
+    headers = {}
+    if conditional:
+        with _page_state_lock:
+            if state['etag']:
+                headers['If-None-Match'] = state['etag']
+            if state['last_modified']:
+                headers['If-Modified-Since'] = state['last_modified']
+
+    # Timeout bertahap
+    timeouts = [timeout] if timeout else [10, 15, 20]
+    response = None
+    timings = {}
+
+    for timeout in timeouts:
+        try:
+            started = time.perf_counter()
+            response = session.get(url, timeout=timeout, headers=headers, stream=True)
+            # connect: sampai header response diterima (DNS/TCP/TLS bila koneksi baru + waktu server)
+            timings['connect'] = time.perf_counter() - started
+            started = time.perf_counter()
             try:
-                response = session.get(url, timeout=timeout)
-                response.raise_for_status()
-                print(f"✅ Successfully connected with {timeout}s timeout")
-                break
-            except requests.exceptions.Timeout:
-                print(f"⏰ Timeout {timeout}s, trying next...")
-                continue
-            except requests.exceptions.ConnectionError as e:
-                print(f"🌐 Connection error: {e}")
+                if response.status_code != 304:
+                    response.raise_for_status()
+                content = response.content if response.status_code != 304 else None
+            finally:
+                # stream=True: koneksi baru kembali ke pool setelah body dibaca atau response ditutup
+                # (304 tanpa body, error HTTP)
+                response.close()
+            timings['download'] = time.perf_counter() - started
+            break
+        except requests.exceptions.Timeout:
+            if len(timeouts) == 1:
+                raise
+            logger.warning(f"⏰ Timeout {timeout}s, trying next...")
+            response = None
+            continue
+        except requests.exceptions.ConnectionError as e:
+            logger.warning(f"🌐 Connection error: {e}")
+            response = None
+            if len(timeouts) > 1:
                 time.sleep(2)
-                continue
-        
-        if response is None:
-            raise Exception("All connection attempts failed")
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        harga_emas = {
-            'GALERI 24': {'Jual': None, 'Buyback': None, 'error': None},
-            'ANTAM': {'Jual': None, 'Buyback': None, 'error': None},
-            'UBS': {'Jual': None, 'Buyback': None, 'error': None}
+            continue
+
+    if response is None:
+        raise Exception("All connection attempts failed")
+
+    validators = {}
+    if response.status_code == 200:
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
         }
-        
-        # Gunakan CSS selector yang lebih reliable
-        containers = soup.select('div.grid.divide-neutral-200.border-neutral-200')
-        print(f"📊 Found {len(containers)} price containers")
-        
-        found_vendors = []
-        
-        for container in containers:
-            # Identifikasi vendor menggunakan CSS selector
-            header = container.select_one('div.bg-primary-100')
-            if not header:
+
+    return response.status_code, content, timings, validators
+
+def extract_price_section(content):
+    """Potong bagian halaman yang berisi tabel harga (tanpa parsing HTML) untuk di-hash.
+
+    Semua baris harga ada di antara container pertama dan baris terakhir (+ margin),
+    jadi perubahan harga selalu mengubah hash; perubahan di luar bagian ini diabaikan."""
+    start = content.find(b'divide-neutral-200')
+    end = content.rfind(b'grid-cols-5')
+    if start == -1 or end == -1:
+        return content
+    start = content.rfind(b'<', 0, start)
+    return content[max(start, 0):end + PRICE_SECTION_MARGIN]
+
+def parse_price_index(content, engine=None):
+    """Parse halaman SEKALI dan kembalikan index (vendor, berat) -> (jual, buyback) untuk semua baris.
+
+    engine: 'auto' (lxml jika terpasang, selain itu strainer), 'lxml', 'strainer' atau 'soup'.
+    Engine cepat yang gagal / tidak menemukan harga jatuh kembali ke parse BeautifulSoup penuh."""
+    engine = engine or config.PARSER_ENGINE
+    if engine == 'auto':
+        engine = 'lxml' if lxml_available() else 'strainer'
+
+    if engine != 'soup':
+        try:
+            price_index = PARSER_ENGINES[engine](content)
+            if price_index:
+                return price_index
+            logger.warning(f"⚠️ Parser engine '{engine}' found no prices, falling back to full parse")
+        except Exception as e:
+            logger.warning(f"⚠️ Parser engine '{engine}' failed ({e}), falling back to full parse")
+
+    return parse_price_index_soup(content)
+
+def parse_price_index_soup(content):
+    """Parse penuh seluruh dokumen dengan BeautifulSoup (jalur referensi)"""
+    soup = bs4.BeautifulSoup(content, 'html.parser')
+    return parse_containers(soup.select('div.grid.divide-neutral-200.border-neutral-200'))
+
+def _has_divide_class(value):
+    """Filter class untuk SoupStrainer (value bisa string mentah atau list, tergantung versi bs4)"""
+    if not value:
+        return False
+    classes = value if isinstance(value, list) else value.split()
+    return 'divide-neutral-200' in classes
+
+def parse_price_index_strainer(content):
+    """BeautifulSoup + SoupStrainer: hanya container harga yang dibangun menjadi tree"""
+    strainer = bs4.SoupStrainer('div', class_=_has_divide_class)
+    soup = bs4.BeautifulSoup(content, 'html.parser', parse_only=strainer)
+    return parse_containers(soup.select('div.grid.divide-neutral-200.border-neutral-200'))
+
+def parse_containers(containers):
+    """Ambil harga dari container BeautifulSoup hasil select"""
+    price_index = {}
+
+    # Gunakan CSS selector yang lebih reliable
+    logger.debug(f"📊 Found {len(containers)} price containers")
+
+    found_vendors = []
+
+    for container in containers:
+        # Identifikasi vendor menggunakan CSS selector
+        header = container.select_one('div.bg-primary-100')
+        if not header:
+            continue
+
+        vendor = vendor_from_header(header.get_text(strip=True))
+        if vendor is None:
+            continue
+
+        found_vendors.append(vendor)
+
+        # Process container untuk extract harga semua berat
+        process_container(container, vendor, price_index)
+
+    logger.debug(f"📦 Vendors found: {found_vendors}, {len(price_index)} price rows indexed")
+    return price_index
+
+def _xpath_classes(*names):
+    """Predikat XPath setara selector CSS .a.b.c"""
+    return ' and '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+CONTAINER_XPATH = f"//div[{_xpath_classes('grid', 'divide-neutral-200', 'border-neutral-200')}]"
+HEADER_XPATH = f".//div[{_xpath_classes('bg-primary-100')}]"
+ROW_XPATH = f".//div[{_xpath_classes('grid', 'grid-cols-5', 'divide-x')}]"
+HEADER_ROW_XPATH = f".//div[{_xpath_classes('bg-neutral-50')}]"
+
+def lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _lxml_text(element):
+    """Setara get_text(strip=True) BeautifulSoup"""
+    return ''.join(text.strip() for text in element.itertext())
+
+def parse_price_index_lxml(content):
+    """Parser C lxml + XPath langsung ke container dan baris harga (tanpa tree BeautifulSoup)"""
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(content)
+    price_index = {}
+
+    for container in tree.xpath(CONTAINER_XPATH):
+        header = container.xpath(HEADER_XPATH)
+        if not header:
+            continue
+
+        vendor = vendor_from_header(_lxml_text(header[0]))
+        if vendor is None:
+            continue
+
+        for row in container.xpath(ROW_XPATH):
+            # Skip header row
+            if row.xpath(HEADER_ROW_XPATH):
                 continue
-                
-            header_text = header.get_text(strip=True)
-            vendor = None
-            
-            if header_text == 'Harga GALERI 24':
-                vendor = 'GALERI 24'
-            elif header_text == 'Harga ANTAM':
-                vendor = 'ANTAM'
-            elif header_text == 'Harga UBS':
-                vendor = 'UBS'
-            else:
+
+            cols = row.xpath('.//div')
+            if len(cols) < 3:
                 continue
-                
-            found_vendors.append(vendor)
-            print(f"🏷️ Processing: {vendor}")
-            
-            # Process container untuk extract harga
-            process_container(container, vendor, berat, harga_emas)
-        
-        print(f"📦 Vendors found: {found_vendors}")
-        
-        # Print summary hasil scraping
-        print(f"\n📊 FINAL RESULTS SUMMARY for {berat}g:")
-        for vendor in ['GALERI 24', 'ANTAM', 'UBS']:
-            print(f"  {vendor}: Jual={harga_emas[vendor]['Jual']}, Buyback={harga_emas[vendor]['Buyback']}")
-        
+
+            add_price_row(price_index, vendor, _lxml_text(cols[0]), _lxml_text(cols[1]), _lxml_text(cols[2]))
+
+    logger.debug(f"📦 lxml engine: {len(price_index)} price rows indexed")
+    return price_index
+
+PARSER_ENGINES = {
+    'lxml': parse_price_index_lxml,
+    'strainer': parse_price_index_strainer,
+    'soup': parse_price_index_soup
+}
+
+def scrape_galeri24_prices(url=None, timeout=None, state=None, source='galeri24'):
+    """Scrape halaman Galeri24 sekali untuk SEMUA berat dan SEMUA vendor.
+
+    Jika server menjawab 304 atau hash tabel harga sama dengan scrape terakhir yang tersimpan,
+    parsing dilewati dan index sebelumnya dikembalikan dengan unchanged=True. Index hasil parse
+    membawa state halaman baru yang dicatat pemanggil lewat commit_page_state.
+    url/timeout/state dipakai adapter sumber (mis. server fixture lokal dengan state sendiri);
+    source adalah label sumber untuk metric."""
+    global last_scrape_stats
+    default_state = state is None
+    state = _page_state if default_state else state
+
+    status_code, content, timings, validators = fetch_galeri24_page(url=url, timeout=timeout, state=state)
+
+    with _page_state_lock:
+        previous_index = state['price_index']
+        previous_hash = state['section_hash']
+
+    if status_code == 304 and previous_index is not None:
+        price_index = PriceIndex(previous_index, unchanged=True, section_hash=previous_hash)
+        outcome = 'not-modified'
+    else:
+        if content is None:
+            # 304 tanpa index sebelumnya (mis. setelah restart): ambil ulang tanpa validator
+            status_code, content, timings, validators = fetch_galeri24_page(conditional=False, url=url,
+                                                                            timeout=timeout, state=state)
+
+        section_hash = hashlib.sha1(extract_price_section(content)).hexdigest()
+        if section_hash == previous_hash and previous_index is not None:
+            price_index = PriceIndex(previous_index, unchanged=True, section_hash=section_hash)
+            outcome = 'unchanged'
+            # Tabel sama dengan yang sudah tersimpan: validator baru aman dipakai langsung
+            with _page_state_lock:
+                state.update(validators)
+        else:
+            started = time.perf_counter()
+            parsed = parse_price_index(content)
+            timings['parse'] = time.perf_counter() - started
+            outcome = 'parsed'
+
+            # Hash, index dan validator baru dicatat setelah index tersimpan (commit_page_state)
+            pending = [(state, dict(validators, section_hash=section_hash, price_index=parsed))]
+            price_index = PriceIndex(parsed, section_hash=section_hash, pending=pending)
+
+    stats = {
+        'status_code': status_code,
+        'outcome': outcome,
+        'bytes': len(content) if content is not None else 0,
+        'timings': {phase: round(seconds, 4) for phase, seconds in timings.items()}
+    }
+    state['stats'] = stats
+    for phase, seconds in timings.items():
+        SCRAPE_PHASE_SECONDS.observe(seconds, source=source, phase=phase)
+    SCRAPE_OUTCOMES.inc(source=source, outcome=outcome)
+    if default_state:
+        last_scrape_stats = stats
+    logger.info(f"⏱️ Scrape {outcome} ({status_code}): " +
+          ', '.join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in timings.items()))
+    return price_index
+
+def build_harga_emas(price_index, berat='1'):
+    """Bangun dict harga_emas untuk satu berat dari price index hasil scrape"""
+    berat_key = normalize_berat(berat)
+    harga_emas = {}
+
+    for vendor in VENDORS:
+        jual, buyback = price_index.get((vendor, berat_key), (None, None))
+        harga_emas[vendor] = {'Jual': jual, 'Buyback': buyback, 'error': None}
+
         # Check untuk error
-        for vendor in ['GALERI 24', 'ANTAM', 'UBS']:
-            errors = []
-            if harga_emas[vendor]['Jual'] is None:
-                errors.append(f"jual {berat}g")
-            if harga_emas[vendor]['Buyback'] is None:
-                errors.append(f"buyback {berat}g")
-            
-            if errors:
-                harga_emas[vendor]['error'] = f"Data {', '.join(errors)} {vendor} tidak ditemukan"
-        
+        errors = []
+        if jual is None:
+            errors.append(f"jual {berat}g")
+        if buyback is None:
+            errors.append(f"buyback {berat}g")
+
+        if errors:
+            harga_emas[vendor]['error'] = f"Data {', '.join(errors)} {vendor} tidak ditemukan"
+
+    return harga_emas
+
+def scrape_galeri24_data(berat='1'):
+    """Scrape data harga emas REAL dari website Galeri24 - OPTIMIZED VERSION"""
+    try:
+        harga_emas = build_harga_emas(scrape_galeri24_prices(), berat)
+
+        # Print summary hasil scraping
+        logger.debug(f"\n📊 FINAL RESULTS SUMMARY for {berat}g:")
+        for vendor in VENDORS:
+            logger.debug(f"  {vendor}: Jual={harga_emas[vendor]['Jual']}, Buyback={harga_emas[vendor]['Buyback']}")
+
         return harga_emas
-        
+
     except Exception as e:
         error_msg = f"Error scraping: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(f"❌ {error_msg}")
         return {
             'GALERI 24': {'Jual': None, 'Buyback': None, 'error': error_msg},
             'ANTAM': {'Jual': None, 'Buyback': None, 'error': error_msg},
             'UBS': {'Jual': None, 'Buyback': None, 'error': error_msg}
         }
 
-def process_container(container, vendor, berat, harga_emas):
-    """Process individual container to extract prices"""
+def process_container(container, vendor, price_index):
+    """Process individual container to extract prices untuk setiap berat"""
     data_rows = container.select('div.grid.grid-cols-5.divide-x')
-    print(f"   Found {len(data_rows)} data rows for {vendor}")
-    
-    for i, row in enumerate(data_rows):
+    logger.debug(f"   Found {len(data_rows)} data rows for {vendor}")
+
+    for row in data_rows:
         # Skip header row
         if row.select_one('div.bg-neutral-50'):
-            print(f"   Skipping header row {i}")
             continue
-            
+
         # Extract kolom
         cols = row.select('div')
-        if len(cols) >= 3:
-            row_berat = cols[0].get_text(strip=True)
-            print(f"   Row {i}: berat='{row_berat}', jual='{cols[1].get_text(strip=True)}', buyback='{cols[2].get_text(strip=True)}'")
-            
-            # Jika ini berat yang kita cari (eksak)
-            if row_berat == berat:
-                harga_jual = cols[1].get_text(strip=True)
-                harga_buyback = cols[2].get_text(strip=True)
-                
-                print(f"🎯 Found exact match {berat}g in {vendor}")
-                
-                jual_clean = extract_price(harga_jual)
-                buyback_clean = extract_price(harga_buyback)
-                
-                if jual_clean and harga_emas[vendor]['Jual'] is None:
-                    harga_emas[vendor]['Jual'] = jual_clean
-                    print(f"✅ {vendor} Jual ({berat}g): Rp {jual_clean:,}")
-                
-                if buyback_clean and harga_emas[vendor]['Buyback'] is None:
-                    harga_emas[vendor]['Buyback'] = buyback_clean
-                    print(f"✅ {vendor} Buyback ({berat}g): Rp {buyback_clean:,}")
-    
-    # Jika tidak ditemukan dengan match eksak, coba cari dengan logika fuzzy
-    if harga_emas[vendor]['Jual'] is None:
-        print(f"❌ Tidak menemukan data eksak untuk {berat}g {vendor}, mencoba fuzzy matching...")
-        for row in data_rows:
-            if row.select_one('div.bg-neutral-50'):
-                continue
-                
-            cols = row.select('div')
-            if len(cols) >= 3:
-                row_berat = cols[0].get_text(strip=True)
-                
-                # Fuzzy matching untuk berat
-                berat_variations = [
-                    berat,  # '2'
-                    f"{berat} ",  # '2 '
-                    f"{berat}g",  # '2g'
-                    f"{berat} g",  # '2 g'
-                    f"{berat} gram",  # '2 gram'
-                ]
-                
-                if any(variation in row_berat for variation in berat_variations):
-                    harga_jual = cols[1].get_text(strip=True)
-                    harga_buyback = cols[2].get_text(strip=True)
-                    
-                    print(f"🎯 Found fuzzy match for {berat}g in {vendor}: '{row_berat}'")
-                    
-                    jual_clean = extract_price(harga_jual)
-                    buyback_clean = extract_price(harga_buyback)
-                    
-                    if jual_clean and harga_emas[vendor]['Jual'] is None:
-                        harga_emas[vendor]['Jual'] = jual_clean
-                        print(f"✅ {vendor} Jual ({berat}g): Rp {jual_clean:,}")
-                    
-                    if buyback_clean and harga_emas[vendor]['Buyback'] is None:
-                        harga_emas[vendor]['Buyback'] = buyback_clean
-                        print(f"✅ {vendor} Buyback ({berat}g): Rp {buyback_clean:,}")
\ No newline at end of file
+        if len(cols) < 3:
+            continue
+
+        add_price_row(price_index, vendor, cols[0].get_text(strip=True),
+                      cols[1].get_text(strip=True), cols[2].get_text(strip=True))
+
+def add_price_row(price_index, vendor, berat_text, jual_text, buyback_text):
+    """Masukkan satu baris harga ke index; baris valid pertama untuk (vendor, berat) yang dipakai"""
+    # Key berat eksak (Decimal-normalized), jadi '1' tidak pernah cocok dengan '10'
+    berat_key = normalize_berat(berat_text)
+    if berat_key is None:
+        return
+
+    jual_clean = extract_price(jual_text)
+    buyback_clean = extract_price(buyback_text)
+
+    jual, buyback = price_index.get((vendor, berat_key), (None, None))
+    if jual is None:
+        jual = jual_clean
+    if buyback is None:
+        buyback = buyback_clean
+    if jual is not None or buyback is not None:
+        price_index[(vendor, berat_key)] = (jual, buyback)
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+import config
+import scraper
+from scraper import PriceIndex
+from utils import get_logger, lazy_import
+from metrics import SCRAPE_OUTCOMES
+
+logger = get_logger('sources')
+
+requests = lazy_import('requests')
+
+class SourceAdapter:
+    """Interface sumber harga: satu halaman dealer -> index {(vendor, berat): (jual, buyback)}.
+
+    Subclass mengisi name/url dan mengimplementasikan scrape(timeout) (fetch + parse) yang
+    mengembalikan PriceIndex (unchanged=True jika halaman sama dengan scrape sebelumnya).
+    Vendor dari dealer lain sebaiknya diberi nama sendiri agar tidak bertabrakan saat digabung."""
+    name = None
+    url = None
+
+    def __init__(self, name=None, url=None, timeout=None):
+        self.name = name or self.name
+        self.url = url or self.url
+        self.timeout = timeout or config.SOURCE_TIMEOUT
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc
+
+    def scrape(self, timeout):
+        raise NotImplementedError
+
+class Galeri24Adapter(SourceAdapter):
+    """Halaman harga-emas Galeri24 (GALERI 24, ANTAM, UBS dan vendor lain di halaman yang sama)"""
+    name = 'galeri24'
+    url = scraper.URL_HARGA_EMAS
+
+    def __init__(self, name=None, url=None, timeout=None):
+        super().__init__(name, url, timeout)
+        # URL default berbagi state conditional request dengan modul scraper
+        self.state = scraper._page_state if self.url == scraper.URL_HARGA_EMAS else scraper.new_page_state()
+
+    def scrape(self, timeout):
+        return scraper.scrape_galeri24_prices(url=self.url, timeout=timeout, state=self.state, source=self.name)
+
+# Adapter yang bisa dipilih lewat config.SOURCES
+SOURCE_ADAPTERS = {
+    'galeri24': Galeri24Adapter
+}
+
+SourceResult = namedtuple('SourceResult', ['name', 'status', 'price_index', 'elapsed', 'error'])
+
+def merge_results(results):
+    """Gabungkan index dari sumber yang berhasil; urutan results = prioritas (sumber pertama menang).
+
+    Return (PriceIndex gabungan, jumlah key yang harganya berbeda antar sumber)."""
+    merged = {}
+    conflicts = 0
+    for result in results:
+        if result.price_index is None:
+            continue
+        for key, value in result.price_index.items():
+            if key not in merged:
+                merged[key] = value
+            elif merged[key] != value:
+                conflicts += 1
+
+    succeeded = [result for result in results if result.price_index is not None]
+    # Unchanged hanya jika SEMUA sumber berhasil dan tidak berubah; sumber gagal = data parsial
+    unchanged = len(succeeded) == len(results) and all(result.status == 'unchanged' for result in succeeded)
+    sources = {
+        result.name: {
+            'status': result.status,
+            'rows': len(result.price_index) if result.price_index is not None else 0,
+            'elapsed': round(result.elapsed, 4),
+            'error': result.error
+        }
+        for result in results
+    }
+    pending = [item for result in succeeded for item in getattr(result.price_index, 'pending', ())]
+    return PriceIndex(merged, unchanged=unchanged, sources=sources, pending=pending), conflicts
+
+class ScrapeEngine:
+    """Jalankan semua adapter paralel di thread pool terbatas, di bawah satu deadline refresh.
+
+    Koneksi per host dibatasi semaphore; setiap sumber punya timeout sendiri; sumber yang gagal
+    atau melewati deadline dilaporkan tanpa membatalkan hasil sumber lain."""
+
+    def __init__(self, adapters, max_workers=None, host_limit=None, deadline=None):
+        self.adapters = list(adapters)
+        self.max_workers = max_workers or config.SOURCE_MAX_WORKERS
+        self.host_limit = host_limit or config.SOURCE_HOST_LIMIT
+        self.deadline = deadline or config.REFRESH_DEADLINE
+
+        self._executor = None
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self.last_run = None
+        self.last_duration = None
+        self.last_conflicts = 0
+        self.last_sources = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='source')
+            return self._executor
+
+    def _host_slot(self, host):
+        with self._lock:
+            return self._host_slots.setdefault(host, threading.BoundedSemaphore(self.host_limit))
+
+    def _run(self, adapter, deadline_at):
+        started = time.monotonic()
+        slot = self._host_slot(adapter.host)
+        if not slot.acquire(timeout=max(0.0, deadline_at - started)):
+            return SourceResult(adapter.name, 'timeout', None, time.monotonic() - started,
+                                f'waiting for {adapter.host} connection slot')
+        try:
+            timeout = min(adapter.timeout, deadline_at - time.monotonic())
+            if timeout <= 0:
+                return SourceResult(adapter.name, 'timeout', None, time.monotonic() - started,
+                                    'refresh deadline reached')
+            price_index = adapter.scrape(timeout)
+            status = 'unchanged' if getattr(price_index, 'unchanged', False) else 'ok'
+            return SourceResult(adapter.name, status, price_index, time.monotonic() - started, None)
+        except requests.exceptions.Timeout as e:
+            logger.warning(f"⏰ Source {adapter.name} timed out: {e}")
+            SCRAPE_OUTCOMES.inc(source=adapter.name, outcome='timeout')
+            return SourceResult(adapter.name, 'timeout', None, time.monotonic() - started, str(e))
+        except Exception as e:
+            logger.error(f"❌ Source {adapter.name} failed: {e}")
+            SCRAPE_OUTCOMES.inc(source=adapter.name, outcome='error')
+            return SourceResult(adapter.name, 'error', None, time.monotonic() - started, str(e))
+        finally:
+            slot.release()
+
+    def scrape(self, deadline=None):
+        """Scrape semua sumber; return PriceIndex gabungan (raise jika tidak ada satu pun yang berhasil).
+
+        deadline: sisa waktu pemanggil (detik), dipakai jika lebih pendek dari deadline engine."""
+        deadline = self.deadline if deadline is None else min(self.deadline, deadline)
+        started = time.monotonic()
+        deadline_at = started + deadline
+        executor = self._get_executor()
+        futures = [(adapter, executor.submit(self._run, adapter, deadline_at)) for adapter in self.adapters]
+        done, _ = wait([future for _, future in futures], timeout=deadline)
+
+        results = []
+        for adapter, future in futures:
+            if future in done:
+                results.append(future.result())
+            else:
+                # Thread worker tetap selesai sendiri (timeout socket), hasilnya diabaikan
+                future.cancel()
+                results.append(SourceResult(adapter.name, 'timeout', None, deadline,
+                                            f'missed refresh deadline ({deadline:.1f}s)'))
+
+        price_index, conflicts = merge_results(results)
+        self.last_run = time.time()
+        self.last_duration = time.monotonic() - started
+        self.last_conflicts = conflicts
+        self.last_sources = price_index.sources
+
+        summary = ', '.join(f"{name}={info['status']}" for name, info in price_index.sources.items())
+        logger.info(f"🌐 Sources scraped in {self.last_duration * 1000:.0f}ms: {summary}")
+        if conflicts:
+            logger.warning(f"⚠️ {conflicts} price(s) differ between sources, first source wins")
+
+        if not any(result.price_index is not None for result in results):
+            raise Exception(f"All sources failed: {summary}")
+        return price_index
+
+    def status(self):
+        return {
+            'sources': [adapter.name for adapter in self.adapters],
+            'deadline': self.deadline,
+            'host_limit': self.host_limit,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_conflicts': self.last_conflicts,
+            'last_sources': self.last_sources
+        }
+
+def create_engine(names=None):
+    """Engine dari daftar nama adapter (default config.SOURCES)"""
+    names = names or config.SOURCES
+    unknown = [name for name in names if name not in SOURCE_ADAPTERS]
+    if unknown:
+        raise ValueError(f"Unknown price source(s): {', '.join(unknown)}")
+    return ScrapeEngine([SOURCE_ADAPTERS[name]() for name in names])
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine()
+        return _engine
+
+def scrape_all_sources(deadline=None):
+    """Satu refresh: semua sumber terkonfigurasi secara paralel, hasil digabung"""
+    return get_engine().scrape(deadline)
@@ -0,0 +1,908 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, date, time as dt_time
+import config
+from utils import get_logger, lazy_import, wib_date_time_strings, wib_epoch, WIB_OFFSET_SECONDS
+
+logger = get_logger('storage')
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Constants
+EXCEL_FILE_1G = 'Harga_Emas_1Gram.xlsx'
+EXCEL_FILE_2G = 'Harga_Emas_2Gram.xlsx'
+SHEET_NAME = 'Data_Harian'
+
+COLUMNS = ['Tanggal', 'Jam', 'GALERI24_Jual', 'GALERI24_Buyback',
+           'ANTAM_Jual', 'ANTAM_Buyback', 'UBS_Jual', 'UBS_Buyback']
+PRICE_COLUMNS = COLUMNS[2:]
+
+# Vendor inti -> prefix kolom format wide (Excel, DataFrame chart)
+VENDOR_COLUMNS = {
+    'GALERI 24': 'GALERI24',
+    'ANTAM': 'ANTAM',
+    'UBS': 'UBS'
+}
+
+MIGRATION_BATCH_SIZE = 1000
+
+# Naikkan jika DDL SQLite berubah; marker di tabel meta membuat startup melewati DDL
+# v2: tabel long price_ticks (tick_ts, vendor_id, weight_id, jual, buyback) menggantikan tabel wide ticks
+# v3: kolom last_seen/seen di price_ticks (dedup saat tulis: harga sama = konfirmasi tick terakhir)
+SCHEMA_VERSION = 3
+
+def get_excel_file(berat):
+    """Get Excel file path based on weight"""
+    if berat == '1':
+        return EXCEL_FILE_1G
+    if berat == '2':
+        return EXCEL_FILE_2G
+    return f'Harga_Emas_{berat}Gram.xlsx'
+
+def vendor_prefix(vendor):
+    """Prefix kolom wide untuk vendor ('GALERI 24' -> 'GALERI24', vendor lain: tanpa spasi)"""
+    return VENDOR_COLUMNS.get(vendor, vendor.replace(' ', '').upper())
+
+def wide_row(tanggal, jam, prices):
+    """Baris format wide dari {vendor: (jual, buyback)} untuk vendor inti"""
+    row = {'Tanggal': tanggal, 'Jam': jam}
+    for vendor, prefix in VENDOR_COLUMNS.items():
+        jual, buyback = prices.get(vendor, (None, None))
+        row[f'{prefix}_Jual'] = jual
+        row[f'{prefix}_Buyback'] = buyback
+    return row
+
+def long_prices(berat, row):
+    """Baris wide satu berat -> {(vendor, berat): (jual, buyback)} (vendor tanpa harga dilewati)"""
+    prices = {}
+    for vendor, prefix in VENDOR_COLUMNS.items():
+        jual, buyback = row.get(f'{prefix}_Jual'), row.get(f'{prefix}_Buyback')
+        if jual is not None or buyback is not None:
+            prices[(vendor, berat)] = (jual, buyback)
+    return prices
+
+def history_epoch(df):
+    """Epoch (detik) baris history wide dari kolom Tanggal + Jam WIB"""
+    stamps = pd.to_datetime(df['Tanggal'].astype(str) + ' ' + df['Jam'].astype(str), errors='coerce')
+    return stamps.to_numpy('datetime64[s]').astype('int64') - WIB_OFFSET_SECONDS
+
+def in_range(df, start=None, end=None):
+    """Baris history wide dengan epoch di [start, end] (tanpa batas jika None)"""
+    if start is None and end is None:
+        return df
+    ts = history_epoch(df)
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    return df[mask].reset_index(drop=True)
+
+def same_prices(last, row):
+    """Apakah keenam kolom harga baris baru sama dengan baris terakhir (kosong == kosong)"""
+    for col in PRICE_COLUMNS:
+        old, new = last.get(col), row.get(col)
+        old = None if old is None or old != old else old
+        if old != new:
+            return False
+    return True
+
+def read_excel_header(excel_file):
+    """Baca hanya baris header workbook (openpyxl read-only)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True)
+    try:
+        sheet = workbook[SHEET_NAME] if SHEET_NAME in workbook.sheetnames else workbook.active
+        return list(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+    finally:
+        workbook.close()
+
+def write_excel_atomic(df, excel_file):
+    """Tulis workbook ke file sementara di folder yang sama lalu os.replace (atomic rename):
+    pembaca selalu melihat workbook lama atau baru yang utuh, tidak pernah setengah tertulis"""
+    directory = os.path.dirname(os.path.abspath(excel_file))
+    handle, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.xlsx', dir=directory)
+    os.close(handle)
+    try:
+        df.to_excel(tmp_path, index=False, sheet_name=SHEET_NAME)
+        os.replace(tmp_path, excel_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_excel_chunks(chunks, excel_file):
+    """Tulis chunk history wide ke workbook dengan openpyxl write-only (memori per chunk, bukan per
+    history); file sementara + os.replace seperti write_excel_atomic. Return jumlah baris."""
+    from openpyxl import Workbook
+
+    directory = os.path.dirname(os.path.abspath(excel_file))
+    handle, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.xlsx', dir=directory)
+    os.close(handle)
+    total = 0
+    try:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(SHEET_NAME)
+        sheet.append(COLUMNS)
+        for chunk in chunks:
+            values = chunk.reindex(columns=COLUMNS).astype(object)
+            for row in values.where(values.notna(), None).itertuples(index=False, name=None):
+                sheet.append(row)
+            total += len(chunk)
+        workbook.save(tmp_path)
+        os.replace(tmp_path, excel_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return total
+
+class ExcelTickStore:
+    """Backend legacy: satu workbook per berat, setiap append menulis ulang seluruh file (O(history)).
+
+    Penulisan lewat file sementara + rename, jadi pembaca tanpa lock tetap mendapat workbook utuh.
+    Tidak ada kolom last_seen/seen: tick yang harganya sama dilewati tanpa mencatat konfirmasi."""
+    name = 'excel'
+    records_confirmations = False
+
+    def ensure_structure(self, berat_list=('1', '2')):
+        """Cek struktur kolom secara murah (header saja); kolom yang kurang ditambahkan saat append berikutnya"""
+        logger.info("🔄 Ensuring Excel file structure (header only)...")
+
+        for berat in berat_list:
+            excel_file = get_excel_file(berat)
+
+            if os.path.exists(excel_file):
+                try:
+                    header = read_excel_header(excel_file)
+                    missing = [col for col in COLUMNS if col not in header]
+                    if missing:
+                        # Migrasi ditunda: append berikutnya menulis ulang file dengan semua kolom
+                        logger.warning(f"⏳ Missing columns {missing} in {berat}g file, deferred to next write")
+                    else:
+                        logger.debug(f"✅ Structure already correct for {berat}g file")
+
+                except Exception as e:
+                    logger.error(f"❌ Error checking structure for {berat}g: {e}")
+                    # Buat file baru jika corrupt
+                    self.create_new_excel_file(berat)
+            else:
+                # Buat file baru jika tidak ada
+                self.create_new_excel_file(berat)
+
+    def create_new_excel_file(self, berat):
+        """Create new Excel file with proper structure (openpyxl langsung, tanpa pandas)"""
+        try:
+            from openpyxl import Workbook
+
+            excel_file = get_excel_file(berat)
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet(SHEET_NAME)
+            sheet.append(COLUMNS)
+            tmp_file = f'{excel_file}.tmp-{os.getpid()}'
+            workbook.save(tmp_file)
+            os.replace(tmp_file, excel_file)
+            logger.info(f"🆕 Created new file for {berat}g")
+        except Exception as e:
+            logger.error(f"❌ Failed to create new file for {berat}g: {e}")
+
+    def exists(self, berat):
+        return os.path.exists(get_excel_file(berat))
+
+    def version(self, berat):
+        """Versi series = (mtime_ns, size) file Excel"""
+        try:
+            stat = os.stat(get_excel_file(berat))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def append(self, berat, row):
+        """Tambah satu tick: baca seluruh workbook, concat, tulis ulang.
+
+        Return False (tanpa menulis) jika harga sama dengan baris terakhir; format legacy ini tidak
+        punya kolom last_seen, jadi konfirmasi tidak dicatat."""
+        excel_file = get_excel_file(berat)
+        df_old = self.read(berat)
+        if not df_old.empty and same_prices(df_old.iloc[-1], row):
+            return False
+        df_new_series = pd.DataFrame({col: [row.get(col)] for col in COLUMNS})
+
+        # Gabungkan dengan data lama
+        if not df_old.empty:
+            df_combined = pd.concat([df_old, df_new_series], ignore_index=True)
+        else:
+            df_combined = df_new_series
+
+        # Pastikan urutan kolom
+        df_combined = df_combined[COLUMNS]
+        write_excel_atomic(df_combined, excel_file)
+        logger.debug(f"📈 Total rows untuk {berat}g: {len(df_combined)}")
+        return True
+
+    def append_prices(self, tick_ts, prices, tanggal=None, jam=None):
+        """Satu siklus scrape: satu append (tulis ulang file) per berat dashboard.
+
+        Backend legacy ini tidak menyimpan berat di luar config.WEIGHTS (satu workbook per berat)."""
+        by_berat = {}
+        for (vendor, berat), value in prices.items():
+            if berat in config.WEIGHTS:
+                by_berat.setdefault(berat, {})[vendor] = value
+        return sorted(berat for berat, vendor_prices in by_berat.items()
+                      if self.append(berat, wide_row(tanggal, jam, vendor_prices)))
+
+    def confirm_prices(self, tick_ts, prices):
+        """Berat dashboard yang harganya masih sama dengan baris terakhir. Format legacy ini tidak punya
+        kolom last_seen, jadi tidak ada yang ditulis (konfirmasi tidak dicatat, lihat append).
+
+        Return (berat yang sama, harga berat yang berbeda untuk append_prices) seperti SQLiteTickStore."""
+        by_berat = {}
+        for (vendor, berat), value in prices.items():
+            if berat in config.WEIGHTS:
+                by_berat.setdefault(berat, {})[vendor] = value
+        confirmed, changed = [], {}
+        for berat, vendor_prices in sorted(by_berat.items()):
+            last = self.last_row(berat)
+            if last is not None and same_prices(last, wide_row(None, None, vendor_prices)):
+                confirmed.append(berat)
+            else:
+                changed.update({(vendor, berat): value for vendor, value in vendor_prices.items()})
+        return confirmed, changed
+
+    def weights(self):
+        return [berat for berat in config.WEIGHTS if self.exists(berat)]
+
+    def vendors(self):
+        return list(VENDOR_COLUMNS)
+
+    def read(self, berat):
+        excel_file = get_excel_file(berat)
+
+        if not os.path.exists(excel_file):
+            return pd.DataFrame()
+
+        return pd.read_excel(excel_file, sheet_name=SHEET_NAME, dtype={'Tanggal': str, 'Jam': str})
+
+    def iter_read(self, berat, start=None, end=None, chunk_ticks=None):
+        """History wide per chunk, dibaca streaming dengan openpyxl read-only (tanpa pandas.read_excel)"""
+        _, chunks = self.iter_snapshot(berat, start, end, chunk_ticks)
+        yield from chunks
+
+    def iter_snapshot(self, berat, start=None, end=None, chunk_ticks=None):
+        """(versi, chunk iter_read) dari file yang sama: file dibuka dulu lalu versinya diambil dari fstat.
+        Penulis mengganti workbook lewat os.replace, jadi handle yang sudah terbuka tetap membaca isi lama."""
+        try:
+            handle = open(get_excel_file(berat), 'rb')
+        except FileNotFoundError:
+            return None, iter(())
+        stat = os.fstat(handle.fileno())
+        return (stat.st_mtime_ns, stat.st_size), self._read_chunks(handle, start, end, chunk_ticks)
+
+    def _read_chunks(self, handle, start, end, chunk_ticks):
+        from openpyxl import load_workbook
+
+        chunk_ticks = chunk_ticks or config.EXPORT_CHUNK_ROWS
+        try:
+            workbook = load_workbook(handle, read_only=True)
+            try:
+                sheet = workbook[SHEET_NAME] if SHEET_NAME in workbook.sheetnames else workbook.active
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                positions = {name: i for i, name in enumerate(header) if name in COLUMNS}
+                batch = []
+                for values in rows:
+                    batch.append({col: _cell_value(col, values[i]) for col, i in positions.items() if i < len(values)})
+                    if len(batch) >= chunk_ticks:
+                        yield in_range(pd.DataFrame(batch, columns=COLUMNS), start, end)
+                        batch = []
+                if batch:
+                    yield in_range(pd.DataFrame(batch, columns=COLUMNS), start, end)
+            finally:
+                workbook.close()
+        finally:
+            handle.close()
+
+    def confirmations(self, berat, start=None, end=None):
+        """Timeline dari baris berurutan dengan harga sama (hanya data sebelum dedup; konfirmasi setelah
+        itu tidak tercatat, lihat records_confirmations)"""
+        df = self.read(berat)
+        if df.empty:
+            return []
+        ts = history_epoch(df)
+        prices = df.reindex(columns=PRICE_COLUMNS).to_numpy(dtype='float64')
+        same = ((prices[1:] == prices[:-1]) | (np.isnan(prices[1:]) & np.isnan(prices[:-1]))).all(axis=1)
+        starts = np.flatnonzero(np.concatenate(([True], ~same)))
+        ends = np.append(starts[1:], len(ts)) - 1
+        runs = [{'since': int(ts[a]), 'last_seen': int(ts[b]), 'seen': int(b - a + 1)} for a, b in zip(starts, ends)]
+        return [run for run in runs if (start is None or run['last_seen'] >= start) and
+                (end is None or run['since'] <= end)]
+
+    def last_row(self, berat):
+        """Tick terakhir sebagai baris wide (dict), None jika kosong"""
+        df = self.read(berat)
+        if df.empty:
+            return None
+        last = df.iloc[-1]
+        return last.where(last.notna(), None).to_dict()
+
+class SQLiteTickStore:
+    """Backend append-only SQLite (WAL mode) dengan tabel long yang di-dictionary-encode:
+    price_ticks (tick_ts, vendor_id, weight_id, jual, buyback), clustered pada (weight_id, tick_ts),
+    jadi satu siklus scrape = satu batch untuk semua vendor x berat, dan query hanya membaca
+    series yang diminta."""
+    name = 'sqlite'
+    records_confirmations = True
+
+    def __init__(self, path=None):
+        self.path = path or config.SQLITE_PATH
+        self._local = threading.local()
+        self._migrated = set()
+        self._migrate_lock = threading.Lock()
+        # Dictionary encoding: nama vendor / berat -> id kecil
+        self._vendor_ids = {}
+        self._weight_ids = {}
+        # (penanda series_version, daftar berat) untuk weights()
+        self._weights_cache = None
+
+    def _connect(self):
+        """Satu koneksi per thread (sqlite3 connection tidak thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def schema_version(self):
+        """Versi schema yang tercatat di tabel meta (0 jika belum ada)"""
+        try:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return int(row[0]) if row else 0
+
+    def ensure_structure(self, berat_list=('1', '2')):
+        """Buat tabel jika schema belum tercatat; migrasi data lama ditunda sampai series pertama kali dipakai"""
+        if self.schema_version() >= SCHEMA_VERSION:
+            return
+
+        logger.info(f"🔄 Ensuring SQLite store structure ({self.path})...")
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS vendors (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS weights (
+                    id INTEGER PRIMARY KEY,
+                    berat TEXT NOT NULL UNIQUE
+                )''')
+            # Clustered pada (weight_id, tick_ts): baca satu berat = range scan berurutan
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS price_ticks (
+                    tick_ts INTEGER NOT NULL,
+                    vendor_id INTEGER NOT NULL,
+                    weight_id INTEGER NOT NULL,
+                    jual INTEGER,
+                    buyback INTEGER,
+                    last_seen INTEGER,
+                    seen INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (weight_id, tick_ts, vendor_id)
+                ) WITHOUT ROWID''')
+            # Upgrade dari v2: tambah kolom konfirmasi (last_seen NULL = hanya terlihat di tick_ts)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(price_ticks)')}
+            if 'last_seen' not in columns:
+                conn.execute('ALTER TABLE price_ticks ADD COLUMN last_seen INTEGER')
+            if 'seen' not in columns:
+                conn.execute('ALTER TABLE price_ticks ADD COLUMN seen INTEGER NOT NULL DEFAULT 1')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS series_version (
+                    berat TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )''')
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                         (str(SCHEMA_VERSION),))
+
+    def _ensure_migrated(self, berat):
+        """Jalankan migrasi (tabel wide v1 / workbook Excel) untuk berat ini sekali, saat pertama kali dipakai"""
+        if berat in self._migrated:
+            return
+        with self._migrate_lock:
+            if berat in self._migrated:
+                return
+            self.migrate_legacy_ticks(berat)
+            self.migrate_from_excel(berat)
+            self._migrated.add(berat)
+
+    def _lookup_id(self, conn, cache, table, column, value, create=True):
+        """Id dictionary untuk vendor/berat; dibuat jika belum ada (create=True)"""
+        value_id = cache.get(value)
+        if value_id is not None:
+            return value_id
+        if create:
+            conn.execute(f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)', (value,))
+        row = conn.execute(f'SELECT id FROM {table} WHERE {column} = ?', (value,)).fetchone()
+        if row is None:
+            return None
+        cache[value] = row[0]
+        return row[0]
+
+    def _vendor_id(self, conn, vendor, create=True):
+        return self._lookup_id(conn, self._vendor_ids, 'vendors', 'name', vendor, create)
+
+    def _weight_id(self, conn, berat, create=True):
+        return self._lookup_id(conn, self._weight_ids, 'weights', 'berat', berat, create)
+
+    def exists(self, berat):
+        """Apakah berat ini punya minimal satu tick (setelah migrasi data lama)"""
+        self._ensure_migrated(berat)
+        conn = self._connect()
+        weight_id = self._weight_id(conn, berat, create=False)
+        if weight_id is None:
+            return False
+        return conn.execute('SELECT 1 FROM price_ticks WHERE weight_id = ? LIMIT 1', (weight_id,)).fetchone() is not None
+
+    def version(self, berat):
+        """Counter versi series, naik setiap commit tick"""
+        self._ensure_migrated(berat)
+        row = self._connect().execute(
+            'SELECT version FROM series_version WHERE berat = ?', (berat,)).fetchone()
+        return row[0] if row else 0
+
+    def weights(self):
+        """Semua berat yang punya data.
+
+        Setiap commit tick menaikkan series_version dan tick tidak pernah dihapus, jadi daftar hanya
+        dihitung ulang (DISTINCT atas price_ticks) jika penanda versi berubah, juga oleh proses lain."""
+        conn = self._connect()
+        marker = conn.execute('SELECT COUNT(*), COALESCE(SUM(version), 0) FROM series_version').fetchone()
+        cached = self._weights_cache
+        if cached is not None and cached[0] == marker:
+            return list(cached[1])
+        rows = conn.execute(
+            'SELECT berat FROM weights WHERE id IN (SELECT DISTINCT weight_id FROM price_ticks)').fetchall()
+        weights = sorted((row[0] for row in rows), key=float)
+        self._weights_cache = (marker, weights)
+        return list(weights)
+
+    def vendors(self):
+        return [row[0] for row in self._connect().execute('SELECT name FROM vendors ORDER BY id')]
+
+    def _bump_versions(self, conn, berat_list):
+        conn.executemany('''
+            INSERT INTO series_version (berat, version) VALUES (?, 1)
+            ON CONFLICT(berat) DO UPDATE SET version = version + 1''', [(berat,) for berat in berat_list])
+
+    def _insert_prices(self, conn, entries):
+        """entries: iterable (tick_ts, vendor, berat, jual, buyback); return set berat yang ditulis"""
+        written = set()
+        params = []
+        for tick_ts, vendor, berat, jual, buyback in entries:
+            if jual is None and buyback is None:
+                continue
+            params.append((tick_ts, self._vendor_id(conn, vendor), self._weight_id(conn, berat), jual, buyback))
+            written.add(berat)
+        # Tick dengan (berat, detik, vendor) yang sama: yang terakhir menang
+        conn.executemany('''
+            INSERT OR REPLACE INTO price_ticks (tick_ts, vendor_id, weight_id, jual, buyback)
+            VALUES (?, ?, ?, ?, ?)''', params)
+        return written
+
+    def _last_tick(self, conn, weight_id):
+        """(tick_ts, {vendor_id: (jual, buyback)}) tick terakhir satu berat; (None, None) jika kosong"""
+        rows = conn.execute('''
+            SELECT tick_ts, vendor_id, jual, buyback FROM price_ticks
+            WHERE weight_id = ? AND tick_ts = (SELECT MAX(tick_ts) FROM price_ticks WHERE weight_id = ?)''',
+            (weight_id, weight_id)).fetchall()
+        if not rows:
+            return None, None
+        return rows[0][0], {vendor_id: (jual, buyback) for _, vendor_id, jual, buyback in rows}
+
+    def _confirm_unchanged(self, conn, entries):
+        """Dedup saat tulis untuk satu tick per berat: jika harga setiap vendor yang ditulis sama dengan
+        tick terakhir berat itu, tidak ada baris baru; tick terakhir diperpanjang (last_seen, seen + 1)
+        di tempat. Vendor lain di tick terakhir (sumber / batch lain) tidak ikut dibandingkan.
+
+        Return (entries yang berubah dan harus di-insert, set berat yang hanya dikonfirmasi)."""
+        by_berat = {}
+        for entry in entries:
+            if entry[3] is not None or entry[4] is not None:
+                by_berat.setdefault(entry[2], []).append(entry)
+
+        changed, confirmed = [], set()
+        for berat, group in by_berat.items():
+            tick_ts = group[0][0]
+            weight_id = self._weight_id(conn, berat, create=False)
+            last_ts, last_prices = self._last_tick(conn, weight_id) if weight_id is not None else (None, None)
+            prices = {self._vendor_id(conn, vendor, create=False): (jual, buyback)
+                      for _, vendor, _, jual, buyback in group}
+            if last_prices is None or tick_ts < last_ts or any(
+                    last_prices.get(vendor_id) != value for vendor_id, value in prices.items()):
+                changed.extend(group)
+                continue
+            if tick_ts > last_ts:
+                conn.execute('''
+                    UPDATE price_ticks SET last_seen = ?, seen = seen + 1
+                    WHERE weight_id = ? AND tick_ts = ?''', (tick_ts, weight_id, last_ts))
+            confirmed.add(berat)
+        return changed, confirmed
+
+    def _transaction(self, conn, work):
+        """Jalankan work(conn) dalam satu transaksi; cache id dibuang jika rollback"""
+        try:
+            with conn:
+                return work(conn)
+        except Exception:
+            self._vendor_ids.clear()
+            self._weight_ids.clear()
+            raise
+
+    def _row_entries(self, berat, rows):
+        """Baris format wide (Tanggal, Jam, kolom harga) -> entries (tick_ts, vendor, berat, jual, buyback)"""
+        for row in rows:
+            try:
+                tick_ts = wib_epoch(row.get('Tanggal'), row.get('Jam'))
+            except (TypeError, ValueError):
+                logger.warning(f"⚠️ Skipping row with invalid timestamp: {row.get('Tanggal')} {row.get('Jam')}")
+                continue
+            for (vendor, _), (jual, buyback) in long_prices(berat, row).items():
+                yield tick_ts, vendor, berat, jual, buyback
+
+    def _insert_rows(self, conn, berat, rows):
+        """Masukkan baris format wide apa adanya (import history, tanpa dedup)"""
+        written = self._insert_prices(conn, self._row_entries(berat, rows))
+        self._bump_versions(conn, written or [berat])
+
+    def append(self, berat, row):
+        """Tambah satu tick format wide dalam satu transaksi (INSERT + bump versi).
+
+        Return False jika harga sama dengan tick terakhir: hanya last_seen/seen yang diperbarui,
+        versi series tidak naik (cache history tetap valid)."""
+        self._ensure_migrated(berat)
+
+        def work(conn):
+            entries, confirmed = self._confirm_unchanged(conn, self._row_entries(berat, [row]))
+            if confirmed:
+                return False
+            written = self._insert_prices(conn, entries)
+            self._bump_versions(conn, written or [berat])
+            return True
+
+        return self._transaction(self._connect(), work)
+
+    def append_prices(self, tick_ts, prices, tanggal=None, jam=None):
+        """Satu siklus scrape {(vendor, berat): (jual, buyback)} sebagai satu batch/transaksi.
+
+        Berat yang harganya sama dengan tick terakhir hanya dikonfirmasi (last_seen/seen).
+        Return daftar berat yang ditulis (versi series-nya naik)."""
+        for berat in {berat for _, berat in prices}:
+            self._ensure_migrated(berat)
+
+        def work(conn):
+            entries, _ = self._confirm_unchanged(conn, ((tick_ts, vendor, berat, jual, buyback)
+                                                        for (vendor, berat), (jual, buyback) in prices.items()))
+            written = self._insert_prices(conn, entries)
+            self._bump_versions(conn, sorted(written))
+            return sorted(written, key=float)
+
+        return self._transaction(self._connect(), work)
+
+    def confirm_prices(self, tick_ts, prices):
+        """Scrape dengan tabel harga sama seperti sebelumnya: tick terakhir setiap berat yang harganya masih
+        sama diperpanjang (last_seen = tick_ts, seen + 1); tidak pernah menulis tick baru atau menaikkan versi.
+
+        Return (daftar berat yang dikonfirmasi, {(vendor, berat): harga} yang berbeda dari tick terakhir
+        berat itu; pemanggil menyimpannya lewat append_prices)."""
+        for berat in {berat for _, berat in prices}:
+            self._ensure_migrated(berat)
+
+        def work(conn):
+            changed, confirmed = self._confirm_unchanged(conn, ((tick_ts, vendor, berat, jual, buyback)
+                                                                for (vendor, berat), (jual, buyback) in prices.items()))
+            return (sorted(confirmed, key=float),
+                    {(vendor, berat): (jual, buyback) for _, vendor, berat, jual, buyback in changed})
+
+        return self._transaction(self._connect(), work)
+
+    def read(self, berat, vendors=None):
+        """History satu berat dalam format wide (Tanggal, Jam, <PREFIX>_Jual, <PREFIX>_Buyback ...).
+
+        Range scan (weight_id, tick_ts) yang hanya membaca vendor yang diminta, lalu pivot di numpy."""
+        self._ensure_migrated(berat)
+        vendors = list(vendors or VENDOR_COLUMNS)
+        conn = self._connect()
+        weight_id = self._weight_id(conn, berat, create=False)
+        vendor_ids = [self._vendor_id(conn, vendor, create=False) for vendor in vendors]
+        known_ids = [vendor_id for vendor_id in vendor_ids if vendor_id is not None]
+        if weight_id is None or not known_ids:
+            return pd.DataFrame()
+
+        rows = conn.execute(
+            f'''SELECT tick_ts, vendor_id, jual, buyback FROM price_ticks
+                WHERE weight_id = ? AND vendor_id IN ({', '.join(str(vendor_id) for vendor_id in known_ids)})
+                ORDER BY tick_ts''', (weight_id,)).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        return pivot_wide(np.array(rows, dtype='float64'), vendors, vendor_ids)
+
+    def iter_read(self, berat, start=None, end=None, chunk_ticks=None):
+        """History wide per chunk (maks chunk_ticks tick per DataFrame) dalam range epoch opsional.
+
+        Satu SELECT di koneksi terpisah (snapshot WAL konsisten) dibaca dengan fetchmany, jadi memori
+        terbatas berapa pun panjang history. Baris satu tick tidak pernah terbelah antar chunk."""
+        _, chunks = self.iter_snapshot(berat, start, end, chunk_ticks)
+        yield from chunks
+
+    def iter_snapshot(self, berat, start=None, end=None, chunk_ticks=None):
+        """(versi series, chunk iter_read) dari satu transaksi baca: versi dan tick berasal dari snapshot
+        WAL yang sama, jadi commit di antaranya tidak membuat isi lebih baru dari versinya."""
+        self._ensure_migrated(berat)
+        chunk_ticks = chunk_ticks or config.EXPORT_CHUNK_ROWS
+        vendors = list(VENDOR_COLUMNS)
+        conn = self._connect()
+        weight_id = self._weight_id(conn, berat, create=False)
+        vendor_ids = [self._vendor_id(conn, vendor, create=False) for vendor in vendors]
+        known_ids = [vendor_id for vendor_id in vendor_ids if vendor_id is not None]
+        if weight_id is None or not known_ids:
+            return self.version(berat), iter(())
+
+        conditions, params = ['weight_id = ?'], [weight_id]
+        if start is not None:
+            conditions.append('tick_ts >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('tick_ts <= ?')
+            params.append(end)
+        reader = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            reader.execute('BEGIN')
+            row = reader.execute('SELECT version FROM series_version WHERE berat = ?', (berat,)).fetchone()
+            cursor = reader.execute(
+                f'''SELECT tick_ts, vendor_id, jual, buyback FROM price_ticks
+                    WHERE {' AND '.join(conditions)}
+                      AND vendor_id IN ({', '.join(str(vendor_id) for vendor_id in known_ids)})
+                    ORDER BY tick_ts''', params)
+        except Exception:
+            reader.close()
+            raise
+        return (row[0] if row else 0), self._read_chunks(reader, cursor, chunk_ticks * len(known_ids),
+                                                         vendors, vendor_ids)
+
+    def _read_chunks(self, reader, cursor, fetch_rows, vendors, vendor_ids):
+        try:
+            pending = []
+            while True:
+                rows = cursor.fetchmany(fetch_rows)
+                if not rows:
+                    break
+                rows = pending + rows
+                # Tahan baris tick terakhir: vendor lain di tick yang sama bisa ada di fetch berikutnya
+                cut = len(rows)
+                while cut and rows[cut - 1][0] == rows[-1][0]:
+                    cut -= 1
+                pending = rows[cut:]
+                if cut:
+                    yield pivot_wide(np.array(rows[:cut], dtype='float64'), vendors, vendor_ids)
+            if pending:
+                yield pivot_wide(np.array(pending, dtype='float64'), vendors, vendor_ids)
+        finally:
+            reader.close()
+
+    def last_row(self, berat):
+        """Tick terakhir sebagai baris wide (dict), None jika kosong; hanya membaca tick terakhir"""
+        self._ensure_migrated(berat)
+        conn = self._connect()
+        weight_id = self._weight_id(conn, berat, create=False)
+        if weight_id is None:
+            return None
+        rows = conn.execute('''
+            SELECT v.name, p.tick_ts, p.jual, p.buyback FROM price_ticks p
+            JOIN vendors v ON v.id = p.vendor_id
+            WHERE p.weight_id = ? AND p.tick_ts = (SELECT MAX(tick_ts) FROM price_ticks WHERE weight_id = ?)''',
+            (weight_id, weight_id)).fetchall()
+        if not rows:
+            return None
+        tanggal, jam = wib_date_time_strings([rows[0][1]])
+        return wide_row(str(tanggal[0]), str(jam[0]), {vendor: (jual, buyback) for vendor, _, jual, buyback in rows})
+
+    def confirmations(self, berat, start=None, end=None):
+        """Timeline konfirmasi: satu run per tick tersimpan (since, last_seen, seen) yang overlap range"""
+        self._ensure_migrated(berat)
+        conn = self._connect()
+        weight_id = self._weight_id(conn, berat, create=False)
+        if weight_id is None:
+            return []
+        conditions, params = ['weight_id = ?'], [weight_id]
+        if start is not None:
+            conditions.append('COALESCE(last_seen, tick_ts) >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('tick_ts <= ?')
+            params.append(end)
+        rows = conn.execute(
+            f'''SELECT tick_ts, MAX(COALESCE(last_seen, tick_ts)), MAX(seen) FROM price_ticks
+                WHERE {' AND '.join(conditions)}
+                GROUP BY tick_ts ORDER BY tick_ts''', params).fetchall()
+        return [{'since': since, 'last_seen': last_seen, 'seen': seen} for since, last_seen, seen in rows]
+
+    def read_long(self, berat=None, start=None, end=None):
+        """Tick format long (tick_ts, vendor, berat, jual, buyback, last_seen, seen), opsional per berat / range epoch"""
+        conditions, params = [], []
+        if berat is not None:
+            self._ensure_migrated(berat)
+            conditions.append('w.berat = ?')
+            params.append(berat)
+        if start is not None:
+            conditions.append('p.tick_ts >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('p.tick_ts <= ?')
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return pd.read_sql_query(
+            f'''SELECT p.tick_ts, v.name AS vendor, w.berat, p.jual, p.buyback,
+                       COALESCE(p.last_seen, p.tick_ts) AS last_seen, p.seen
+                FROM price_ticks p
+                JOIN weights w ON w.id = p.weight_id
+                JOIN vendors v ON v.id = p.vendor_id
+                {where}
+                ORDER BY p.weight_id, p.tick_ts, p.vendor_id''',
+            self._connect(), params=params)
+
+    def migrate_legacy_ticks(self, berat):
+        """Konversi baris tabel wide v1 (ticks) untuk berat ini ke price_ticks, langsung di SQL"""
+        conn = self._connect()
+        has_legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ticks'").fetchone()
+        if not has_legacy or not conn.execute('SELECT 1 FROM ticks WHERE berat = ? LIMIT 1', (berat,)).fetchone():
+            return 0
+
+        logger.info(f"🚚 Converting legacy wide ticks for {berat}g into price_ticks...")
+        tick_ts = f"CAST(strftime('%s', tanggal || ' ' || jam) AS INTEGER) - {WIB_OFFSET_SECONDS}"
+
+        def work(conn):
+            weight_id = self._weight_id(conn, berat)
+            for vendor, prefix in VENDOR_COLUMNS.items():
+                jual, buyback = f'{prefix.lower()}_jual', f'{prefix.lower()}_buyback'
+                conn.execute(f'''
+                    INSERT OR REPLACE INTO price_ticks (tick_ts, vendor_id, weight_id, jual, buyback)
+                    SELECT {tick_ts}, ?, ?, {jual}, {buyback} FROM ticks
+                    WHERE berat = ? AND ({jual} IS NOT NULL OR {buyback} IS NOT NULL)
+                      AND strftime('%s', tanggal || ' ' || jam) IS NOT NULL
+                    ORDER BY id''', (self._vendor_id(conn, vendor), weight_id, berat))
+            total = conn.execute('DELETE FROM ticks WHERE berat = ?', (berat,)).rowcount
+            self._bump_versions(conn, [berat])
+            return total
+
+        total = self._transaction(conn, work)
+        logger.info(f"✅ Converted {total} legacy rows for {berat}g")
+        return total
+
+    def migrate_from_excel(self, berat, excel_file=None):
+        """Migrasi streaming satu kali dari workbook lama (openpyxl read-only, batch insert).
+
+        Aman dijalankan bersamaan oleh beberapa worker: insert idempoten, marker OR IGNORE."""
+        excel_file = excel_file or get_excel_file(berat)
+        marker = f'migrated:{berat}'
+        conn = self._connect()
+
+        if conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+            return 0
+
+        total = 0
+        if os.path.exists(excel_file):
+            from openpyxl import load_workbook
+
+            logger.info(f"🚚 Migrating {excel_file} into SQLite store...")
+            workbook = load_workbook(excel_file, read_only=True)
+            try:
+                sheet = workbook[SHEET_NAME] if SHEET_NAME in workbook.sheetnames else workbook.active
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                positions = {name: i for i, name in enumerate(header) if name in COLUMNS}
+
+                with conn:
+                    batch = []
+                    for values in rows:
+                        row = {col: _cell_value(col, values[i]) for col, i in positions.items() if i < len(values)}
+                        if not row.get('Tanggal'):
+                            continue
+                        batch.append(row)
+                        if len(batch) >= MIGRATION_BATCH_SIZE:
+                            self._insert_rows(conn, berat, batch)
+                            total += len(batch)
+                            batch = []
+                    if batch:
+                        self._insert_rows(conn, berat, batch)
+                        total += len(batch)
+                    conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', (marker, excel_file))
+            finally:
+                workbook.close()
+            logger.info(f"✅ Migrated {total} rows for {berat}g")
+        else:
+            with conn:
+                conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', (marker, ''))
+        return total
+
+def pivot_wide(data, vendors, vendor_ids):
+    """Array long terurut waktu [tick_ts, vendor_id, jual, buyback] -> DataFrame wide satu baris per tick"""
+    ts = data[:, 0].astype('int64')
+    new_tick = np.r_[True, ts[1:] != ts[:-1]]
+    position = np.cumsum(new_tick) - 1
+    tick_ts = ts[new_tick]
+
+    columns = []
+    prices = np.full((len(tick_ts), 2 * len(vendors)), np.nan)
+    for k, (vendor, vendor_id) in enumerate(zip(vendors, vendor_ids)):
+        prefix = vendor_prefix(vendor)
+        columns += [f'{prefix}_Jual', f'{prefix}_Buyback']
+        if vendor_id is None:
+            continue
+        mask = data[:, 1] == vendor_id
+        prices[position[mask], 2 * k] = data[mask, 2]
+        prices[position[mask], 2 * k + 1] = data[mask, 3]
+
+    tanggal, jam = wib_date_time_strings(tick_ts)
+    df = pd.DataFrame(prices, columns=columns)
+    df.insert(0, 'Tanggal', tanggal.astype(object))
+    df.insert(1, 'Jam', jam.astype(object))
+    return df
+
+def _cell_value(col, value):
+    """Normalisasi nilai cell Excel ke tipe kolom store"""
+    if value is None:
+        return None
+    if col == 'Tanggal':
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        return str(value)
+    if col == 'Jam':
+        if isinstance(value, (datetime, dt_time)):
+            return value.strftime('%H:%M:%S')
+        return str(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def export_excel(store, berat, excel_file=None):
+    """Export history satu berat ke workbook Excel (format legacy)"""
+    excel_file = excel_file or get_excel_file(berat)
+    total = write_excel_chunks(store.iter_read(berat), excel_file)
+    logger.info(f"📤 Exported {total} rows for {berat}g to {excel_file}")
+    return excel_file
+
+def create_store(backend=None):
+    """Factory backend penyimpanan berdasarkan config"""
+    backend = backend or config.STORE_BACKEND
+    if backend == 'excel':
+        return ExcelTickStore()
+    if backend == 'sqlite':
+        return SQLiteTickStore()
+    raise ValueError(f"Unknown store backend: {backend}")
+
+if __name__ == '__main__':
+    import sys
+
+    # python storage.py migrate|export [berat ...]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    berat_list = sys.argv[2:] or ['1', '2']
+    store = SQLiteTickStore()
+    store.ensure_structure(berat_list)
+    for berat in berat_list:
+        store.migrate_from_excel(berat)
+    if command == 'export':
+        for berat in berat_list:
+            export_excel(store, berat)
@@ -0,0 +1,64 @@
+"""Fixture bersama test: src dan helper benchmark (history sintetis) di sys.path, store di folder sementara.
+
+Jalankan dari folder src:  python -m pytest -q"""
+import os
+import sys
+
+import pytest
+
+# Tanpa thread background (scheduler, hub SSE, leader election) saat app diimport di test
+os.environ.setdefault('GOLD_SCHEDULER_ENABLED', '0')
+os.environ.setdefault('GOLD_STREAM_HUB_ENABLED', '0')
+os.environ.setdefault('GOLD_LEADER_ELECTION', '0')
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.dirname(TESTS_DIR)
+for path in (SRC_DIR, os.path.join(SRC_DIR, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common import history_rows, synthetic_history  # noqa: E402
+import config  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import SQLiteTickStore  # noqa: E402
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Folder data sementara sebagai cwd (path store/export/alert relatif seperti di aplikasi)"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def store(workdir):
+    store = SQLiteTickStore(str(workdir / 'Harga_Emas.db'))
+    store.ensure_structure(['1', '2'])
+    return store
+
+@pytest.fixture
+def data_manager(store):
+    return DataManager(store=store)
+
+def load_history(store, berat, df):
+    """Import history wide apa adanya (tanpa dedup), satu transaksi"""
+    conn = store._connect()
+    with conn:
+        store._insert_rows(conn, berat, history_rows(df))
+
+@pytest.fixture
+def history():
+    return synthetic_history(2000, change_rate=0.3, nan_rate=0.02)
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """Modul app dengan semua file data (store, alert, export, lock leader) di folder sementara"""
+    datadir = tmp_path_factory.mktemp('app')
+    for name, filename in (('SQLITE_PATH', 'Harga_Emas.db'), ('ALERTS_PATH', 'Harga_Emas.alerts.db'),
+                           ('EXPORT_DIR', 'exports'), ('LEADER_LOCK_PATH', 'Harga_Emas.leader.lock'),
+                           ('LEADER_TRIGGER_PATH', 'Harga_Emas.refresh')):
+        setattr(config, name, str(datadir / filename))
+    import app
+    return app
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
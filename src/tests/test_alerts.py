@@ -0,0 +1,99 @@
+import subprocess
+import sys
+
+import pytest
+
+import config
+from alerts import AlertEngine, AlertStore, parse_rule, webhook_allowed
+from common import SRC_DIR
+from data_manager import DataManager
+
+def tick(jam, antam, tanggal='2030-01-01'):
+    return {'Tanggal': tanggal, 'Jam': jam, 'GALERI24_Jual': None, 'ANTAM_Jual': antam, 'UBS_Jual': None}
+
+def rule(**fields):
+    return dict({'vendor': 'ANTAM', 'berat': '1', 'kind': 'below', 'threshold': 1_400_000, 'cooldown': 0,
+                 'owner': 'test'}, **fields)
+
+@pytest.fixture
+def engine(store, workdir):
+    return AlertEngine(DataManager(store=store), AlertStore(str(workdir / 'Harga_Emas.alerts.db')))
+
+def fire(engine, ticks, berat='1'):
+    fired = [[event['rule_id'] for event in engine.on_commit(berat, row)] for row in ticks]
+    engine.dispatcher.flush()
+    return fired
+
+def test_import_does_not_load_requests():
+    code = "import sys, alerts; sys.exit('requests' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR).returncode == 0
+
+def test_threshold_rules_fire_on_crossing_only(engine):
+    (below, above), _ = engine.store.add([parse_rule(rule()), parse_rule(rule(kind='above', threshold=1_420_000))])
+    fired = fire(engine, [tick('09:00:00', 1_410_000), tick('09:10:00', 1_399_000), tick('09:20:00', 1_398_000),
+                          tick('09:30:00', 1_421_000)])
+    assert fired == [[], [below.id], [], [above.id]]
+
+def test_move_rule_fires_on_percent_change_since_open(engine):
+    (up,), _ = engine.store.add([parse_rule(rule(kind='move', threshold=1.0, direction='up'))])
+    fired = fire(engine, [tick('09:00:00', 1_400_000), tick('09:10:00', 1_410_000), tick('09:20:00', 1_415_000),
+                          tick('09:00:00', 1_430_000, tanggal='2030-01-02')])
+    assert fired == [[], [], [up.id], []]
+
+def test_cooldown_debounces_repeat_alerts(engine):
+    engine.store.add([parse_rule(rule(cooldown=3600))])
+    fired = fire(engine, [tick('09:00:00', 1_401_000), tick('09:10:00', 1_399_000), tick('09:20:00', 1_401_000),
+                          tick('09:30:00', 1_399_000), tick('10:20:00', 1_401_000), tick('10:30:00', 1_399_000)])
+    assert [bool(ids) for ids in fired] == [False, True, False, False, False, True]
+
+def test_events_reach_outbox_without_webhook(engine, monkeypatch):
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', ['https://hooks.example.com/gold/'])
+    posted = []
+    monkeypatch.setattr(engine.dispatcher, 'post', posted.append)
+    engine.store.add([parse_rule(rule(webhook='https://hooks.example.com/gold/alert'))])
+    fire(engine, [tick('09:00:00', 1_401_000), tick('09:10:00', 1_399_000)])
+    outbox = engine.store.events(0, limit=10)
+    assert len(outbox) == 1 and 'webhook' not in outbox[0] and outbox[0]['price'] == 1_399_000
+    assert [event['webhook'] for event in posted] == ['https://hooks.example.com/gold/alert']
+
+def test_rules_added_elsewhere_are_picked_up(engine):
+    fire(engine, [tick('09:00:00', 1_401_000)])
+    other = AlertStore(engine.store.path)
+    (late,), _ = other.add([parse_rule(rule(owner='late'))])
+    assert fire(engine, [tick('09:10:00', 1_399_000)]) == [[late.id]]
+
+def test_webhooks_rejected_without_allowlist(monkeypatch):
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', [])
+    with pytest.raises(ValueError):
+        parse_rule(rule(webhook='https://hooks.example.com/gold/alert'))
+    assert parse_rule(rule())['webhook'] is None
+
+@pytest.mark.parametrize('url, allowed', [
+    ('https://hooks.example.com/gold/alert', True),
+    ('https://hooks.example.com:443/gold', True),
+    ('https://HOOKS.example.com/gold/x', True),
+    ('http://hooks.example.com/gold/alert', False),
+    ('https://hooks.example.com/golden', False),
+    ('https://hooks.example.com:8443/gold/alert', False),
+    ('https://hooks.example.com.evil.test/gold/alert', False),
+    ('https://hooks.example.com@169.254.169.254/gold/alert', False),
+    ('http://127.0.0.1:5000/api/refresh', False),
+    ('file:///etc/passwd', False),
+])
+def test_webhook_allowlist(monkeypatch, url, allowed):
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', ['https://hooks.example.com/gold'])
+    assert webhook_allowed(url) is allowed
+    if allowed:
+        assert parse_rule(rule(webhook=url))['webhook'] == url
+    else:
+        with pytest.raises(ValueError):
+            parse_rule(rule(webhook=url))
+
+def test_dispatcher_skips_webhook_removed_from_allowlist(engine, monkeypatch):
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', ['https://hooks.example.com/'])
+    engine.store.add([parse_rule(rule(webhook='https://hooks.example.com/alert'))])
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', [])
+    posted = []
+    monkeypatch.setattr(engine.dispatcher, 'post', posted.append)
+    fire(engine, [tick('09:00:00', 1_401_000), tick('09:10:00', 1_399_000)])
+    assert posted == [] and len(engine.store.events(0, limit=10)) == 1
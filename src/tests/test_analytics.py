@@ -0,0 +1,27 @@
+import json
+
+from analytics import AnalyticsEngine
+from common import history_rows, synthetic_history
+from conftest import load_history
+from data_manager import DataManager
+
+def test_incremental_rollup_matches_batch_rebuild(data_manager):
+    store = data_manager.store
+    history = synthetic_history(1300, change_rate=0.5, nan_rate=0.02)
+    load_history(store, '1', history.iloc[:1000])
+    engine = AnalyticsEngine(data_manager)
+    data_manager.commit_listeners.append(engine.on_commit)
+    engine.series('1')
+
+    committed = 0
+    for row in history_rows(history.iloc[1000:]):
+        row = {key: (None if value != value else value) for key, value in row.items()}
+        if store.append('1', row):
+            committed += 1
+            data_manager.notify_commit('1', row)
+    incremental = engine.series('1')
+
+    rebuilt = AnalyticsEngine(DataManager(store=store)).series('1')
+    assert json.dumps(incremental, sort_keys=True) == json.dumps(rebuilt, sort_keys=True)
+    assert engine._rollups['1'].ticks == 1000 + committed
+    assert engine.series('1') is incremental
@@ -0,0 +1,43 @@
+import config
+from compression import EncodedBody
+from storage import ExcelTickStore
+
+def test_entity_tag_depends_on_encoding():
+    payload = EncodedBody(b'{"a":1}', 'application/json')
+    tags = {payload.entity_tag(encoding) for encoding in (None, 'gzip', 'br')}
+    assert len(tags) == 3
+    assert payload.entity_tag(None) == payload.etag
+
+def test_chart_etag_per_encoding(client):
+    plain = client.get('/api/gold-data?berat=1', headers={'Accept-Encoding': 'identity'})
+    gzipped = client.get('/api/gold-data?berat=1', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    plain_tag, gzip_tag = plain.get_etag()[0], gzipped.get_etag()[0]
+    assert gzip_tag == f'{plain_tag}-gzip'
+
+    # ETag identity tidak boleh memvalidasi cache gzip (dan sebaliknya)
+    assert client.get('/api/gold-data?berat=1', headers={'Accept-Encoding': 'gzip',
+                                                          'If-None-Match': f'"{plain_tag}"'}).status_code == 200
+    assert client.get('/api/gold-data?berat=1', headers={'Accept-Encoding': 'identity',
+                                                          'If-None-Match': f'"{gzip_tag}"'}).status_code == 200
+    assert client.get('/api/gold-data?berat=1', headers={'Accept-Encoding': 'gzip',
+                                                          'If-None-Match': f'"{gzip_tag}"'}).status_code == 304
+
+def test_shell_revalidates_with_encoded_etag(client):
+    first = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200 and first.get_etag()[0].endswith('-gzip')
+    again = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+def test_alert_webhook_outside_allowlist_rejected(client, monkeypatch):
+    monkeypatch.setattr(config, 'ALERT_WEBHOOK_ALLOWLIST', [])
+    response = client.post('/api/alerts', json={'vendor': 'ANTAM', 'berat': '1', 'kind': 'below', 'threshold': 1,
+                                                'webhook': 'http://169.254.169.254/latest/meta-data'})
+    assert response.status_code == 400
+
+def test_confirmations_unsupported_on_excel_store(client, app_module, monkeypatch):
+    assert client.get('/api/confirmations?berat=1').status_code == 200
+    monkeypatch.setattr(app_module.data_manager, 'store', ExcelTickStore())
+    response = client.get('/api/confirmations?berat=1')
+    assert response.status_code == 501 and 'excel' in response.get_json()['error']
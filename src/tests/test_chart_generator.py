@@ -0,0 +1,158 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_payload import decode_binary
+from chart_generator import ChartGenerator, ChartQuery, JUAL_COLUMNS
+from conftest import load_history
+from common import synthetic_history
+from storage import PRICE_COLUMNS, history_epoch
+from utils import display_labels
+
+def assert_same_series(actual, expected):
+    np.testing.assert_array_equal(actual.ts, expected.ts)
+    np.testing.assert_array_equal(actual.prices, expected.prices)
+    np.testing.assert_array_equal(actual.labels, expected.labels)
+    np.testing.assert_array_equal(actual.ticks_ts, expected.ticks_ts)
+    np.testing.assert_array_equal(actual.ticks, expected.ticks)
+    assert actual.latest == expected.latest
+
+def legacy_filter_changed_prices(df):
+    """ChartGenerator.filter_changed_prices baseline (loop iloc per baris), disalin apa adanya"""
+    if len(df) <= 1:
+        return df
+
+    df_sorted = df.sort_values(by=['Tanggal', 'Jam']).reset_index(drop=True)
+    filtered_indices = [0]  # Selalu sertakan data pertama
+
+    for i in range(1, len(df_sorted)):
+        current = df_sorted.iloc[i]
+        previous = df_sorted.iloc[i-1]
+
+        # Cek apakah ada perubahan harga (termasuk UBS)
+        price_changed = (
+            current['GALERI24_Jual'] != previous['GALERI24_Jual'] or
+            current['GALERI24_Buyback'] != previous['GALERI24_Buyback'] or
+            current['ANTAM_Jual'] != previous['ANTAM_Jual'] or
+            current['ANTAM_Buyback'] != previous['ANTAM_Buyback'] or
+            current['UBS_Jual'] != previous['UBS_Jual'] or
+            current['UBS_Buyback'] != previous['UBS_Buyback']
+        )
+
+        if price_changed:
+            filtered_indices.append(i)
+
+    # Selalu sertakan data terakhir
+    if len(df_sorted) - 1 not in filtered_indices:
+        filtered_indices.append(len(df_sorted) - 1)
+
+    return df_sorted.iloc[filtered_indices].reset_index(drop=True)
+
+@pytest.fixture
+def gappy_history(history):
+    """History dengan harga kosong acak (nan_rate) plus satu vendor hilang (UBS) di satu rentang"""
+    history = history.copy()
+    history.loc[500:799, ['UBS_Jual', 'UBS_Buyback']] = np.nan
+    return history
+
+def test_filter_matches_legacy_loop_without_nan():
+    df = synthetic_history(2000, change_rate=0.3)
+    pd.testing.assert_frame_equal(ChartGenerator(None).filter_changed_prices(df), legacy_filter_changed_prices(df))
+
+def test_filter_treats_missing_prices_as_unchanged(gappy_history):
+    """Perubahan semantik yang disengaja: loop lama membandingkan NaN != NaN (selalu True), jadi setiap
+    tick yang punya harga kosong ikut di-emit sebagai 'perubahan'. Versi vectorized menganggap
+    kosong == kosong; selain itu hasilnya sama dengan loop lama (NaN diganti sentinel sebelum loop)."""
+    vectorized = ChartGenerator(None).filter_changed_prices(gappy_history)
+    assert len(legacy_filter_changed_prices(gappy_history)) > len(vectorized)
+
+    expected = legacy_filter_changed_prices(gappy_history.fillna(-1))
+    pd.testing.assert_frame_equal(vectorized.fillna(-1), expected)
+
+def test_series_matches_legacy_loop(data_manager, gappy_history):
+    load_history(data_manager.store, '1', gappy_history)
+    series = ChartGenerator(data_manager).get_chart_series('1')
+
+    # Baseline: baris tanpa harga Jual dibuang, lalu filter; harga kosong = 0 di payload (sentinel 0)
+    valid = gappy_history.dropna(subset=JUAL_COLUMNS, how='all')
+    expected = legacy_filter_changed_prices(valid.fillna(0))
+    np.testing.assert_array_equal(series.ts, history_epoch(expected))
+    np.testing.assert_array_equal(series.prices, expected[PRICE_COLUMNS].to_numpy(dtype='int64'))
+    assert series.labels.tolist() == display_labels(series.ts).tolist()
+    assert len(series.ts) < len(valid)
+
+def test_new_ticks_are_appended_without_full_reload(data_manager, history, monkeypatch):
+    store = data_manager.store
+    load_history(store, '1', history.iloc[:1500])
+    generator = ChartGenerator(data_manager)
+    generator.get_chart_series('1')
+
+    # Setelah build pertama, versi baru hanya boleh membaca tick baru
+    def full_read(*args, **kwargs):
+        raise AssertionError('full history reload')
+    monkeypatch.setattr(store, 'read', full_read)
+    for position in range(1500, len(history)):
+        load_history(store, '1', history.iloc[position:position + 1])
+        if position % 7 == 0:
+            generator.get_chart_series('1')
+    extended = generator.get_chart_series('1')
+    monkeypatch.undo()
+
+    assert extended.version == store.version('1')
+    assert_same_series(extended, ChartGenerator(data_manager).get_chart_series('1'))
+
+def test_ohlc_and_lttb_after_extend_match_fresh_build(data_manager, history):
+    store = data_manager.store
+    load_history(store, '1', history.iloc[:1000])
+    generator = ChartGenerator(data_manager)
+    generator.get_chart_series('1')
+    load_history(store, '1', history.iloc[1000:])
+
+    for query in (ChartQuery(resolution='1h'), ChartQuery(max_points=200), ChartQuery(since=0)):
+        assert generator.get_chart_data('1', query) == ChartGenerator(data_manager).get_chart_data('1', query)
+
+def test_rewritten_last_tick_triggers_rebuild(data_manager):
+    store = data_manager.store
+    history = synthetic_history(50, change_rate=0.5)
+    load_history(store, '1', history)
+    generator = ChartGenerator(data_manager)
+    generator.get_chart_series('1')
+
+    # Tick di detik yang sama menimpa tick terakhir (INSERT OR REPLACE)
+    last = history.iloc[[-1]].copy()
+    last['ANTAM_Jual'] += 5000
+    load_history(store, '1', last)
+    series = generator.get_chart_series('1')
+    assert series.prices[-1, PRICE_COLUMNS.index('ANTAM_Jual')] == int(last['ANTAM_Jual'].iat[0])
+    assert_same_series(series, ChartGenerator(data_manager).get_chart_series('1'))
+
+def test_trailing_unchanged_tick_is_replaced(data_manager):
+    store = data_manager.store
+    history = synthetic_history(3, change_rate=0.0)
+    load_history(store, '1', history.iloc[:2])
+    generator = ChartGenerator(data_manager)
+    # Baris kedua sama dengan pertama: tetap tampil sebagai data terakhir
+    assert len(generator.get_chart_series('1').ts) == 2
+
+    load_history(store, '1', history.iloc[2:])
+    series = generator.get_chart_series('1')
+    assert len(series.ts) == 2
+    assert series.labels[-1] == display_labels(series.ticks_ts[-1:])[0]
+
+def test_missing_series_is_empty(data_manager):
+    data = ChartGenerator(data_manager).get_chart_data('9')
+    assert data['isEmpty'] and data['dates'] == [] and 'error' in data
+
+def test_binary_payload_decodes_to_json(data_manager, history):
+    load_history(data_manager.store, '1', history)
+    generator = ChartGenerator(data_manager)
+    full = json.loads(generator.get_chart_payload('1', None, 'json').body)
+    queries = [None, ChartQuery(max_points=300), ChartQuery(resolution='1d'), ChartQuery(since=full['cursor'] - 3600)]
+    for query in queries:
+        assert decode_binary(generator.get_chart_payload('1', query, 'bin').body) == \
+            json.loads(generator.get_chart_payload('1', query, 'json').body)
+
+    missing = decode_binary(generator.get_chart_payload('9', None, 'bin').body)
+    assert missing['isEmpty'] and missing['dates'] == [] and 'error' in missing
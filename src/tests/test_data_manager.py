@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+
+import config
+import data_manager as data_manager_module
+import scraper
+from common import fixture_server, load_fixture
+from scraper import PriceIndex
+from sources import Galeri24Adapter, ScrapeEngine
+from storage import ExcelTickStore
+from utils import get_current_timestamp
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Jam WIB palsu untuk data_manager; clock.tick(detik) memajukan waktu"""
+    class Clock:
+        def __init__(self):
+            self.now = get_current_timestamp()[2].replace(microsecond=0)
+
+        def tick(self, seconds=60):
+            self.now += timedelta(seconds=seconds)
+
+        def timestamp(self):
+            return self.now.strftime('%Y-%m-%d'), self.now.strftime('%H:%M:%S'), self.now
+
+    clock = Clock()
+    monkeypatch.setattr(data_manager_module, 'get_current_timestamp', clock.timestamp)
+    return clock
+
+def unchanged(price_index):
+    """Index yang dikembalikan scraper saat tabel harga sama dengan scrape sebelumnya (304/hash sama)"""
+    return PriceIndex(price_index, unchanged=True)
+
+def test_complete_index_stops_retrying_for_configured_vendors(data_manager, monkeypatch):
+    price_index = scraper.parse_price_index(load_fixture())
+    calls = []
+
+    def scrape(deadline=None):
+        calls.append(deadline)
+        return price_index
+
+    monkeypatch.setattr(config, 'RETRY_BASE_DELAY', 0.01)
+    monkeypatch.setattr(data_manager_module, 'scrape_all_sources', scrape)
+    monkeypatch.setattr(data_manager_module, 'VENDORS', ['GALERI 24', 'ANTAM'])
+    assert data_manager.fetch_price_index(['1']) is price_index
+    assert len(calls) == 1
+
+def test_unchanged_polls_confirm_last_tick(data_manager, clock):
+    price_index = scraper.parse_price_index(load_fixture())
+    assert data_manager.save_price_index(price_index, ['1', '2']) == {'1': 'saved', '2': 'saved'}
+    first = int(clock.now.timestamp())
+    version = data_manager.store.version('1')
+
+    for _ in range(3):
+        clock.tick()
+        assert data_manager.save_price_index(unchanged(price_index), ['1', '2'])['1'] == 'unchanged'
+    clock.tick()
+    data_manager.update_excel_data('1', unchanged(price_index))
+
+    for berat in ('1', '2'):
+        assert data_manager.store.confirmations(berat) == [
+            {'since': first, 'last_seen': int(clock.now.timestamp()) if berat == '1' else first + 180,
+             'seen': 5 if berat == '1' else 4}]
+    assert data_manager.store.version('1') == version
+
+def test_unchanged_poll_writes_prices_that_differ_from_last_tick(data_manager, clock):
+    price_index = scraper.parse_price_index(load_fixture())
+    data_manager.save_price_index(price_index, ['1'])
+    version = data_manager.store.version('1')
+    committed = []
+    data_manager.commit_listeners.append(lambda berat, row: committed.append(berat))
+    # Tabel halaman dianggap sama, tetapi harganya tidak pernah tersimpan (mis. hash tercatat terlalu awal)
+    changed = PriceIndex({key: (jual + 1000, buyback) if jual is not None else (jual, buyback)
+                          for key, (jual, buyback) in price_index.items()}, unchanged=True)
+    clock.tick()
+    assert data_manager.save_price_index(changed, ['1']) == {'1': 'saved'}
+    assert [run['seen'] for run in data_manager.store.confirmations('1')] == [1, 1]
+    assert data_manager.store.version('1') > version and '1' in committed
+
+def test_excel_store_confirms_without_writing(workdir, clock):
+    store = ExcelTickStore()
+    manager = data_manager_module.DataManager(store=store)
+    price_index = scraper.parse_price_index(load_fixture())
+    manager.save_price_index(price_index, ['1'])
+    version = store.version('1')
+    clock.tick()
+    confirmed, written = manager.confirm_prices(manager.select_prices(price_index, ['1'])[1])
+    assert '1' in confirmed and written == []
+    assert store.version('1') == version
+
+@pytest.fixture
+def live_page(data_manager, monkeypatch):
+    """scrape_all_sources diarahkan ke server fixture lokal (ETag/304 + hash tabel harga asli)"""
+    with fixture_server() as host:
+        engine = ScrapeEngine([Galeri24Adapter(name='fixture', url=host + '/page', timeout=5)])
+        monkeypatch.setattr(data_manager_module, 'scrape_all_sources', lambda deadline=None: engine.scrape())
+        yield engine
+
+def test_single_weight_refresh_does_not_mark_page_unchanged(data_manager, live_page, clock):
+    data_manager.update_excel_data('1')
+    clock.tick()
+    # 2g belum pernah disimpan dari halaman ini: siklus berikutnya harus parse dan menyimpannya
+    assert data_manager.save_price_index(data_manager.fetch_price_index(['1', '2']), ['1', '2']) == {
+        '1': 'confirmed', '2': 'saved'}
+    clock.tick()
+    assert data_manager.save_price_index(data_manager.fetch_price_index(['1', '2']), ['1', '2']) == {
+        '1': 'unchanged', '2': 'unchanged'}
+
+def test_failed_save_does_not_mark_page_unchanged(data_manager, live_page, clock, monkeypatch):
+    append_prices = data_manager.store.append_prices
+
+    def fail_once(*args):
+        monkeypatch.setattr(data_manager.store, 'append_prices', append_prices)
+        raise OSError('disk full')
+
+    monkeypatch.setattr(data_manager.store, 'append_prices', fail_once)
+    with pytest.raises(OSError):
+        data_manager.save_price_index(data_manager.fetch_price_index(['1', '2']), ['1', '2'])
+    clock.tick()
+    price_index = data_manager.fetch_price_index(['1', '2'])
+    assert not price_index.unchanged
+    assert data_manager.save_price_index(price_index, ['1', '2']) == {'1': 'saved', '2': 'saved'}
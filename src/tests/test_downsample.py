@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from downsample import bucket_offset, lttb_indices, ohlc_buckets
+
+@pytest.mark.parametrize('max_points', [3, 10, 97, 500])
+def test_lttb_keeps_endpoints_within_budget(max_points):
+    rng = np.random.default_rng(1)
+    n = 1000
+    x = np.arange(n) * 60.0
+    ys = np.cumsum(rng.normal(size=(n, 2)), axis=0)
+    ys[rng.random((n, 2)) < 0.02] = np.nan
+
+    indices = lttb_indices(x, ys, max_points)
+    assert len(indices) <= max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+
+def test_lttb_keeps_spike_and_short_series():
+    x = np.arange(200, dtype='float64')
+    ys = np.zeros((200, 1))
+    ys[123] = 50.0
+    assert 123 in lttb_indices(x, ys, 20)
+    # Budget >= jumlah titik (atau terlalu kecil untuk segitiga): semua titik
+    assert list(lttb_indices(x[:5], ys[:5], 10)) == [0, 1, 2, 3, 4]
+    assert len(lttb_indices(x, ys, None)) == 200
+
+def test_ohlc_per_bucket():
+    ts = [0, 10, 50, 60, 70, 110, 240]
+    values = [[10, 1], [12, np.nan], [9, 3], [20, 4], [18, 2], [19, 5], [7, 7]]
+
+    start, open_, high, low, close = ohlc_buckets(ts, values, 60)
+    assert list(start) == [0, 60, 240]
+    np.testing.assert_array_equal(open_, [[10, 1], [20, 4], [7, 7]])
+    # NaN diabaikan untuk high/low
+    np.testing.assert_array_equal(high, [[12, 3], [20, 5], [7, 7]])
+    np.testing.assert_array_equal(low, [[9, 1], [18, 2], [7, 7]])
+    np.testing.assert_array_equal(close, [[9, 3], [19, 5], [7, 7]])
+
+def test_ohlc_offset_shifts_bucket_boundaries():
+    # Offset +30 detik: batas bucket di 30, 90, ...
+    start, open_, high, low, close = ohlc_buckets([0, 20, 40, 100], [1, 2, 3, 4], 60, offset=30)
+    assert list(start) == [-30, 30, 90]
+    assert open_[:, 0].tolist() == [1, 3, 4]
+    assert close[:, 0].tolist() == [2, 3, 4]
+
+    # Bucket mingguan mulai Senin 00:00 (1970-01-05 = Senin)
+    monday = 4 * 24 * 60 * 60
+    start, *_ = ohlc_buckets([monday - 1, monday], [1, 2], 7 * 24 * 60 * 60, bucket_offset('1w'))
+    assert list(start) == [monday - 7 * 24 * 60 * 60, monday]
+
+def test_ohlc_empty_series():
+    start, open_, high, low, close = ohlc_buckets([], np.empty((0, 2)), 60)
+    assert len(start) == 0 and open_.shape == (0, 2)
@@ -0,0 +1,48 @@
+import socket
+
+import pytest
+
+from event_stream import STREAM_PATH, StreamHub, TickEventBroker
+
+@pytest.fixture
+def hub_factory():
+    hubs = []
+
+    def start(**kwargs):
+        hub = StreamHub(TickEventBroker(), port=0, **kwargs)
+        assert hub.start()
+        hubs.append(hub)
+        return hub
+
+    yield start
+    for hub in hubs:
+        hub.stop()
+
+def handshake(hub, origin=None, host=None):
+    headers = f'GET {STREAM_PATH} HTTP/1.1\r\nHost: {host or f"127.0.0.1:{hub.port}"}\r\n'
+    if origin:
+        headers += f'Origin: {origin}\r\n'
+    with socket.create_connection(('127.0.0.1', hub.port), timeout=5) as sock:
+        sock.sendall((headers + '\r\n').encode('latin-1'))
+        data = b''
+        while b'\r\n\r\n' not in data:
+            data += sock.recv(4096)
+    head = data.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    return dict(line.split(': ', 1) for line in head[1:])
+
+def test_hub_binds_loopback_by_default():
+    assert StreamHub(TickEventBroker()).host == '127.0.0.1'
+
+def test_same_host_origin_allowed_by_default(hub_factory):
+    hub = hub_factory(allowed_origins=[])
+    headers = handshake(hub, origin='http://127.0.0.1:5000')
+    assert headers['Access-Control-Allow-Origin'] == 'http://127.0.0.1:5000'
+    assert 'Access-Control-Allow-Origin' not in handshake(hub, origin='https://evil.example')
+    assert 'Access-Control-Allow-Origin' not in handshake(hub)
+
+def test_configured_origins(hub_factory):
+    hub = hub_factory(allowed_origins=['https://emas.example'])
+    assert handshake(hub, origin='https://emas.example')['Access-Control-Allow-Origin'] == 'https://emas.example'
+    assert 'Access-Control-Allow-Origin' not in handshake(hub, origin='http://127.0.0.1:5000')
+    wildcard = hub_factory(allowed_origins=['*'])
+    assert handshake(wildcard, origin='https://any.example')['Access-Control-Allow-Origin'] == '*'
@@ -0,0 +1,79 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import load_history
+from export import HistoryExporter, pyarrow_available
+from storage import COLUMNS, history_epoch
+
+NEW_TICK = {'Tanggal': '2030-01-01', 'Jam': '00:00:00', 'GALERI24_Jual': 1.0, 'ANTAM_Jual': 2.0, 'UBS_Jual': 3.0}
+
+def drain(kind, result):
+    if kind == 'file':
+        with open(result, 'rb') as f:
+            return f.read()
+    return b''.join(result)
+
+def read_csv(body):
+    return pd.read_csv(io.BytesIO(body), dtype={'Tanggal': str, 'Jam': str})
+
+@pytest.fixture
+def exporter(store, history, workdir):
+    load_history(store, '1', history)
+    return HistoryExporter(store, cache_dir=str(workdir / 'exports'), chunk_rows=300)
+
+def cached_files(exporter):
+    return sorted(name for name in os.listdir(exporter.cache_dir) if not name.startswith('.tmp-'))
+
+def test_csv_matches_store_and_is_cached(exporter, store):
+    exported = read_csv(drain(*exporter.export('1', 'csv')))
+    expected = store.read('1')
+    assert list(exported.columns) == COLUMNS
+    assert exported.fillna(-1).equals(expected[COLUMNS].fillna(-1).astype(exported.dtypes.to_dict()))
+
+    kind, path = exporter.export('1', 'csv')
+    assert kind == 'file' and path.endswith(f"v{store.version('1')}.csv")
+
+def test_new_version_regenerates_and_drops_stale_file(exporter, store):
+    drain(*exporter.export('1', 'csv'))
+    store.append('1', NEW_TICK)
+    kind, result = exporter.export('1', 'csv')
+    assert kind == 'stream'
+    assert read_csv(drain(kind, result))['Tanggal'].iat[-1] == '2030-01-01'
+    assert len(cached_files(exporter)) == 1
+
+def test_commit_before_stream_is_cached_under_new_version(exporter, store):
+    # Commit setelah request diterima tetapi sebelum stream dibaca: nama cache harus versi isi yang ditulis
+    kind, result = exporter.export('1', 'csv')
+    store.append('1', NEW_TICK)
+    assert read_csv(drain(kind, result))['Tanggal'].iat[-1] == '2030-01-01'
+    assert cached_files(exporter) == [os.path.basename(exporter.cache_path('1', 'csv', None, None))]
+
+def test_commit_during_stream_keeps_snapshot(exporter, store):
+    version = store.version('1')
+    kind, result = exporter.export('1', 'csv')
+    first = next(result)
+    store.append('1', NEW_TICK)
+    exported = read_csv(first + b''.join(result))
+    assert exported['Tanggal'].iat[-1] != '2030-01-01'
+    assert cached_files(exporter) == [os.path.basename(exporter.cache_path('1', 'csv', None, None, version))]
+    assert exporter.export('1', 'csv')[0] == 'stream'
+
+def test_range_and_xlsx_exports(exporter, store):
+    expected = store.read('1')
+    ts = history_epoch(expected)
+    start, end = int(ts[len(ts) // 3]), int(ts[len(ts) // 2])
+    ranged = read_csv(drain(*exporter.export('1', 'csv', start, end)))
+    assert len(ranged) == int(((ts >= start) & (ts <= end)).sum())
+
+    kind, path = exporter.export('1', 'xlsx', None, int(ts[499]))
+    workbook = pd.read_excel(path, dtype={'Tanggal': str, 'Jam': str})
+    assert kind == 'file' and len(workbook) == 500
+    assert workbook.iloc[-1].fillna(-1).tolist()[2:] == expected.iloc[499].fillna(-1).tolist()[2:]
+
+@pytest.mark.skipif(not pyarrow_available(), reason='pyarrow not installed')
+def test_parquet_export(exporter, store):
+    kind, path = exporter.export('1', 'parquet')
+    assert len(pd.read_parquet(path)) == len(store.read('1'))
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+import data_manager as data_manager_module
+import scraper
+from common import load_fixture
+from data_manager import RefreshError
+from jobs import RefreshJobQueue
+from resilience import CircuitBreaker, CircuitOpenError
+
+def wait_done(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_concurrent_requests_share_one_job():
+    queue = RefreshJobQueue(max_workers=4)
+    release = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+        return {'rows': 1}
+
+    first, created = queue.submit('update', '1', refresh)
+    assert created
+    others = [queue.submit('update', '1', refresh) for _ in range(5)]
+    assert all(job is first and not created for job, created in others)
+    # Berat lain = job sendiri
+    second, created = queue.submit('update', '2', lambda: None)
+    assert created and second is not first
+
+    release.set()
+    assert wait_done(first).status == 'done'
+    assert first.requests == 6 and len(calls) == 1
+    assert first.result == {'rows': 1}
+
+    # Setelah selesai, request berikutnya memulai job baru
+    again, created = queue.submit('update', '1', refresh)
+    assert created and again is not first
+    wait_done(again)
+
+def test_job_fails_when_refresh_raises():
+    queue = RefreshJobQueue(max_workers=1)
+
+    def refresh():
+        raise RefreshError('Data 1g tidak lengkap')
+
+    job, _ = queue.submit('update', '1', refresh)
+    assert wait_done(job).status == 'failed'
+    assert job.to_dict()['error'] == 'Data 1g tidak lengkap'
+    assert queue.submit('update', '1', lambda: None)[1]
+
+def test_incomplete_data_fails_refresh(data_manager):
+    price_index = scraper.parse_price_index(load_fixture())
+    incomplete = scraper.PriceIndex({key: value for key, value in price_index.items() if key[0] != 'UBS'})
+
+    queue = RefreshJobQueue(max_workers=1)
+    job, _ = queue.submit('update', '1', lambda: data_manager.update_excel_data('1', incomplete))
+    assert wait_done(job).status == 'failed'
+    assert 'UBS' in job.error
+    assert not data_manager.store.exists('1')
+
+    job, _ = queue.submit('update', '1', lambda: len(data_manager.update_excel_data('1', price_index)))
+    assert wait_done(job).status == 'done' and job.result == 1
+
+def test_refresh_fails_fast_while_circuit_open(data_manager, monkeypatch):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(data_manager_module, 'scrape_breaker', breaker)
+    calls = []
+    monkeypatch.setattr(data_manager_module, 'scrape_all_sources', lambda deadline=None: calls.append(deadline))
+
+    with pytest.raises(CircuitOpenError):
+        data_manager.update_excel_data('1')
+    assert calls == []
+
+def test_circuit_breaker_opens_then_probes_once():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0.05)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    # Half-open: tepat satu percobaan sekaligus
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
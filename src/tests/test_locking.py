@@ -0,0 +1,53 @@
+import os
+import threading
+
+import data_manager as data_manager_module
+from common import fixture_server, history_rows, synthetic_history
+from data_manager import hold_series_locks
+from sources import Galeri24Adapter, ScrapeEngine
+from storage import ExcelTickStore
+
+def test_series_lock_only_blocks_its_own_series(data_manager, monkeypatch):
+    with fixture_server() as host:
+        monkeypatch.setattr(data_manager_module, 'scrape_all_sources', lambda deadline=None: ScrapeEngine(
+            [Galeri24Adapter(name='fixture', url=f'{host}/page', timeout=10)]).scrape(deadline))
+        threads = {berat: threading.Thread(target=data_manager.update_excel_data, args=(berat,))
+                   for berat in ('1', '2')}
+        with hold_series_locks(['1'], 'test'):
+            for thread in threads.values():
+                thread.start()
+            threads['2'].join(timeout=10)
+            assert not threads['2'].is_alive()
+            threads['1'].join(timeout=0.3)
+            assert threads['1'].is_alive()
+        threads['1'].join(timeout=10)
+        assert not threads['1'].is_alive()
+    assert data_manager.store.exists('1') and data_manager.store.exists('2')
+
+def test_excel_readers_never_see_partial_workbook(workdir):
+    store = ExcelTickStore()
+    store.ensure_structure(['1'])
+    rows = history_rows(synthetic_history(15, change_rate=1.0, seed=7))
+    errors, lengths = [], []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                lengths.append(len(store.read('1')))
+            except Exception as e:
+                errors.append(repr(e))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for row in rows:
+            with hold_series_locks(['1'], 'test'):
+                store.append('1', row)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert not errors and lengths
+    assert len(store.read('1')) == len(rows)
+    assert not [name for name in os.listdir(workdir) if '.tmp-' in name]
@@ -0,0 +1,41 @@
+import pytest
+
+import scraper
+
+# Baris 100g dan 10g SEBELUM 1g: pencocokan substring '1' akan mengambil baris yang salah
+PAGE = '''<html><body>
+<div class="grid divide-y divide-neutral-200 border border-neutral-200">
+  <div class="bg-primary-100 p-4">Harga ANTAM</div>
+  <div class="grid grid-cols-5 divide-x divide-neutral-200">
+    <div class="bg-neutral-50">Berat</div><div class="bg-neutral-50">Harga Jual</div><div class="bg-neutral-50">Harga Buyback</div>
+  </div>
+  <div class="grid grid-cols-5 divide-x divide-neutral-200"><div>100 gram</div><div>Rp224.000.000</div><div>Rp206.000.000</div></div>
+  <div class="grid grid-cols-5 divide-x divide-neutral-200"><div>10 gr</div><div>Rp22.500.000</div><div>Rp20.700.000</div></div>
+  <div class="grid grid-cols-5 divide-x divide-neutral-200"><div>1</div><div>Rp2.290.000</div><div>Rp2.100.000</div></div>
+</div>
+</body></html>'''.encode()
+
+@pytest.mark.parametrize('engine', ['lxml', 'strainer', 'soup'])
+def test_weight_keys_match_exactly(engine):
+    if engine == 'lxml' and not scraper.lxml_available():
+        pytest.skip('lxml not installed')
+    price_index = scraper.parse_price_index(PAGE, engine=engine)
+    assert price_index == {
+        ('ANTAM', '100'): (224_000_000, 206_000_000),
+        ('ANTAM', '10'): (22_500_000, 20_700_000),
+        ('ANTAM', '1'): (2_290_000, 2_100_000)
+    }
+
+    harga_emas = scraper.build_harga_emas(price_index, '1')
+    assert (harga_emas['ANTAM']['Jual'], harga_emas['ANTAM']['Buyback']) == (2_290_000, 2_100_000)
+    assert scraper.build_harga_emas(price_index, '10 gr')['ANTAM']['Jual'] == 22_500_000
+    # Berat yang tidak ada di halaman tidak jatuh ke baris lain
+    assert scraper.build_harga_emas(price_index, '0.1')['ANTAM']['Jual'] is None
+
+def test_normalize_berat():
+    assert scraper.normalize_berat('1') == '1'
+    assert scraper.normalize_berat('10') == '10'
+    assert scraper.normalize_berat('100 gram') == '100'
+    assert scraper.normalize_berat('0,5 gr') == '0.5'
+    assert scraper.normalize_berat('2.0') == '2'
+    assert scraper.normalize_berat('-1') is None
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import scraper
+from common import SRC_DIR, fixture_server, load_fixture
+from sources import Galeri24Adapter, ScrapeEngine
+
+def test_import_does_not_load_requests():
+    code = "import sys, sources; sys.exit('requests' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR).returncode == 0
+
+def test_partial_merge_keeps_healthy_source():
+    reference = scraper.parse_price_index(load_fixture())
+    with fixture_server() as healthy, fixture_server() as broken:
+        engine = ScrapeEngine([Galeri24Adapter(name='healthy', url=healthy + '/page', timeout=5),
+                               Galeri24Adapter(name='broken', url=broken + '/error', timeout=5)])
+        price_index = engine.scrape()
+    assert dict(price_index) == reference
+    assert {name: info['status'] for name, info in price_index.sources.items()}['broken'] == 'error'
+    assert not price_index.unchanged
+
+def test_second_scrape_is_unchanged():
+    with fixture_server() as host:
+        engine = ScrapeEngine([Galeri24Adapter(name='a', url=host + '/page', timeout=5)])
+        first = engine.scrape()
+        # Belum tersimpan: halaman di-parse lagi, baru unchanged setelah commit_page_state
+        assert not engine.scrape().unchanged
+        scraper.commit_page_state(first)
+        assert engine.scrape().unchanged
+
+def test_not_modified_response_is_closed(monkeypatch):
+    import requests
+    closed = []
+    close = requests.Response.close
+
+    def spy(response):
+        closed.append(response.status_code)
+        close(response)
+
+    monkeypatch.setattr(requests.Response, 'close', spy)
+    with fixture_server() as host:
+        state = scraper.new_page_state()
+        status, _, _, validators = scraper.fetch_galeri24_page(url=host + '/page', timeout=5, state=state)
+        state.update(validators)
+        assert scraper.fetch_galeri24_page(url=host + '/page', timeout=5, state=state)[0] == 304
+    # stream=True: tanpa close, koneksi 304 baru kembali ke pool saat response di-GC
+    assert closed == [200, 304]
@@ -0,0 +1,62 @@
+from common import history_rows, synthetic_history
+from conftest import load_history
+from storage import SQLiteTickStore
+from utils import wib_epoch
+
+def test_exists_only_for_weights_with_ticks(store):
+    assert not store.exists('1')
+    assert not store.exists('5')
+    load_history(store, '1', synthetic_history(3))
+    assert store.exists('1')
+    assert not store.exists('2')
+    assert store.weights() == ['1']
+
+def test_append_stores_only_price_changes(store):
+    rows = [{key: (None if value != value else value) for key, value in row.items()}
+            for row in history_rows(synthetic_history(300, change_rate=0.05))]
+    written = sum(store.append('1', row) for row in rows)
+
+    assert len(store.read('1')) == written < len(rows)
+    assert store.version('1') == written
+
+    # Setiap poll tercakup tepat satu run konfirmasi
+    runs = store.confirmations('1')
+    poll_ts = [wib_epoch(row['Tanggal'], row['Jam']) for row in rows]
+    assert sum(run['seen'] for run in runs) == len(rows)
+    assert runs[0]['since'] == poll_ts[0] and runs[-1]['last_seen'] == poll_ts[-1]
+    assert all(a['last_seen'] < b['since'] for a, b in zip(runs, runs[1:]))
+    middle = poll_ts[len(poll_ts) // 2]
+    window = store.confirmations('1', middle, middle)
+    assert len(window) == 1 and window[0]['since'] <= middle <= window[0]['last_seen']
+
+def test_append_dedup_compares_only_written_vendors(store):
+    prices = {('GALERI 24', '1'): (1_400_000, 1_300_000), ('ANTAM', '1'): (1_500_000, 1_400_000),
+              ('UBS', '1'): (1_450_000, 1_350_000)}
+    first = wib_epoch('2030-01-01', '09:00:00')
+    # Tick terakhir juga memuat vendor dari sumber lain
+    assert store.append_prices(first, {**prices, ('LOTUS', '1'): (1_420_000, 1_320_000)}) == ['1']
+    version = store.version('1')
+
+    row = {'Tanggal': '2030-01-01', 'Jam': '09:10:00', 'GALERI24_Jual': 1_400_000, 'GALERI24_Buyback': 1_300_000,
+           'ANTAM_Jual': 1_500_000, 'ANTAM_Buyback': 1_400_000, 'UBS_Jual': 1_450_000, 'UBS_Buyback': 1_350_000}
+    assert not store.append('1', row)
+    assert store.version('1') == version
+    assert store.confirmations('1') == [{'since': first, 'last_seen': first + 600, 'seen': 2}]
+
+    assert store.append('1', dict(row, Jam='09:20:00', UBS_Jual=1_460_000))
+    assert len(store.confirmations('1')) == 2
+
+def test_weights_cached_until_another_connection_commits(store):
+    load_history(store, '1', synthetic_history(3))
+    assert store.weights() == ['1']
+
+    queries = []
+    store._connect().set_trace_callback(queries.append)
+    assert store.weights() == ['1']
+    assert not any('DISTINCT' in query for query in queries)
+
+    # Commit dari proses lain (leader) tetap terlihat
+    other = SQLiteTickStore(store.path)
+    assert other.append('10', history_rows(synthetic_history(1))[0])
+    assert store.weights() == ['1', '10']
+    store._connect().set_trace_callback(None)
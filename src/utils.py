@@ -1,9 +1,62 @@
 import pytz
 from datetime import datetime
+import importlib
+import logging
 import re
 import os  # Tambahkan ini
+import sys
+import types
+import config
 
 INDONESIA_TZ = pytz.timezone('Asia/Jakarta')
+WIB_OFFSET_SECONDS = 7 * 60 * 60  # WIB = UTC+7, tanpa DST
+
+class LazyModule(types.ModuleType):
+    """Proxy module yang baru di-import saat atribut pertama kali diakses (mempercepat cold start)"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+def lazy_import(name):
+    """Import module berat (pandas, numpy, requests, bs4) secara lazy"""
+    return LazyModule(name)
+
+class StdoutHandler(logging.StreamHandler):
+    """Tulis ke sys.stdout saat ini (bukan yang ada saat handler dibuat), seperti print"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+_log_root = logging.getLogger('gold')
+
+def get_logger(name):
+    """Logger aplikasi berlevel (config.LOG_LEVEL). Detail per baris/per request ada di DEBUG,
+    jadi senyap di jalur panas kecuali GOLD_LOG_LEVEL=DEBUG."""
+    if not _log_root.handlers:
+        handler = StdoutHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _log_root.addHandler(handler)
+        _log_root.setLevel(config.LOG_LEVEL)
+        _log_root.propagate = False
+    return _log_root.getChild(name)
+
+logger = get_logger('utils')
+
+np = lazy_import('numpy')
 
 def extract_price(text):
     """Extract numeric price from text dengan format Indonesia (1.234.567)"""
@@ -19,15 +72,15 @@ def extract_price(text):
         
         if clean_text and clean_text.isdigit():
             price = int(clean_text)
-            # Validasi: harga emas harus reasonable
-            if price > 100000 and price < 1000000000:  # Antara 100rb sampai 1M
+            # Validasi: harga emas harus reasonable (0.5 gram sampai 1 kg)
+            if price > 100000 and price < 10000000000:  # Antara 100rb sampai 10M
                 return price
             else:
-                print(f"⚠️ Price out of range: {price}")
+                logger.debug(f"⚠️ Price out of range: {price}")
         else:
-            print(f"⚠️ Invalid price format: '{text}' -> '{clean_text}'")
+            logger.debug(f"⚠️ Invalid price format: '{text}' -> '{clean_text}'")
     except Exception as e:
-        print(f"⚠️ Error extracting price from '{text}': {e}")
+        logger.warning(f"⚠️ Error extracting price from '{text}': {e}")
     return None
 
 def get_current_timestamp():
@@ -37,10 +90,65 @@ def get_current_timestamp():
     current_time_str = now_wib.strftime("%H:%M:%S")
     return today_date, current_time_str, now_wib
 
+EPOCH_NAIVE = datetime(1970, 1, 1)
+
+def wib_epoch(tanggal, jam):
+    """Epoch detik dari Tanggal ('YYYY-MM-DD') + Jam ('HH:MM[:SS]') WIB; ValueError jika tidak valid"""
+    local = datetime.fromisoformat(f"{tanggal} {jam}")
+    return int((local - EPOCH_NAIVE).total_seconds()) - WIB_OFFSET_SECONDS
+
 def format_display_date(tanggal, jam):
     """Format date for display in chart"""
     try:
         dt = datetime.strptime(f"{tanggal} {jam}", "%Y-%m-%d %H:%M:%S")
         return dt.strftime("%d %b %H:%M")
     except:
-        return f"{tanggal} {jam}"
\ No newline at end of file
+        return f"{tanggal} {jam}"
+
+MONTH_ABBR = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def _char_matrix(strings, width):
+    """Array string fixed-width numpy -> matriks karakter (n, width) tanpa loop Python"""
+    return strings.astype(f'U{width}').view('U1').reshape(len(strings), width)
+
+def _join_chars(chars):
+    width = chars.shape[1]
+    return np.ascontiguousarray(chars).view(f'U{width}').ravel()
+
+def wib_date_time_strings(ts):
+    """Epoch detik (int64) -> (Tanggal 'YYYY-MM-DD', Jam 'HH:MM:SS') WIB sebagai array numpy, vectorized"""
+    ts = np.asarray(ts, dtype='int64')
+    stamps = np.datetime_as_string((ts + WIB_OFFSET_SECONDS).astype('datetime64[s]'), unit='s')
+    chars = _char_matrix(stamps, 19)
+    return _join_chars(chars[:, :10]), _join_chars(chars[:, 11:19])
+
+def display_labels(ts):
+    """Label sumbu chart 'DD Mon HH:MM' (format format_display_date) untuk array epoch WIB, vectorized"""
+    ts = np.asarray(ts, dtype='int64')
+    if len(ts) == 0:
+        return np.empty(0, dtype='U12')
+    local = (ts + WIB_OFFSET_SECONDS).astype('datetime64[s]')
+    chars = _char_matrix(np.datetime_as_string(local, unit='m'), 16)
+    months = np.array(MONTH_ABBR).view('U1').reshape(12, 3)[local.astype('datetime64[M]').astype('int64') % 12]
+    label = np.full((len(ts), 12), ' ', dtype='U1')
+    label[:, 0:2] = chars[:, 8:10]
+    label[:, 3:6] = months
+    label[:, 7:12] = chars[:, 11:16]
+    return _join_chars(label)
+
+def parse_time_param(text, end_of_day=False):
+    """Parse parameter waktu (epoch detik, 'YYYY-MM-DD' atau 'YYYY-MM-DD HH:MM[:SS]' WIB) ke epoch detik"""
+    text = text.strip()
+    if text.isdigit():
+        return int(text)
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            dt = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        timestamp = int(INDONESIA_TZ.localize(dt).timestamp())
+        # Tanggal saja sebagai batas akhir berarti sampai akhir hari itu
+        if end_of_day and fmt == '%Y-%m-%d':
+            timestamp += 24 * 60 * 60 - 1
+        return timestamp
+    raise ValueError(f"Invalid time value: '{text}'")